@@ -0,0 +1,184 @@
+# core/backtest/engine.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from db.database import SessionLocal
+from db.models.feature_data import FeatureData
+from core.backtest.evaluation import evaluate_signals, summarize
+from core.train.labeling import build_labels
+from core.config import DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, STRONG_MOVE_CONFIDENCE_THRESHOLD
+
+# Bars after each prediction checked for a strong move (same limit live verification uses)
+BACKTEST_HORIZON_BARS = 10
+
+# Calendar days loaded past the end date so the last predictions get full forward windows
+FORWARD_BUFFER_DAYS = 30
+
+LOAD_CHUNK_ROWS = 250_000
+
+FEATURE_COLUMNS = ["week_day"] + FeatureData.get_feature_columns()
+
+def _backtest_query():
+    feature_cols = ", ".join(f"f.{c}" for c in FEATURE_COLUMNS)
+    return text(f"""
+        SELECT f.trading_symbol, f.exchange, f.date, {feature_cols}, e.high, e.low, e.close
+        FROM features_data f
+        JOIN eod_data e ON e.trading_symbol = f.trading_symbol AND e.exchange = f.exchange AND e.date = f.date
+        JOIN symbols s ON s.trading_symbol = f.trading_symbol AND s.active = TRUE
+        WHERE f.date BETWEEN :start AND :end
+        ORDER BY f.trading_symbol, f.date
+    """)
+
+def timestamped_log(message: str):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+def load_backtest_frame(start, end, chunk_rows: int = LOAD_CHUNK_ROWS) -> pd.DataFrame:
+    """Features joined with high/low/close for all active symbols, in symbol/date order."""
+    session = SessionLocal()
+    try:
+        chunks = []
+        for chunk in pd.read_sql(_backtest_query(), session.bind, params={"start": start, "end": end}, chunksize=chunk_rows):
+            numeric = chunk.columns.difference(["trading_symbol", "exchange", "date", "fo_eligible"])
+            chunk[numeric] = chunk[numeric].astype(np.float64)
+            chunks.append(chunk)
+    finally:
+        session.close()
+
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks, ignore_index=True)
+    df["date"] = pd.to_datetime(df["date"])
+    df["fo_eligible"] = df["fo_eligible"].fillna(False).astype(float)
+    return df
+
+def score_stored_models(df: pd.DataFrame, model_type: str) -> Tuple[np.ndarray, Dict[str, str]]:
+    """Class probabilities from the saved models, one predict_proba call per model artifact.
+
+    Saved models were fitted on history that may overlap the backtest range, so these
+    scores are in-sample up to each model's training date.
+    """
+    from core.predict.daily_predictor import get_model_file, load_model_data, prepare_features
+    from core.train.daily_trainer import calculate_additional_features
+
+    df = calculate_additional_features(df.copy())
+    probabilities = np.full((len(df), 2), np.nan)
+    errors = {}
+    rows_by_symbol = df.groupby("trading_symbol", sort=False).indices
+    groups: Dict[str, List[str]] = {}
+    for symbol in rows_by_symbol:
+        groups.setdefault(get_model_file(symbol, model_type), []).append(symbol)
+
+    for group_symbols in groups.values():
+        model_data = load_model_data(group_symbols[0], model_type)
+        if model_data is None:
+            errors.update({s: f"{model_type} model missing" for s in group_symbols})
+            continue
+        rows = np.concatenate([rows_by_symbol[s] for s in group_symbols])
+        try:
+            X = prepare_features(df.iloc[rows].copy(), model_data)
+            probabilities[rows] = model_data["model"].predict_proba(X)[:, :2]
+        except Exception as e:
+            errors.update({s: f"{model_type} prediction failed: {e}" for s in group_symbols})
+    return probabilities, errors
+
+def walk_forward_folds(start, end, retrain_months: int) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Consecutive [fold_start, fold_end) periods covering start..end."""
+    edges = list(pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=pd.DateOffset(months=retrain_months)))
+    edges.append(pd.Timestamp(end) + pd.Timedelta(days=1))
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if a < b]
+
+def score_walk_forward(df: pd.DataFrame, start, end, threshold: float, retrain_months: int = 6, train_years: Optional[int] = None, min_days: int = 1, max_days: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """Point-in-time move and direction probabilities from panel models refit every fold.
+
+    Each fold's models only see rows whose label window ([t + min_days, t + max_days] bars)
+    closed before the fold starts, so no prediction uses information from its own future.
+    """
+    from core.train.daily_trainer import calculate_additional_features, train_with_balanced_sampling
+    from core.train.panel_trainer import BASE_FEATURES, CONTEXT_COLUMNS, SYMBOL_CODE_COLUMN, get_panel_classifier, symbol_context, add_panel_columns
+
+    df = calculate_additional_features(df.copy())
+    df, labels = build_labels(df, [threshold], min_days, max_days)
+    df["strong_move_target"] = labels[float(threshold)]
+    label_end = df.groupby("trading_symbol", sort=False)["date"].shift(-max_days)
+    feature_cols = BASE_FEATURES + [SYMBOL_CODE_COLUMN] + CONTEXT_COLUMNS
+    for col in BASE_FEATURES:
+        df[col] = df[col].replace([np.inf, -np.inf], np.nan)
+
+    move_probs = np.full((len(df), 2), np.nan)
+    dir_probs = np.full((len(df), 2), np.nan)
+    for fold_start, fold_end in walk_forward_folds(start, end, retrain_months):
+        fold_start_time = datetime.now()
+        train_mask = label_end < fold_start
+        if train_years:
+            train_mask &= df["date"] >= fold_start - pd.DateOffset(years=train_years)
+        test_mask = (df["date"] >= fold_start) & (df["date"] < fold_end)
+        if not test_mask.any():
+            continue
+        if df.loc[train_mask, "strong_move_target"].nunique() < 2:
+            timestamped_log(f"⚠️ Fold {fold_start.date()}: not enough labelled history, skipping")
+            continue
+
+        symbols = sorted(df.loc[train_mask, "trading_symbol"].unique())
+        context = symbol_context(df, train_mask).to_dict(orient="index")
+        fold = add_panel_columns(df[train_mask | test_mask].copy(), {s: i for i, s in enumerate(symbols)}, context)
+        train, test = fold[train_mask[fold.index]], fold[test_mask[fold.index]]
+
+        move_model = train_with_balanced_sampling(train[feature_cols], train["strong_move_target"], get_panel_classifier())
+        move_probs[test.index] = move_model.predict_proba(test[feature_cols])
+
+        movers = train[train["strong_move_target"] == 1]
+        if movers["direction_target"].nunique() == 2:
+            direction_model = train_with_balanced_sampling(movers[feature_cols], movers["direction_target"], get_panel_classifier())
+            dir_probs[test.index] = direction_model.predict_proba(test[feature_cols])
+
+        timestamped_log(f"🔁 Fold {fold_start.date()} → {(fold_end - pd.Timedelta(days=1)).date()}: trained on {int(train_mask.sum())} rows, scored {int(test_mask.sum())} in {(datetime.now() - fold_start_time).total_seconds():.1f}s")
+    return move_probs, dir_probs
+
+def run_backtest(start, end, mode: str = "walk_forward", threshold: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, confidence_threshold: float = STRONG_MOVE_CONFIDENCE_THRESHOLD, horizon: int = BACKTEST_HORIZON_BARS, retrain_months: int = 6, train_years: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Replay historical features through stored ("stored") or walk-forward retrained ("walk_forward") models.
+
+    Predictions for every symbol and day in [start, end] are generated in batch, evaluated
+    with array operations and summarized. Returns the summary tables plus a `predictions`
+    table with one row per scored symbol-day.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    run_start = datetime.now()
+
+    # Walk-forward folds train on history before `start`; stored models only need the range
+    if mode == "walk_forward":
+        history_start = start - pd.DateOffset(years=train_years) if train_years else pd.Timestamp("1970-01-01")
+    else:
+        history_start = start
+    df = load_backtest_frame(history_start.date(), (end + timedelta(days=FORWARD_BUFFER_DAYS)).date())
+    if df.empty:
+        timestamped_log("[WARNING] No feature data in the backtest range")
+        return {}
+    timestamped_log(f"Loaded {len(df)} rows for {df['trading_symbol'].nunique()} symbols in {(datetime.now() - run_start).total_seconds():.1f}s")
+
+    if mode == "stored":
+        move_probs, errors = score_stored_models(df, "move")
+        dir_probs, dir_errors = score_stored_models(df, "direction")
+        for symbol, error in {**errors, **dir_errors}.items():
+            timestamped_log(f"[WARNING] {symbol}: {error}")
+    elif mode == "walk_forward":
+        move_probs, dir_probs = score_walk_forward(df, start, end, threshold, retrain_months, train_years)
+    else:
+        raise ValueError(f"Unknown backtest mode: {mode}")
+
+    df["strong_move_confidence"] = move_probs[:, 1]
+    df["signal"] = (df["strong_move_confidence"] >= confidence_threshold).to_numpy()
+    has_direction = df["signal"].to_numpy() & ~np.isnan(dir_probs[:, 0])
+    df["direction_prediction"] = np.where(has_direction, np.where(dir_probs[:, 1] > dir_probs[:, 0], "UP", "DOWN"), None)
+    df["direction_confidence"] = np.where(has_direction, np.fmax(dir_probs[:, 0], dir_probs[:, 1]), np.nan)
+
+    outcomes = evaluate_signals(df[["trading_symbol", "date", "close", "high", "low", "strong_move_confidence", "signal", "direction_prediction", "direction_confidence"]], threshold, horizon)
+    in_range = (outcomes["date"] >= start) & (outcomes["date"] <= end) & outcomes["strong_move_confidence"].notna()
+    outcomes = outcomes[in_range].reset_index(drop=True)
+
+    tables = summarize(outcomes)
+    tables["predictions"] = outcomes
+    timestamped_log(f"Backtest ({mode}) {start.date()} → {end.date()}: {len(outcomes)} predictions scored in {(datetime.now() - run_start).total_seconds() / 60:.1f} minutes")
+    return tables
@@ -0,0 +1,121 @@
+# core/backtest/evaluation.py
+
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+def to_matrix(df: pd.DataFrame, column: str, codes: np.ndarray, positions: np.ndarray, n_rows: int, n_cols: int, fill=np.nan) -> np.ndarray:
+    """Scatter a long column into a (symbols x bars) array, left-aligned and padded."""
+    values = np.full((n_rows, n_cols), fill, dtype=np.float64 if fill is np.nan else np.int64)
+    values[codes, positions] = df[column].to_numpy(dtype=values.dtype)
+    return values
+
+def forward_hits(close: np.ndarray, high: np.ndarray, low: np.ndarray, threshold: float, horizon: int) -> Dict[str, np.ndarray]:
+    """Max excursions and first threshold crossings over the next `horizon` bars.
+
+    Arrays are (symbols x bars). Moves are measured from each bar's close to the highs and
+    lows of bars t+1 .. t+horizon, clipped at zero like the prediction tracker. First-hit
+    offsets are in bars (0 = never crossed); `bars` counts the bars actually available.
+    """
+    n_rows, n_cols = close.shape
+    base = np.where(close == 0, np.nan, close)
+    max_up = np.zeros((n_rows, n_cols))
+    max_down = np.zeros((n_rows, n_cols))
+    up_offset = np.zeros((n_rows, n_cols), dtype=np.int64)
+    down_offset = np.zeros((n_rows, n_cols), dtype=np.int64)
+    bars = np.zeros((n_rows, n_cols), dtype=np.int64)
+
+    # One vectorized pass per offset; horizon is small, bars x symbols is large
+    with np.errstate(invalid="ignore"):
+        for k in range(1, min(horizon, n_cols - 1) + 1):
+            up = (high[:, k:] - base[:, :-k]) / base[:, :-k] * 100
+            down = (low[:, k:] - base[:, :-k]) / base[:, :-k] * 100
+            seen = ~np.isnan(high[:, k:])
+            bars[:, :-k] += seen
+
+            max_up[:, :-k] = np.fmax(max_up[:, :-k], up)
+            max_down[:, :-k] = np.fmin(max_down[:, :-k], down)
+
+            first_up = (up >= threshold) & (up_offset[:, :-k] == 0)
+            first_down = (down <= -threshold) & (down_offset[:, :-k] == 0)
+            up_offset[:, :-k][first_up] = k
+            down_offset[:, :-k][first_down] = k
+
+    return {"max_up_move": max_up, "max_down_move": max_down, "up_offset": up_offset, "down_offset": down_offset, "bars": bars}
+
+def evaluate_signals(df: pd.DataFrame, threshold: float, horizon: int) -> pd.DataFrame:
+    """Outcome of every backtest prediction with array operations across all symbols.
+
+    `df` needs trading_symbol, date, close, high, low, strong_move_confidence, signal and
+    direction_prediction, sorted by date within each symbol. Adds max moves, whether a
+    strong move happened, whether a signal's called direction crossed the threshold, the
+    realized direction and days to fulfill, mirroring how live predictions are verified.
+    """
+    codes, _ = pd.factorize(df["trading_symbol"])
+    positions = df.groupby(codes).cumcount().to_numpy()
+    shape = (codes.max() + 1, positions.max() + 1)
+
+    close = to_matrix(df, "close", codes, positions, *shape)
+    high = to_matrix(df, "high", codes, positions, *shape)
+    low = to_matrix(df, "low", codes, positions, *shape)
+    hits = forward_hits(close, high, low, threshold, horizon)
+
+    out = df.copy()
+    for key, values in hits.items():
+        out[key] = values[codes, positions]
+
+    # Calendar dates of the first crossing on each side, looked up by bar offset
+    day_numbers = to_matrix(out.assign(day=out["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)), "day", codes, positions, *shape, fill=-1)
+    padded = np.concatenate([day_numbers, np.full((shape[0], horizon + 1), -1)], axis=1)
+    up_days = padded[codes, positions + out["up_offset"].to_numpy()] - day_numbers[codes, positions]
+    down_days = padded[codes, positions + out["down_offset"].to_numpy()] - day_numbers[codes, positions]
+
+    up_hit = out["up_offset"].to_numpy() > 0
+    down_hit = out["down_offset"].to_numpy() > 0
+    called_up = (out["direction_prediction"] == "UP").to_numpy() & up_hit
+    called_down = (out["direction_prediction"] == "DOWN").to_numpy() & down_hit & ~called_up
+    up_larger = out["max_up_move"].to_numpy() > np.abs(out["max_down_move"].to_numpy())
+
+    out["strong_move"] = up_hit | down_hit
+    out["verified"] = out["signal"].to_numpy() & (called_up | called_down)
+    out["actual_direction"] = np.where(out["strong_move"], np.where(up_larger, "UP", "DOWN"), None)
+    out["days_to_fulfill"] = pd.array(np.where(called_up, up_days, np.where(called_down, down_days, -1)), dtype="Int64")
+    out.loc[~out["verified"], "days_to_fulfill"] = pd.NA
+    out["complete"] = out["bars"] >= horizon
+    return out
+
+def summarize(outcomes: pd.DataFrame, confidence_bins=(0.5, 0.6, 0.7, 0.8, 0.9, 1.0)) -> Dict[str, pd.DataFrame]:
+    """Summary tables: overall, by year, by symbol and by move-confidence bucket.
+
+    Only predictions with a complete forward window are scored.
+    """
+    scored = outcomes[outcomes["complete"]].copy()
+    scored["year"] = pd.to_datetime(scored["date"]).dt.year
+    scored["signal_move"] = scored["signal"] & scored["strong_move"]
+    scored["direction_correct"] = scored["signal_move"] & (scored["direction_prediction"] == scored["actual_direction"])
+
+    def table(grouped) -> pd.DataFrame:
+        result = grouped.agg(
+            predictions=("signal", "size"),
+            signals=("signal", "sum"),
+            base_rate=("strong_move", "mean"),
+            verified=("verified", "sum"),
+            signal_moves=("signal_move", "sum"),
+            direction_correct=("direction_correct", "sum"),
+            avg_days_to_fulfill=("days_to_fulfill", "mean"),
+        )
+        signals = result["signals"].replace(0, np.nan)
+        result["hit_rate"] = result["verified"] / signals
+        result["move_precision"] = result["signal_moves"] / signals
+        result["direction_accuracy"] = result["direction_correct"] / result["signal_moves"].replace(0, np.nan)
+        result["lift"] = result["move_precision"] / result["base_rate"].replace(0, np.nan)
+        return result
+
+    signals = scored[scored["signal"]]
+    buckets = pd.cut(signals["strong_move_confidence"], bins=[0.0] + list(confidence_bins), include_lowest=True)
+    return {
+        "overall": table(scored.groupby(lambda _: "all")),
+        "by_year": table(scored.groupby("year")),
+        "by_symbol": table(scored.groupby("trading_symbol")).sort_values("hit_rate", ascending=False),
+        "by_confidence": table(signals.groupby(buckets, observed=True)),
+    }
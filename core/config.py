@@ -44,6 +44,27 @@ LIGHTGBM_MAX_DEPTH = int(os.getenv("LGBM_MAX_DEPTH", "6"))
 LIGHTGBM_NUM_LEAVES = int(os.getenv("LGBM_NUM_LEAVES", "31"))
 LIGHTGBM_MIN_CHILD_WEIGHT = int(os.getenv("LGBM_MIN_CHILD_WEIGHT", "3"))
 
+# Daily model layout: "per_symbol" ({symbol}_{type}.pkl) or "panel" (one cross-sectional model per type)
+DAILY_MODEL_MODE = os.getenv("DAILY_MODEL_MODE", "per_symbol").lower()
+
+# Warm-start retraining for per-symbol LightGBM models
+INCREMENTAL_TRAINING_ENABLED = os.getenv("INCREMENTAL_TRAINING_ENABLED", "True").lower() == "true"
+WARM_START_EXTRA_TREES = int(os.getenv("WARM_START_EXTRA_TREES", "20"))  # Trees added per warm start
+WARM_START_WINDOW_ROWS = int(os.getenv("WARM_START_WINDOW_ROWS", "250"))  # Recent rows boosted on
+WARM_START_MAX_TREES = int(os.getenv("WARM_START_MAX_TREES", "400"))  # Full refit once a model grows past this
+FULL_REFIT_INTERVAL_DAYS = int(os.getenv("FULL_REFIT_INTERVAL_DAYS", "7"))
+WARM_START_DRIFT_TOLERANCE = float(os.getenv("WARM_START_DRIFT_TOLERANCE", "0.1"))  # Allowed accuracy drop before refit
+
+# Cached feature rankings used by select_best_features
+FEATURE_RANKING_DIR = os.path.join(MODELS_DIR, "feature_rankings")
+os.makedirs(FEATURE_RANKING_DIR, exist_ok=True)
+FEATURE_RANKING_SOURCE = os.getenv("FEATURE_RANKING_SOURCE", "randomforest").lower()  # "randomforest" or "lightgbm_gain"
+FEATURE_RANKING_REFRESH_DAYS = int(os.getenv("FEATURE_RANKING_REFRESH_DAYS", "7"))
+FEATURE_RANKING_DRIFT_TOLERANCE = float(os.getenv("FEATURE_RANKING_DRIFT_TOLERANCE", "0.05"))  # Allowed shift in positive rate
+
+# Backtest summaries written by scripts/run_backtest.py
+BACKTEST_RESULTS_DIR = os.path.join(CORE_DIR, "backtests")
+
 # Classifier names
 RANDOM_FOREST = "randomforest"
 XGBOOST = "xgboost"
@@ -51,6 +72,7 @@ LIGHTGBM = "lightgbm"
 
 # Cache configuration
 MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", "100"))  # Number of models to keep in memory
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # Memory budget for cached models
 FEATURE_CACHE_ENABLED = os.getenv("FEATURE_CACHE_ENABLED", "True").lower() == "true"
 
 def validate_config() -> Dict[str, Any]:
@@ -69,6 +91,9 @@ def validate_config() -> Dict[str, Any]:
     if STRONG_MOVE_CONFIDENCE_THRESHOLD <= 0 or STRONG_MOVE_CONFIDENCE_THRESHOLD > 1.0:
         issues["STRONG_MOVE_CONFIDENCE_THRESHOLD"] = "Must be between 0 and 1"
     
+    if DAILY_MODEL_MODE not in ("per_symbol", "panel"):
+        issues["DAILY_MODEL_MODE"] = "Must be 'per_symbol' or 'panel'"
+    
     return issues
 
 def get_daily_model_path(classifier_name: str) -> str:
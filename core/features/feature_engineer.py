@@ -3,193 +3,255 @@
 import pandas as pd
 import numpy as np
 import time
-from functools import lru_cache
+from typing import Dict, Tuple
+
+def wilder_averages(closes: np.ndarray, periods=(14,)) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilder-smoothed average gains and losses for a (symbols x dates) close array.
+
+    Each row is seeded with the simple mean of its first `period` deltas and then smoothed
+    recursively; positions before the seed are NaN. Returns two arrays shaped
+    (len(periods), symbols, dates).
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim == 1:
+        closes = closes[np.newaxis, :]
+
+    periods = np.atleast_1d(np.asarray(periods, dtype=np.float64))[:, np.newaxis]
+    n_rows, n_cols = closes.shape
+    avg_gain = np.full((len(periods), n_rows, n_cols), np.nan)
+    avg_loss = np.full((len(periods), n_rows, n_cols), np.nan)
+    if n_cols < 2:
+        return avg_gain, avg_loss
+
+    deltas = np.diff(closes, axis=1)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    valid = ~np.isnan(deltas)
+
+    # Running state for every (period, symbol) pair
+    count = np.zeros((len(periods), n_rows))
+    gain_state = np.zeros((len(periods), n_rows))
+    loss_state = np.zeros((len(periods), n_rows))
+
+    for j in range(n_cols - 1):
+        ok = valid[:, j]
+        count = count + ok
+        seeding = ok & (count <= periods)
+        smoothing = ok & (count > periods)
+
+        gain_state = np.where(seeding, gain_state + gains[:, j], gain_state)
+        loss_state = np.where(seeding, loss_state + losses[:, j], loss_state)
+        gain_state = np.where(seeding & (count == periods), gain_state / periods, gain_state)
+        loss_state = np.where(seeding & (count == periods), loss_state / periods, loss_state)
+        gain_state = np.where(smoothing, (gain_state * (periods - 1) + gains[:, j]) / periods, gain_state)
+        loss_state = np.where(smoothing, (loss_state * (periods - 1) + losses[:, j]) / periods, loss_state)
+
+        ready = count >= periods
+        avg_gain[:, :, j + 1] = np.where(ready, gain_state, np.nan)
+        avg_loss[:, :, j + 1] = np.where(ready, loss_state, np.nan)
+
+    return avg_gain, avg_loss
+
+def rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """Convert Wilder average gains and losses into RSI values."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, rsi)
+
+def wilder_rsi(closes: np.ndarray, periods=(14,)) -> np.ndarray:
+    """Compute Wilder RSI for several periods over a (symbols x dates) close array in one pass.
+
+    Returns an array shaped (len(periods), symbols, dates). Positions between a row's first
+    close and its seed take the seed RSI, matching the original per-series implementation.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim == 1:
+        closes = closes[np.newaxis, :]
+
+    avg_gain, avg_loss = wilder_averages(closes, periods)
+    return backfill_rsi_warm_up(rsi_from_averages(avg_gain, avg_loss), closes)
+
+def backfill_rsi_warm_up(rsi: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """Fill each row's warm-up window (first close up to the seed) with its seed RSI."""
+    seeded = ~np.isnan(rsi)
+    seed_idx = np.where(seeded.any(axis=2), seeded.argmax(axis=2), 0)
+    seed_rsi = np.take_along_axis(rsi, seed_idx[:, :, np.newaxis], axis=2)
+    col = np.arange(closes.shape[1])
+    warm_up = (col < seed_idx[:, :, np.newaxis]) & ~np.isnan(closes)[np.newaxis, :, :]
+    return np.where(warm_up, seed_rsi, rsi)
 
 def calculate_rsi(series, period=14):
-    """Calculate RSI indicator with optimized numpy operations."""
-    # Convert to numpy for faster operations
-    prices = series.values
-    deltas = np.diff(prices)
-    seed = deltas[:period+1]
-    
-    # Calculate gains and losses
-    up = seed[seed >= 0].sum() / period
-    down = -seed[seed < 0].sum() / period
-    
-    if down == 0:  # Handle division by zero
-        return np.full_like(prices, 100.0)
-        
-    rs = up / down
-    rsi = np.zeros_like(prices)
-    rsi[:period+1] = 100. - (100. / (1. + rs))
-    
-    # Calculate RSI for remaining prices
-    for i in range(period + 1, len(prices)):
-        delta = deltas[i - 1]
-        
-        if delta > 0:
-            upval = delta
-            downval = 0.
-        else:
-            upval = 0.
-            downval = -delta
-            
-        up = (up * (period - 1) + upval) / period
-        down = (down * (period - 1) + downval) / period
-        
-        rs = up / down if down != 0 else float('inf')
-        rsi[i] = 100. - (100. / (1. + rs))
-    
-    return pd.Series(rsi, index=series.index)
+    """Calculate Wilder RSI for a single close series."""
+    return pd.Series(wilder_rsi(series.values, [period])[0, 0], index=series.index)
+
+def multi_span_ema(values: np.ndarray, spans) -> np.ndarray:
+    """Compute adjust=False EMAs for several spans over a (symbols x dates) array in one linear pass.
+
+    Returns an array shaped (len(spans), symbols, dates). Leading NaNs are skipped per row,
+    and a NaN inside a row carries the previous EMA forward.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[np.newaxis, :]
+
+    spans = np.atleast_1d(np.asarray(spans, dtype=np.float64))
+    alphas = (2.0 / (spans + 1.0))[:, np.newaxis]
+    n_rows, n_cols = values.shape
+    result = np.full((len(spans), n_rows, n_cols), np.nan)
+    ema = np.full((len(spans), n_rows), np.nan)
+
+    # Recursive update per date, vectorized across spans and symbols
+    for j in range(n_cols):
+        x = values[:, j]
+        updated = alphas * x + (1.0 - alphas) * ema
+        ema = np.where(np.isnan(ema), x, np.where(np.isnan(x), ema, updated))
+        result[:, :, j] = ema
 
-@lru_cache(maxsize=128)
-def get_ewm_weights(span, adjust, n):
-    """Cache EWM weights for reuse across calculations."""
-    alpha = 2 / (span + 1)
+    return result
+
+def fast_ewm(series, span, adjust=False):
+    """Exponential weighted moving average (adjust=False) for a single series."""
     if adjust:
-        weights = np.power(1 - alpha, np.arange(n, 0, -1))
-        weights /= weights.sum()
+        return series.ewm(span=span, adjust=True).mean()
+    return pd.Series(multi_span_ema(series.values, [span])[0, 0], index=series.index)
+
+# Columns written to features_data, in output order
+FEATURE_OUTPUT_COLUMNS = [
+    "trading_symbol", "exchange", "date", "week_day",
+    "volatility_squeeze", "trend_zone_strength", "range_compression_ratio",
+    "volume_spike_ratio", "body_to_range_ratio", "distance_from_ema_5",
+    "gap_pct", "return_3d", "atr_5", "hl_range", "fo_eligible",
+    "rsi_14", "close_ema50_gap_pct", "open_gap_pct",
+    "macd_histogram", "atr_14_normalized", "percent_move"
+]
+
+PANEL_INPUT_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+def build_panel(eod_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    """Pivot long OHLCV rows into left-aligned (symbols x bars) arrays.
+
+    Row i of every array holds one symbol's bars in date order, starting at column 0 and
+    padded with NaN after its last bar, so shifts and rolling windows never cross symbols.
+    Returns the sorted frame plus the (row, column) position of each of its rows.
+    """
+    df = eod_df.sort_values(["trading_symbol", "date"]).reset_index(drop=True)
+    codes, _ = pd.factorize(df["trading_symbol"], sort=True)
+    positions = df.groupby(codes).cumcount().to_numpy()
+    n_symbols = int(codes.max()) + 1 if len(codes) else 0
+    width = int(positions.max()) + 1 if len(positions) else 0
+
+    panel = {}
+    for col in PANEL_INPUT_COLUMNS:
+        arr = np.full((n_symbols, width), np.nan)
+        arr[codes, positions] = df[col].to_numpy(dtype=np.float64)
+        panel[col] = arr
+
+    return df, panel, codes, positions
+
+def shift_panel(arr: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Shift each row forward by `periods` bars, filling the gap with NaN."""
+    out = np.full_like(arr, np.nan)
+    if periods < arr.shape[1]:
+        out[:, periods:] = arr[:, :arr.shape[1] - periods]
+    return out
+
+def rolling_panel(arr: np.ndarray, window: int, stat: str = "mean") -> np.ndarray:
+    """Trailing rolling mean or sample std along each row; windows containing NaN yield NaN."""
+    out = np.full_like(arr, np.nan)
+    if arr.shape[1] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(arr, window, axis=1)
+    if stat == "mean":
+        out[:, window - 1:] = windows.mean(axis=-1)
+    elif stat == "std":
+        out[:, window - 1:] = windows.std(axis=-1, ddof=1)
     else:
-        weights = np.ones(n) * alpha * (1 - alpha) ** np.arange(n)
-    return weights
+        raise ValueError(f"Unsupported rolling statistic: {stat}")
+    return out
 
-def fast_ewm(series, span, adjust=False):
-    """Faster exponential weighted moving average calculation."""
-    values = series.values
-    n = len(values)
-    result = np.full_like(values, np.nan, dtype=np.float64)
-    
-    # Handle beginning of the series with NaN values
-    nan_mask = np.isnan(values)
-    first_valid = np.argmin(nan_mask) if np.any(~nan_mask) else n
-    
-    if first_valid < n:
-        values_to_process = values[first_valid:]
-        weights = get_ewm_weights(span, adjust, len(values_to_process))
-        
-        # Calculate the weighted average
-        for i in range(first_valid, n):
-            window = values[max(first_valid, i-len(weights)+1):i+1]
-            if len(window) > 0:
-                w = weights[-len(window):]
-                # Fix for division by zero
-                if np.sum(w) > 0:
-                    result[i] = np.sum(window * w) / np.sum(w)
-                else:
-                    result[i] = np.nan
-    
-    return pd.Series(result, index=series.index)
+def compute_panel_indicators(panel: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Compute every feature (and the intermediate indicator series) over an OHLCV panel."""
+    open_, high, low = panel["open"], panel["high"], panel["low"]
+    close, volume = panel["close"], panel["volume"]
+    prev_close = shift_panel(close, 1)
+    out = {}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["hl_range"] = (high - low) / np.where(close == 0, np.nan, close)
+        out["gap_pct"] = open_ / prev_close - 1
+        out["body_to_range_ratio"] = np.abs(close - open_) / np.where(high - low == 0, np.nan, high - low)
+        out["percent_move"] = (close - open_) / np.where(open_ == 0, np.nan, open_) * 100
+
+        # EMA 5/12/26/50 in a single pass over the close panel
+        out["ema_5"], out["ema_12"], out["ema_26"], out["ema_50"] = multi_span_ema(close, [5, 12, 26, 50])
+        out["distance_from_ema_5"] = close - out["ema_5"]
+        out["close_ema50_gap_pct"] = (close - out["ema_50"]) / out["ema_50"] * 100
+
+        out["return_3d"] = close / shift_panel(close, 3) - 1
+        out["range_compression_ratio"] = out["hl_range"] / rolling_panel(out["hl_range"], 3)
+        out["atr_5"] = rolling_panel(out["hl_range"], 5)
+        out["volume_spike_ratio"] = volume / rolling_panel(volume, 3)
 
-def calculate_features(eod_df: pd.DataFrame, symbol_df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate features with optimized operations."""
-    start_time = time.time()
-    
-    # Sort data chronologically 
-    df = eod_df.copy().sort_values(["trading_symbol", "date"]).reset_index(drop=True)
-    
-    # Basic features
-    df["week_day"] = pd.to_datetime(df["date"]).dt.weekday
-    
-    # Vectorized calculations
-    high, low, close, open_price = df["high"].values, df["low"].values, df["close"].values, df["open"].values
-    
-    # Calculate HL range vectorized
-    hl_range = (high - low) / np.where(close == 0, np.nan, close)
-    df["hl_range"] = hl_range
-    
-    # Group operations
-    for symbol, group in df.groupby("trading_symbol"):
-        idx = group.index
-        
-        # Calculate gap percentage
-        df.loc[idx, "gap_pct"] = group["open"] / group["close"].shift(1) - 1
-        
-        # Body to range ratio
-        body = np.abs(group["close"] - group["open"])
-        df.loc[idx, "body_to_range_ratio"] = body / (group["high"] - group["low"]).replace(0, np.nan)
-        
-        # Percent move
-        df.loc[idx, "percent_move"] = (group["close"] - group["open"]) / group["open"].replace(0, np.nan) * 100
-        
-        # EMA and distance calculations
-        ema5 = fast_ewm(group["close"], span=5, adjust=False)
-        df.loc[idx, "distance_from_ema_5"] = group["close"] - ema5
-        
-        # 3-day return
-        df.loc[idx, "return_3d"] = group["close"].pct_change(3)
-        
-        # Range compression using numpy operations
-        hl_range_rolling = group["hl_range"].rolling(3).mean()
-        df.loc[idx, "range_compression_ratio"] = group["hl_range"] / hl_range_rolling
-        
-        # ATR calculation
-        df.loc[idx, "atr_5"] = group["hl_range"].rolling(5).mean()
-        
-        # Volume spike ratio
-        vol_rolling = group["volume"].rolling(3).mean()
-        df.loc[idx, "volume_spike_ratio"] = group["volume"] / vol_rolling
-        
         # Bollinger band width for volatility squeeze
-        rolling_mean = group["close"].rolling(20).mean()
-        rolling_std = group["close"].rolling(20).std()
-        bb_width = (rolling_mean + 2 * rolling_std - (rolling_mean - 2 * rolling_std)) / rolling_mean
-        df.loc[idx, "volatility_squeeze"] = bb_width / bb_width.rolling(20).mean()
-        
+        rolling_mean = rolling_panel(close, 20)
+        rolling_std = rolling_panel(close, 20, stat="std")
+        out["bb_width"] = (rolling_mean + 2 * rolling_std - (rolling_mean - 2 * rolling_std)) / rolling_mean
+        out["volatility_squeeze"] = out["bb_width"] / rolling_panel(out["bb_width"], 20)
+
         # Trend zone strength
-        up_move = group["high"].diff()
-        down_move = group["low"].diff().abs()
-        trend_strength = np.where(up_move > down_move, up_move, 0)
-        df.loc[idx, "trend_zone_strength"] = pd.Series(trend_strength).rolling(14).mean()
-        
-        # RSI calculation
-        df.loc[idx, "rsi_14"] = calculate_rsi(group["close"], period=14)
-        
-        # EMA 50
-        ema_50 = fast_ewm(group["close"], span=50, adjust=False)
-        df.loc[idx, "ema_50"] = ema_50
-        df.loc[idx, "close_ema50_gap_pct"] = (group["close"] - ema_50) / ema_50 * 100
-        
-        # Previous close and open gap - Fixed to handle missing values
-        prev_close = group["close"].shift(1)
-        df.loc[idx, "prev_close"] = prev_close
-        
-        # Calculate open_gap_pct safely
-        mask = prev_close.notna() & (prev_close != 0)
-        df.loc[idx, "open_gap_pct"] = 0  # Default value
-        df.loc[idx[mask], "open_gap_pct"] = ((group["open"] - prev_close) / prev_close * 100)[mask]
-        
-        # MACD calculation
-        ema_12 = fast_ewm(group["close"], span=12, adjust=False)
-        ema_26 = fast_ewm(group["close"], span=26, adjust=False)
-        df.loc[idx, "macd_line"] = ema_12 - ema_26
-        df.loc[idx, "macd_signal"] = fast_ewm(df.loc[idx, "macd_line"], span=9, adjust=False)
-        df.loc[idx, "macd_histogram"] = df.loc[idx, "macd_line"] - df.loc[idx, "macd_signal"]
-        
-        # True range calculation
-        high_close = np.abs(group["high"] - group["close"].shift())
-        low_close = np.abs(group["low"] - group["close"].shift())
-        hl = group["high"] - group["low"]
-        df.loc[idx, "true_range"] = np.maximum.reduce([hl, high_close, low_close])
-        
-        # ATR 14 and normalized ATR
-        df.loc[idx, "atr_14"] = df.loc[idx, "true_range"].rolling(14).mean()
-        df.loc[idx, "atr_14_normalized"] = df.loc[idx, "atr_14"] / group["close"]
+        up_move = high - shift_panel(high, 1)
+        down_move = np.abs(low - shift_panel(low, 1))
+        out["trend_strength"] = np.where(up_move > down_move, up_move, 0.0)
+        out["trend_zone_strength"] = rolling_panel(out["trend_strength"], 14)
+
+        # RSI from Wilder averages (kept for incremental state)
+        avg_gain, avg_loss = wilder_averages(close, [14])
+        out["avg_gain_14"], out["avg_loss_14"] = avg_gain[0], avg_loss[0]
+        out["rsi_14"] = backfill_rsi_warm_up(rsi_from_averages(avg_gain, avg_loss), close)[0]
+
+        # Open gap, defaulting to 0 where the previous close is missing or zero
+        valid_prev = ~np.isnan(prev_close) & (prev_close != 0)
+        out["open_gap_pct"] = np.where(valid_prev, (open_ - prev_close) / np.where(valid_prev, prev_close, 1.0) * 100, 0.0)
+
+        # MACD
+        out["macd_line"] = out["ema_12"] - out["ema_26"]
+        out["macd_signal"] = multi_span_ema(out["macd_line"], [9])[0]
+        out["macd_histogram"] = out["macd_line"] - out["macd_signal"]
+
+        # True range, ATR 14 and normalized ATR
+        out["true_range"] = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+        out["atr_14"] = rolling_panel(out["true_range"], 14)
+        out["atr_14_normalized"] = out["atr_14"] / close
+
+    return out
+
+def features_from_panel(df: pd.DataFrame, indicators: Dict[str, np.ndarray], codes: np.ndarray, positions: np.ndarray, symbol_df: pd.DataFrame) -> pd.DataFrame:
+    """Gather panel indicator arrays back into the sorted long features layout."""
+    result = df[["trading_symbol", "exchange", "date"]].copy()
+    result["week_day"] = pd.to_datetime(result["date"]).dt.weekday
+    for col in FEATURE_OUTPUT_COLUMNS[4:]:
+        if col in indicators:
+            result[col] = indicators[col][codes, positions]
     
     # Apply FO eligibility from symbol data
     symbol_map = symbol_df.set_index("trading_symbol")["fo_eligible"].to_dict()
-    df["fo_eligible"] = df["trading_symbol"].map(symbol_map).fillna(False)
+    result["fo_eligible"] = result["trading_symbol"].map(symbol_map).fillna(False)
+    
+    return result[FEATURE_OUTPUT_COLUMNS]
+
+def calculate_features(eod_df: pd.DataFrame, symbol_df: pd.DataFrame) -> pd.DataFrame:
+    """Calculate features for one or many symbols in a single panel pass."""
+    start_time = time.time()
+    
+    if eod_df.empty:
+        return pd.DataFrame(columns=FEATURE_OUTPUT_COLUMNS)
     
-    # Select required columns
-    result = df[[
-        "trading_symbol", "exchange", "date", "week_day",
-        "volatility_squeeze", "trend_zone_strength", "range_compression_ratio",
-        "volume_spike_ratio", "body_to_range_ratio", "distance_from_ema_5",
-        "gap_pct", "return_3d", "atr_5", "hl_range", "fo_eligible",
-        "rsi_14", "close_ema50_gap_pct", "open_gap_pct",
-        "macd_histogram", "atr_14_normalized", "percent_move"
-    ]]
+    # Pivot into contiguous (symbol x bar) arrays and compute all indicators at once
+    df, panel, codes, positions = build_panel(eod_df)
+    indicators = compute_panel_indicators(panel)
+    result = features_from_panel(df, indicators, codes, positions, symbol_df)
     
     elapsed = time.time() - start_time
     print(f"Feature calculation completed in {elapsed:.2f} seconds for {len(df)} rows.")
     
-    return result
\ No newline at end of file
+    return result
@@ -0,0 +1,206 @@
+# core/features/indicator_state.py
+
+import json
+import math
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, Optional, Tuple
+from core.features.feature_engineer import build_panel, compute_panel_indicators, features_from_panel
+
+# Bump when the state layout or any indicator definition changes; older states are rebuilt
+STATE_VERSION = 1
+
+# Trailing values each rolling indicator needs to advance by one bar
+BUFFER_LENGTHS = {
+    "close": 20,            # Bollinger mean/std and the 3-day return
+    "hl_range": 5,          # atr_5 and range compression
+    "volume": 3,            # volume spike ratio
+    "bb_width": 20,         # volatility squeeze
+    "trend_strength": 14,   # trend zone strength
+    "true_range": 14,       # atr_14
+}
+
+EMA_SPANS = {"ema_5": 5, "ema_12": 12, "ema_26": 26, "ema_50": 50, "macd_signal": 9}
+RSI_PERIOD = 14
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def _to_float(value) -> float:
+    return float("nan") if _is_missing(value) else float(value)
+
+def _div(numerator: float, denominator: float) -> float:
+    if _is_missing(numerator) or _is_missing(denominator) or denominator == 0:
+        return float("nan")
+    return numerator / denominator
+
+def _window_mean(buffer: list, window: int) -> float:
+    """Mean of the last `window` values; NaN if the window is short or contains a gap."""
+    values = buffer[-window:]
+    if len(values) < window or any(_is_missing(v) for v in values):
+        return float("nan")
+    return sum(values) / window
+
+def _window_std(buffer: list, window: int) -> float:
+    """Sample standard deviation (ddof=1) of the last `window` values."""
+    values = buffer[-window:]
+    if len(values) < window or any(_is_missing(v) for v in values):
+        return float("nan")
+    mean = sum(values) / window
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / (window - 1))
+
+def _push(buffer: list, value: float, maxlen: int) -> list:
+    buffer.append(value)
+    return buffer[-maxlen:]
+
+def is_state_ready(state: Optional[Dict]) -> bool:
+    """Whether a state has seeded every recursive indicator and can be advanced in O(1)."""
+    if not state or state.get("version") != STATE_VERSION:
+        return False
+    scalars = [state.get(name) for name in EMA_SPANS] + [state.get("avg_gain"), state.get("avg_loss"), state.get("prev_close")]
+    return not any(_is_missing(v) for v in scalars)
+
+def build_states(eod_df: pd.DataFrame, symbol_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict]]:
+    """Compute features over full histories and capture each symbol's indicator state at its last bar."""
+    if eod_df.empty:
+        return pd.DataFrame(), {}
+
+    df, panel, codes, positions = build_panel(eod_df)
+    indicators = compute_panel_indicators(panel)
+    features_df = features_from_panel(df, indicators, codes, positions, symbol_df)
+
+    lengths = np.bincount(codes)
+    last_rows = df.iloc[np.cumsum(lengths) - 1]
+    states = {}
+
+    for row, bar in enumerate(last_rows.to_dict("records")):
+        last = lengths[row] - 1
+        state = {
+            "version": STATE_VERSION,
+            "exchange": bar["exchange"],
+            "last_date": pd.Timestamp(bar["date"]).date().isoformat(),
+            "bars": int(lengths[row]),
+            "prev_close": float(panel["close"][row, last]),
+            "prev_high": float(panel["high"][row, last]),
+            "prev_low": float(panel["low"][row, last]),
+            "avg_gain": float(indicators["avg_gain_14"][row, last]),
+            "avg_loss": float(indicators["avg_loss_14"][row, last]),
+        }
+        for name in EMA_SPANS:
+            state[name] = float(indicators[name][row, last])
+
+        # Rolling buffers are taken from the same arrays the panel engine windows over
+        buffers = {
+            "close": panel["close"], "hl_range": indicators["hl_range"], "volume": panel["volume"],
+            "bb_width": indicators["bb_width"], "trend_strength": indicators["trend_strength"],
+            "true_range": indicators["true_range"],
+        }
+        state["buffers"] = {name: [float(v) for v in arr[row, max(0, last - BUFFER_LENGTHS[name] + 1):last + 1]] for name, arr in buffers.items()}
+        states[bar["trading_symbol"]] = state
+
+    return features_df, states
+
+def advance_state(state: Dict, bar: Dict, fo_eligible: bool) -> Tuple[Dict, Dict]:
+    """Fold one new bar into a symbol's state and return the updated state and its feature row."""
+    o, h, l, c = (float(bar[k]) for k in ("open", "high", "low", "close"))
+    v = float(bar["volume"])
+    prev_close, prev_high, prev_low = state["prev_close"], state["prev_high"], state["prev_low"]
+    buffers = {name: list(values) for name, values in state["buffers"].items()}
+    bar_date = pd.Timestamp(bar["date"]).date()
+
+    hl_range = _div(h - l, c)
+    return_3d = _div(c, buffers["close"][-3]) - 1 if len(buffers["close"]) >= 3 else float("nan")
+
+    buffers["hl_range"] = _push(buffers["hl_range"], hl_range, BUFFER_LENGTHS["hl_range"])
+    buffers["volume"] = _push(buffers["volume"], v, BUFFER_LENGTHS["volume"])
+    buffers["close"] = _push(buffers["close"], c, BUFFER_LENGTHS["close"])
+
+    # Bollinger band width and its squeeze ratio
+    rolling_mean = _window_mean(buffers["close"], 20)
+    rolling_std = _window_std(buffers["close"], 20)
+    bb_width = _div(4 * rolling_std, rolling_mean)
+    buffers["bb_width"] = _push(buffers["bb_width"], bb_width, BUFFER_LENGTHS["bb_width"])
+
+    # Trend zone strength
+    up_move = h - prev_high
+    down_move = abs(l - prev_low)
+    buffers["trend_strength"] = _push(buffers["trend_strength"], up_move if up_move > down_move else 0.0, BUFFER_LENGTHS["trend_strength"])
+
+    # Wilder RSI
+    delta = c - prev_close
+    avg_gain = (state["avg_gain"] * (RSI_PERIOD - 1) + max(delta, 0.0)) / RSI_PERIOD
+    avg_loss = (state["avg_loss"] * (RSI_PERIOD - 1) + max(-delta, 0.0)) / RSI_PERIOD
+    rsi = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    # EMAs and MACD
+    emas = {}
+    for name in ("ema_5", "ema_12", "ema_26", "ema_50"):
+        alpha = 2.0 / (EMA_SPANS[name] + 1.0)
+        emas[name] = alpha * c + (1 - alpha) * state[name]
+    macd_line = emas["ema_12"] - emas["ema_26"]
+    alpha = 2.0 / (EMA_SPANS["macd_signal"] + 1.0)
+    macd_signal = alpha * macd_line + (1 - alpha) * state["macd_signal"]
+
+    # True range and ATR 14
+    true_range = max(h - l, abs(h - prev_close), abs(l - prev_close))
+    buffers["true_range"] = _push(buffers["true_range"], true_range, BUFFER_LENGTHS["true_range"])
+    atr_14 = _window_mean(buffers["true_range"], 14)
+
+    features = {
+        "trading_symbol": bar["trading_symbol"],
+        "exchange": bar.get("exchange", state["exchange"]),
+        "date": bar_date,
+        "week_day": bar_date.weekday(),
+        "volatility_squeeze": _div(bb_width, _window_mean(buffers["bb_width"], 20)),
+        "trend_zone_strength": _window_mean(buffers["trend_strength"], 14),
+        "range_compression_ratio": _div(hl_range, _window_mean(buffers["hl_range"], 3)),
+        "volume_spike_ratio": _div(v, _window_mean(buffers["volume"], 3)),
+        "body_to_range_ratio": _div(abs(c - o), h - l),
+        "distance_from_ema_5": c - emas["ema_5"],
+        "gap_pct": _div(o, prev_close) - 1,
+        "return_3d": return_3d,
+        "atr_5": _window_mean(buffers["hl_range"], 5),
+        "hl_range": hl_range,
+        "fo_eligible": bool(fo_eligible),
+        "rsi_14": rsi,
+        "close_ema50_gap_pct": _div(c - emas["ema_50"], emas["ema_50"]) * 100,
+        "open_gap_pct": (o - prev_close) / prev_close * 100 if prev_close else 0.0,
+        "macd_histogram": macd_line - macd_signal,
+        "atr_14_normalized": _div(atr_14, c),
+        "percent_move": _div(c - o, o) * 100,
+    }
+
+    new_state = dict(state, **emas)
+    new_state.update({
+        "last_date": bar_date.isoformat(),
+        "bars": state.get("bars", 0) + 1,
+        "prev_close": c, "prev_high": h, "prev_low": l,
+        "avg_gain": avg_gain, "avg_loss": avg_loss,
+        "macd_signal": macd_signal,
+        "buffers": buffers,
+    })
+    return new_state, features
+
+def serialize_state(state: Dict) -> str:
+    """Serialize a state to JSON, storing NaN as null."""
+    def clean(value):
+        if isinstance(value, dict):
+            return {k: clean(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [clean(v) for v in value]
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+    return json.dumps(clean(state))
+
+def deserialize_state(payload: str) -> Dict:
+    """Load a state from JSON, restoring nulls as NaN."""
+    state = json.loads(payload)
+    for name in list(EMA_SPANS) + ["avg_gain", "avg_loss", "prev_close", "prev_high", "prev_low"]:
+        state[name] = _to_float(state.get(name))
+    state["buffers"] = {name: [_to_float(v) for v in values] for name, values in state.get("buffers", {}).items()}
+    return state
+
+def state_last_date(state: Dict) -> date:
+    return date.fromisoformat(state["last_date"])
@@ -0,0 +1,83 @@
+# core/features/job_planner.py
+
+import pandas as pd
+from typing import Iterator, Optional, Set, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Bars of history loaded before the first missing feature date
+DEFAULT_LOOKBACK_ROWS = 50
+
+# Upper bound on EOD rows pulled into one feature panel
+DEFAULT_CHUNK_ROWS = 500_000
+
+PLAN_QUERY = text("""
+    SELECT s.trading_symbol, s.exchange, s.fo_eligible,
+           f.last_feature_date, lb.lookback_start,
+           COALESCE(c.pending_rows, 0) AS pending_rows,
+           COALESCE(c.eod_rows, 0) AS eod_rows
+    FROM symbols s
+    LEFT JOIN LATERAL (
+        SELECT MAX(fd.date) AS last_feature_date
+        FROM features_data fd
+        WHERE fd.trading_symbol = s.trading_symbol
+    ) f ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT MIN(x.date) AS lookback_start
+        FROM (
+            SELECT e.date FROM eod_data e
+            WHERE e.trading_symbol = s.trading_symbol AND e.date <= f.last_feature_date
+            ORDER BY e.date DESC
+            LIMIT :lookback
+        ) x
+    ) lb ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) FILTER (WHERE f.last_feature_date IS NULL OR e.date > f.last_feature_date) AS pending_rows,
+               COUNT(*) AS eod_rows
+        FROM eod_data e
+        WHERE e.trading_symbol = s.trading_symbol
+    ) c ON TRUE
+    WHERE s.active = TRUE
+    ORDER BY s.trading_symbol
+""")
+
+CHUNK_QUERY = text("""
+    SELECT e.trading_symbol, e.exchange, e.date, e.open, e.high, e.low, e.close, e.volume
+    FROM eod_data e
+    JOIN unnest(CAST(:symbols AS text[]), CAST(:start_dates AS date[])) AS p(trading_symbol, start_date)
+      ON e.trading_symbol = p.trading_symbol
+    WHERE p.start_date IS NULL OR e.date >= p.start_date
+    ORDER BY e.trading_symbol, e.date
+""")
+
+def plan_feature_jobs(session: Session, lookback: int = DEFAULT_LOOKBACK_ROWS, full_history: Optional[Set[str]] = None) -> pd.DataFrame:
+    """Plan feature work for every active symbol with a single grouped query.
+
+    Returns one row per symbol with its latest feature date, the first EOD date to load
+    (`start_date`, None for full history), the number of bars still missing features and
+    an estimate of the rows that will be loaded. Symbols in `full_history` load everything.
+    """
+    plan = pd.read_sql(PLAN_QUERY, session.bind, params={"lookback": lookback})
+    if plan.empty:
+        return plan
+
+    full_history = full_history or set()
+    plan["full_history"] = plan["trading_symbol"].isin(full_history)
+    plan["start_date"] = plan["lookback_start"].where(~plan["full_history"] & plan["last_feature_date"].notna(), None)
+    plan["rows_to_load"] = plan["eod_rows"].where(plan["start_date"].isna(), plan["pending_rows"] + lookback)
+    return plan
+
+def stream_feature_inputs(session: Session, plan: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Yield (eod_df, plan_chunk) pairs covering the plan in symbol order, one query per chunk."""
+    if plan.empty:
+        return
+
+    # Cut the symbol-ordered plan into chunks of roughly `chunk_rows` EOD rows
+    chunk_ids = (plan["rows_to_load"].cumsum() // max(chunk_rows, 1)).to_numpy()
+    for _, chunk in plan.groupby(chunk_ids, sort=True):
+        params = {
+            "symbols": chunk["trading_symbol"].tolist(),
+            "start_dates": [None if pd.isna(d) else d for d in chunk["start_date"]],
+        }
+        eod_df = pd.read_sql(CHUNK_QUERY, session.bind, params=params)
+        yield eod_df, chunk
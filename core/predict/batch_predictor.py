@@ -0,0 +1,116 @@
+# core/predict/batch_predictor.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from db.database import SessionLocal
+from core.config import STRONG_MOVE_CONFIDENCE_THRESHOLD
+from core.predict.prediction_writer import write_predictions
+from core.predict.daily_predictor import timestamped_log, fetch_symbols_to_predict, get_model_file, load_model_data, prepare_features, log_model_cache_stats
+
+# Latest feature row per active symbol in one pass over idx_features_symbol_date
+LATEST_FEATURES_QUERY = text("""
+    SELECT DISTINCT ON (f.trading_symbol) f.*
+    FROM features_data f
+    JOIN symbols s ON s.trading_symbol = f.trading_symbol AND s.active = TRUE
+    ORDER BY f.trading_symbol, f.date DESC
+""")
+
+def load_latest_features() -> pd.DataFrame:
+    """Latest feature row for every active symbol, indexed by trading_symbol."""
+    session = SessionLocal()
+    try:
+        df = pd.read_sql(LATEST_FEATURES_QUERY, session.bind)
+        return df.set_index("trading_symbol", drop=False)
+    finally:
+        session.close()
+
+def score_by_model(features: pd.DataFrame, symbols: List[str], model_type: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Dict], Dict[str, str]]:
+    """Score symbols with one vectorized predict_proba call per distinct model artifact.
+
+    Returns class probabilities and model data per symbol, plus an error message for
+    every symbol that could not be scored.
+    """
+    probabilities, model_by_symbol, errors = {}, {}, {}
+    groups: Dict[str, List[str]] = {}
+    for symbol in symbols:
+        groups.setdefault(get_model_file(symbol, model_type), []).append(symbol)
+
+    for group_symbols in groups.values():
+        model_data = load_model_data(group_symbols[0], model_type)
+        if model_data is None:
+            errors.update({s: f"{model_type} model missing" for s in group_symbols})
+            continue
+        try:
+            X = prepare_features(features.loc[group_symbols].copy(), model_data)
+            probs = model_data["model"].predict_proba(X)
+            for symbol, row in zip(group_symbols, probs):
+                probabilities[symbol] = row
+                model_by_symbol[symbol] = model_data
+        except Exception as e:
+            errors.update({s: f"{model_type} prediction failed: {e}" for s in group_symbols})
+    return probabilities, model_by_symbol, errors
+
+def predict_all_symbols_batch() -> Tuple[int, int]:
+    """Predict every active symbol in batch: one feature query, grouped scoring, one bulk write."""
+    start_time = datetime.now()
+    symbols = fetch_symbols_to_predict()
+    if not symbols:
+        timestamped_log("[WARNING] No symbols to predict. Exiting.")
+        return 0, 0
+
+    total_symbols = len(symbols)
+    timestamped_log(f"[INFO] Starting batch predictions for {total_symbols} symbols...")
+
+    features = load_latest_features()
+    failures = {s: "no feature data" for s in symbols if s not in features.index}
+    candidates = [s for s in symbols if s in features.index]
+
+    # --------------- Move scores ---------------
+    move_probs, move_models, move_errors = score_by_model(features, candidates, "move")
+    failures.update(move_errors)
+    scored = [s for s in candidates if s in move_probs]
+    move_confidence = {s: float(move_probs[s][1]) for s in scored}
+
+    # --------------- Direction scores for confident movers ---------------
+    movers = [s for s in scored if move_confidence[s] >= STRONG_MOVE_CONFIDENCE_THRESHOLD]
+    dir_probs, _, dir_errors = score_by_model(features, movers, "direction")
+    for symbol, error in dir_errors.items():
+        timestamped_log(f"[WARNING] {symbol}: {error}. Skipping direction prediction.")
+
+    # One INSERT ... ON CONFLICT for the whole run; verified days keep their verification
+    today = datetime.now().strftime("%Y-%m-%d")
+    records = pd.DataFrame({
+        "trading_symbol": scored,
+        "date": [features.at[s, "date"] for s in scored],
+        "strong_move_confidence": [move_confidence[s] for s in scored],
+        "direction_prediction": [("UP" if dir_probs[s][1] > dir_probs[s][0] else "DOWN") if s in dir_probs else None for s in scored],
+        "direction_confidence": [float(max(dir_probs[s][0], dir_probs[s][1])) if s in dir_probs else None for s in scored],
+        "model_config_hash": [move_models[s].get("training_date", today) for s in scored],
+    })
+
+    session = SessionLocal()
+    try:
+        counts = write_predictions(session, records)
+        session.commit()
+        successful = len(scored)
+        timestamped_log(f"[INFO] Saved {successful} predictions ({counts['inserted']} new, {counts['updated']} replaced)")
+    except SQLAlchemyError as e:
+        session.rollback()
+        timestamped_log(f"[ERROR] Database error when saving batch predictions: {e}")
+        failures.update({s: "save failed" for s in scored})
+        successful = 0
+    finally:
+        session.close()
+
+    for symbol, error in failures.items():
+        timestamped_log(f"[WARNING] {symbol}: {error}")
+
+    failed = len(failures)
+    duration = (datetime.now() - start_time).total_seconds()
+    timestamped_log(f"[COMPLETE] Batch prediction run finished in {duration:.2f}s: {successful}/{total_symbols} successful")
+    log_model_cache_stats()
+    return successful, failed
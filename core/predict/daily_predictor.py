@@ -1,10 +1,9 @@
 # core/predict/daily_predictor.py
 
 import os
-import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional, Any, List, Tuple
+from typing import Dict, Optional, Any, List
 from functools import lru_cache
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -14,10 +13,12 @@ from sqlalchemy import text
 from db.database import SessionLocal
 from db.models.prediction_results import PredictionResult
 from db.models.symbol import Symbol
-from core.config import DAILY_MODELS_DIR, STRONG_MOVE_CONFIDENCE_THRESHOLD, MODEL_CACHE_SIZE
+from core.config import DAILY_MODELS_DIR, STRONG_MOVE_CONFIDENCE_THRESHOLD, MODEL_CACHE_SIZE, MODEL_CACHE_MAX_BYTES, DAILY_MODEL_MODE
+from core.predict.model_registry import ModelRegistry
+from core.predict.prediction_writer import write_predictions
 
-# Model cache to avoid reloading models
-model_cache: Dict[str, Any] = {}
+# Shared, thread-safe model cache to avoid reloading models
+model_registry = ModelRegistry(max_bytes=MODEL_CACHE_MAX_BYTES, max_entries=MODEL_CACHE_SIZE)
 
 def timestamped_log(message: str):
     """Log message with timestamp."""
@@ -55,59 +56,54 @@ def load_latest_features_for_symbol(symbol: str) -> pd.DataFrame:
     finally:
         session.close()
 
+def get_model_file(symbol: str, model_type: str) -> str:
+    """Model artifact serving a symbol: the shared panel model in panel mode, else the per-symbol file."""
+    if DAILY_MODEL_MODE == "panel":
+        return os.path.join(DAILY_MODELS_DIR, f"panel_{model_type}.pkl")
+    return os.path.join(DAILY_MODELS_DIR, f"{symbol}_{model_type}.pkl")
+
+def normalize_model_data(model_data: Any) -> Dict[str, Any]:
+    """Handle both old-style (just model) and new-style (dict with metadata) formats."""
+    if isinstance(model_data, dict) and "model" in model_data:
+        # New format with metadata
+        return model_data
+    # Old format (just the model)
+    return {"model": model_data, "selected_features": None}
+
 def load_model_data(symbol: str, model_type: str) -> Optional[Dict[str, Any]]:
     """Load model data for a symbol with caching and metadata handling."""
-    cache_key = f"{symbol}_{model_type}"
-    
-    # Return from cache if available
-    if cache_key in model_cache:
-        return model_cache[cache_key]
-        
-    model_path = os.path.join(DAILY_MODELS_DIR, f"{symbol}_{model_type}.pkl")
+    model_path = get_model_file(symbol, model_type)
     if not os.path.exists(model_path):
         timestamped_log(f"[WARNING] Model not found: {model_path}")
         return None
         
     try:
-        # Load model data (might be just the model or a dictionary with metadata)
-        model_data = joblib.load(model_path)
-        
-        # Handle both old-style (just model) and new-style (dict with metadata) formats
-        if isinstance(model_data, dict) and "model" in model_data:
-            # New format with metadata
-            result = model_data
-        else:
-            # Old format (just the model)
-            result = {"model": model_data, "selected_features": None}
-        
-        # Add to cache, with basic LRU management
-        if len(model_cache) >= MODEL_CACHE_SIZE:
-            # Remove a random item if cache is full
-            model_cache.pop(next(iter(model_cache)))
-        
-        model_cache[cache_key] = result
+        result = model_registry.get(model_path, transform=normalize_model_data)
+        if result is None:
+            timestamped_log(f"[WARNING] Model not found: {model_path}")
         return result
     except Exception as e:
         timestamped_log(f"[ERROR] Failed to load model {model_path}: {e}")
         return None
 
+def log_model_cache_stats():
+    """Log hit/miss/eviction counters of the shared model cache."""
+    stats = model_registry.stats()
+    timestamped_log(f"[INFO] Model cache: {stats['entries']} models, {stats['bytes'] / (1024 * 1024):.1f}/{stats['max_bytes'] / (1024 * 1024):.0f} MB, hits={stats['hits']}, misses={stats['misses']}, evictions={stats['evictions']}, hit rate={stats['hit_rate']:.1%}")
+
 def save_prediction(symbol: str, date, move_confidence: float, direction: Optional[str] = None, direction_confidence: Optional[float] = None) -> bool:
-    """Save prediction to database with error handling."""
+    """Save prediction to database with error handling (keeps verification of an existing row)."""
     session = get_db_session()
     try:
-        # First delete existing prediction for same symbol and date (safe overwrite)
-        session.query(PredictionResult).filter(PredictionResult.trading_symbol == symbol, PredictionResult.date == date).delete()
-        
-        # Create and add new prediction
-        prediction = PredictionResult(
-            trading_symbol=symbol,
-            date=date,
-            strong_move_confidence=move_confidence,
-            direction_prediction=direction,
-            direction_confidence=direction_confidence,
-            model_config_hash=generate_model_hash(symbol)  # Add model version tracking
-        )
-        session.add(prediction)
+        row = {
+            "trading_symbol": symbol,
+            "date": date,
+            "strong_move_confidence": move_confidence,
+            "direction_prediction": direction,
+            "direction_confidence": direction_confidence,
+            "model_config_hash": generate_model_hash(symbol)  # Add model version tracking
+        }
+        write_predictions(session, [row])
         session.commit()
         return True
     except SQLAlchemyError as e:
@@ -136,9 +132,18 @@ def prepare_features(features_df: pd.DataFrame, model_data: Dict[str, Any]) -> p
     if 'date' in features_df.columns:
         features_df['date'] = pd.to_datetime(features_df['date'])
         
+    # Panel models add the symbol's categorical code and stored context features
+    if model_data.get("panel"):
+        features_df = add_panel_features(features_df, model_data)
+        
     # Get selected features if available
     selected_features = model_data.get("selected_features")
     
+    # Models saved with a fitted preprocessor get the same NaN filling and clipping as in training
+    preprocessor = model_data.get("preprocessor")
+    if preprocessor is not None:
+        return preprocessor.transform(features_df)
+    
     if selected_features:
         # Use only selected features in the right order
         missing_features = [f for f in selected_features if f not in features_df.columns]
@@ -154,6 +159,14 @@ def prepare_features(features_df: pd.DataFrame, model_data: Dict[str, Any]) -> p
         feature_cols = [col for col in features_df.columns if col not in drop_cols]
         return features_df[feature_cols]
 
+def add_panel_features(features_df: pd.DataFrame, model_data: Dict[str, Any]) -> pd.DataFrame:
+    """Attach the symbol code and context a panel model was trained with."""
+    from core.train.panel_trainer import add_panel_columns
+    features_df = add_panel_columns(features_df.copy(), model_data["symbol_index"], model_data["symbol_context"])
+    if "fo_eligible" in features_df.columns:
+        features_df["fo_eligible"] = features_df["fo_eligible"].astype(float)
+    return features_df
+
 def predict_for_one_symbol(symbol: str) -> bool:
     """Generate and save predictions for one symbol with improved error handling."""
     start_time = datetime.now()
@@ -246,7 +259,7 @@ def fetch_symbols_to_predict() -> List[str]:
         deferred_symbols = []
         
         for symbol in symbol_list:
-            model_path = os.path.join(DAILY_MODELS_DIR, f"{symbol}_move.pkl")
+            model_path = get_model_file(symbol, "move")
             if os.path.exists(model_path):
                 prioritized_symbols.append(symbol)
             else:
@@ -259,8 +272,16 @@ def fetch_symbols_to_predict() -> List[str]:
     finally:
         session.close()
 
-def predict_all_symbols(max_workers: int = 8):
-    """Run predictions for all active symbols with improved parallelization and progress tracking."""
+def predict_all_symbols(max_workers: int = 8, batch: bool = True):
+    """Run predictions for all active symbols with improved parallelization and progress tracking.
+
+    By default the batch predictor scores all symbols from one feature query and writes them
+    in one bulk upsert; `batch=False` runs the per-symbol path on `max_workers` threads.
+    """
+    if batch:
+        from core.predict.batch_predictor import predict_all_symbols_batch
+        return predict_all_symbols_batch()
+    
     start_time = datetime.now()
     
     # Get symbols to predict
@@ -304,6 +325,7 @@ def predict_all_symbols(max_workers: int = 8):
     # Final stats
     duration = (datetime.now() - start_time).total_seconds()
     timestamped_log(f"[COMPLETE] Prediction run finished in {duration:.2f}s: {successful}/{total_symbols} successful")
+    log_model_cache_stats()
     
     return successful, failed
 
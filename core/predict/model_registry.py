@@ -0,0 +1,136 @@
+# core/predict/model_registry.py
+
+import os
+import threading
+import joblib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+def dump_artifact(value: Any, path: str):
+    """joblib.dump to a temp file in the target directory, then atomically replace `path`.
+
+    Registries memory-map artifacts, so rewriting a file in place would corrupt arrays that
+    a running process still maps; replacing the directory entry leaves the old inode intact.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class ModelRegistry:
+    """Thread-safe LRU cache of loaded model artifacts, bounded by bytes and entry count.
+
+    Each file is loaded at most once at a time (per-path load locks, dropped once no thread
+    is loading that path), numpy arrays inside
+    artifacts are memory-mapped, and entries are reloaded when the file on disk changes.
+    Artifact size on disk is used as the memory cost of an entry.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None, mmap_mode: Optional[str] = "r"):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.mmap_mode = mmap_mode
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_errors = 0
+
+    @contextmanager
+    def _loading(self, path: str):
+        """Hold the load lock for `path`; the lock is removed when its last user leaves."""
+        with self._lock:
+            slot = self._load_locks.setdefault(path, {"lock": threading.Lock(), "users": 0})
+            slot["users"] += 1
+        try:
+            with slot["lock"]:
+                yield
+        finally:
+            with self._lock:
+                slot["users"] -= 1
+                if slot["users"] == 0:
+                    del self._load_locks[path]
+
+    def _lookup(self, path: str, mtime: float) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry["mtime"] != mtime:
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry["value"]
+
+    def _store(self, path: str, value: Any, size: int, mtime: float):
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old["size"]
+            self._entries[path] = {"value": value, "size": size, "mtime": mtime}
+            self._bytes += size
+            # Evict least recently used entries, always keeping the one just loaded
+            while len(self._entries) > 1 and (self._bytes > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries)):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted["size"]
+                self.evictions += 1
+
+    def get(self, path: str, transform: Optional[Callable[[Any], Any]] = None) -> Optional[Any]:
+        """Return the artifact at `path` (after `transform`), loading it on a miss; None if missing."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        value = self._lookup(path, stat.st_mtime)
+        if value is not None:
+            return value
+
+        with self._loading(path):
+            # Another thread may have loaded it while we waited
+            value = self._lookup(path, stat.st_mtime)
+            if value is not None:
+                return value
+            with self._lock:
+                self.misses += 1
+            try:
+                value = joblib.load(path, mmap_mode=self.mmap_mode)
+            except Exception:
+                with self._lock:
+                    self.load_errors += 1
+                raise
+            if transform is not None:
+                value = transform(value)
+            self._store(path, value, stat.st_size, stat.st_mtime)
+            return value
+
+    def invalidate(self, path: str):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry["size"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_errors": self.load_errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
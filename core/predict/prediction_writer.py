@@ -0,0 +1,42 @@
+# core/predict/prediction_writer.py
+
+import pandas as pd
+from typing import Dict, List, Union
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from db.models.prediction_results import PredictionResult
+
+# Columns rewritten when a prediction for the same symbol and day already exists;
+# verification fields are left as they are
+PREDICTION_COLUMNS = ["strong_move_confidence", "direction_prediction", "direction_confidence", "model_config_hash"]
+
+# Rows per INSERT statement (keeps bind parameters well under the Postgres limit)
+WRITE_CHUNK_ROWS = 5000
+
+def _records(rows: Union[pd.DataFrame, List[Dict]]) -> List[Dict]:
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    df = df[["trading_symbol", "date"] + [c for c in PREDICTION_COLUMNS if c in df.columns]]
+    df = df.drop_duplicates(subset=["trading_symbol", "date"], keep="last")
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
+
+def write_predictions(session: Session, rows: Union[pd.DataFrame, List[Dict]]) -> Dict[str, int]:
+    """Insert or update prediction rows with one INSERT ... ON CONFLICT DO UPDATE per chunk.
+
+    Rows conflict on `unique_prediction_per_day`; existing rows get new prediction values
+    while `verified`, `verification_date` and the actual outcome columns are kept intact.
+    New rows start unverified. The caller owns the transaction. Returns insert/update counts.
+    """
+    records = _records(rows)
+    counts = {"inserted": 0, "updated": 0}
+    for start in range(0, len(records), WRITE_CHUNK_ROWS):
+        chunk = [{**r, "verified": False} for r in records[start:start + WRITE_CHUNK_ROWS]]
+        stmt = insert(PredictionResult).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            constraint="unique_prediction_per_day",
+            set_={c: stmt.excluded[c] for c in PREDICTION_COLUMNS if c in chunk[0]},
+        ).returning(literal_column("(xmax = 0)").label("inserted"))
+        for (inserted,) in session.execute(stmt):
+            counts["inserted" if inserted else "updated"] += 1
+    return counts
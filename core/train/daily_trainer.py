@@ -6,19 +6,28 @@ import numpy as np
 import joblib
 import json
 import gc
+import time
 from datetime import datetime
 from typing import List, Dict, Tuple
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from db.database import SessionLocal
+from db.database import SessionLocal, ensure_columns
 from db.models.symbol import Symbol
 from db.models.model_performance import ModelPerformance
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import TimeSeriesSplit
+from sklearn.base import clone
 from functools import partial, lru_cache
-from core.config import (RANDOM_FOREST, XGBOOST, LIGHTGBM, DAILY_MODELS_DIR, DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, RANDOM_FOREST_N_ESTIMATORS, RANDOM_FOREST_MAX_DEPTH, RANDOM_SEED, RANDOM_FOREST_MIN_SAMPLES, RANDOM_FOREST_CLASS_WEIGHT, LIGHTGBM_N_ESTIMATORS, LIGHTGBM_LEARNING_RATE, LIGHTGBM_MAX_DEPTH, LIGHTGBM_MIN_CHILD_WEIGHT)
+from core.train.labeling import build_labels
+from core.train.training_data import load_shared_training_dataset, attach_training_dataset, get_training_dataset
+from core.train.fingerprint import compute_fingerprint, classifier_signature, read_fingerprint, write_fingerprint
+from core.train.preprocessing import FeaturePreprocessor
+from core.train.feature_ranking import load_ranking, save_ranking, stale_reason, gain_importances, merge_gain_ranking
+from core.train.warm_start import load_previous_model, full_refit_reason, warm_start_model, build_lineage
+from core.predict.model_registry import dump_artifact
+from core.config import (RANDOM_FOREST, XGBOOST, LIGHTGBM, DAILY_MODELS_DIR, DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, RANDOM_FOREST_N_ESTIMATORS, RANDOM_FOREST_MAX_DEPTH, RANDOM_SEED, RANDOM_FOREST_MIN_SAMPLES, RANDOM_FOREST_CLASS_WEIGHT, LIGHTGBM_N_ESTIMATORS, LIGHTGBM_LEARNING_RATE, LIGHTGBM_MAX_DEPTH, LIGHTGBM_MIN_CHILD_WEIGHT, INCREMENTAL_TRAINING_ENABLED, WARM_START_WINDOW_ROWS, FEATURE_RANKING_SOURCE)
 
 # Suppress warnings
 import warnings
@@ -69,9 +78,16 @@ def get_model_path(symbol: str, model_type: str) -> str:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     return path
 
-@lru_cache(maxsize=50)
 def load_symbol_data(symbol: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """Load feature and price data for a symbol with error handling."""
+    """Load feature and price data for a symbol, from the shared training dataset when attached."""
+    dataset = get_training_dataset()
+    if dataset is not None and symbol in dataset:
+        return dataset.symbol_frames(symbol)
+    return query_symbol_data(symbol)
+
+@lru_cache(maxsize=50)
+def query_symbol_data(symbol: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Load feature and price data for a symbol from the database with error handling."""
     session = get_db_session()
     try:
         # Use direct parameterized SQL with correct parameter format
@@ -100,39 +116,45 @@ def clean_data_for_model(df: pd.DataFrame) -> pd.DataFrame:
     """Clean dataframe by handling non-numeric columns, infinities, and outliers."""
     exclude_cols = ['id', 'trading_symbol', 'exchange', 'date', 'created_at', 'updated_at', 'source_tag']
     feature_cols = [col for col in df.columns if col not in exclude_cols]
-    numeric_df = df[feature_cols].select_dtypes(include=['number']).copy()
-    
-    # Fast vectorized operations for data cleaning
-    numeric_df = numeric_df.replace([np.inf, -np.inf], np.nan)
-    
-    # Calculate means for NaN filling
-    column_means = numeric_df.mean().fillna(0)
-    numeric_df = numeric_df.fillna(column_means)
+    return FeaturePreprocessor().fit_transform(df[feature_cols])
+
+def select_best_features(X: pd.DataFrame, y: pd.Series, n_features: int = 6, symbol: str = None, target: str = None, previous: Dict = None) -> List[str]:
+    """Select most important features using faster approach.
+
+    When `symbol` and `target` are given, a cached forest ranking over every candidate is
+    reused until it expires or drifts, then refitted. With FEATURE_RANKING_SOURCE="lightgbm_gain"
+    the previous LightGBM artifact's features are ranked by gain between refreshes, and the
+    remaining candidates follow in cached-ranking order.
+    """
+    candidates = X.select_dtypes(include=['number']).columns.drop(['id'], errors='ignore').tolist()
+    if len(candidates) <= n_features:
+        return clean_data_for_model(X).columns.tolist()
     
-    # Use percentile-based clipping for outliers
-    for col in numeric_df.columns:
-        if numeric_df[col].count() > 10:  # Only process columns with enough data
-            q_low, q_high = numeric_df[col].quantile([0.01, 0.99])
-            numeric_df[col] = numeric_df[col].clip(q_low, q_high)
+    if symbol is not None and target is not None:
+        cached = load_ranking(symbol, target)
+        if stale_reason(cached, candidates, y) is None:
+            ranking, source = cached["ranking"], f"cached {cached['computed_date']}"
+            if FEATURE_RANKING_SOURCE == "lightgbm_gain":
+                gains = gain_importances(previous if previous is not None else load_previous_model(get_model_path(symbol, target)))
+                if gains is not None:
+                    ranking, source = merge_gain_ranking(gains, ranking), "LightGBM gain"
+            top_features = [f for f in ranking if f in candidates][:n_features]
+            timestamped_log(f"🔍 Selected top features ({source}): {', '.join(top_features)}")
+            return top_features
     
-    return numeric_df
-
-def select_best_features(X: pd.DataFrame, y: pd.Series, n_features: int = 6) -> List[str]:
-    """Select most important features using faster approach."""
     X_clean = clean_data_for_model(X)
-    if X_clean.shape[1] <= n_features:
-        return X_clean.columns.tolist()
-        
     try:
         # Use simpler RandomForest for feature selection
         model = RandomForestClassifier(n_estimators=50, max_depth=5, random_state=RANDOM_SEED, n_jobs=1)
         model.fit(X_clean, y)
         
         # Get feature importances
-        importances = pd.DataFrame({'feature': X_clean.columns, 'importance': model.feature_importances_}).sort_values('importance', ascending=False)
+        importances = pd.Series(model.feature_importances_, index=X_clean.columns)
+        if symbol is not None and target is not None:
+            save_ranking(symbol, target, importances, "randomforest", candidates, y)
         
         # Return top n features
-        top_features = importances.head(n_features)['feature'].tolist()
+        top_features = importances.sort_values(ascending=False).head(n_features).index.tolist()
         timestamped_log(f"🔍 Selected top features: {', '.join(top_features)}")
         return top_features
     except:
@@ -141,23 +163,20 @@ def select_best_features(X: pd.DataFrame, y: pd.Series, n_features: int = 6) ->
 
 def calculate_additional_features(df):
     """Calculate additional technical indicators for better predictions."""
-    symbols = df['trading_symbol'].unique()
+    # Grouped ops keep diffs and pct changes within each symbol, in a single pass over the frame
+    grouped = df.groupby('trading_symbol', sort=False)
     
-    for symbol in symbols:
-        symbol_mask = df['trading_symbol'] == symbol
-        symbol_df = df.loc[symbol_mask]
-        
-        # Add RSI divergence
-        if 'rsi_14' in symbol_df.columns:
-            df.loc[symbol_mask, 'rsi_divergence'] = symbol_df['rsi_14'].diff(3)
-        
-        # Add price momentum
-        if 'close' in symbol_df.columns:
-            df.loc[symbol_mask, 'price_momentum_5'] = symbol_df['close'].pct_change(5)
-        
-        # Add volatility features
-        if 'atr_14_normalized' in symbol_df.columns:
-            df.loc[symbol_mask, 'volatility_change'] = symbol_df['atr_14_normalized'].pct_change(5)
+    # Add RSI divergence
+    if 'rsi_14' in df.columns:
+        df['rsi_divergence'] = grouped['rsi_14'].diff(3)
+    
+    # Add price momentum
+    if 'close' in df.columns:
+        df['price_momentum_5'] = grouped['close'].pct_change(5)
+    
+    # Add volatility features
+    if 'atr_14_normalized' in df.columns:
+        df['volatility_change'] = grouped['atr_14_normalized'].pct_change(5)
     
     return df
 
@@ -179,47 +198,9 @@ def prepare_training_data(features_df: pd.DataFrame, closes_df: pd.DataFrame, th
     # Use fixed prediction window for simplicity and speed
     df['prediction_window'] = max_days
     
-    # Process each symbol separately
-    symbols = df['trading_symbol'].unique()
-    
-    for symbol in symbols:
-        symbol_mask = df['trading_symbol'] == symbol
-        symbol_df = df[symbol_mask].copy()
-        
-        # Calculate future max and min prices - vectorized when possible
-        dates = symbol_df['date'].tolist()
-        closes = symbol_df['close'].tolist()
-        
-        max_future_prices = []
-        min_future_prices = []
-        
-        # Faster approach - limit lookups
-        for i in range(len(dates)):
-            future_prices = []
-            # Only look up to max_days ahead
-            for j in range(i + 1, min(i + max_days + 1, len(dates))):
-                future_prices.append(closes[j])
-                
-            if future_prices:
-                max_future_prices.append(max(future_prices))
-                min_future_prices.append(min(future_prices))
-            else:
-                max_future_prices.append(np.nan)
-                min_future_prices.append(np.nan)
-        
-        # Assign back to the main DataFrame
-        df.loc[symbol_mask, 'max_close_future'] = max_future_prices
-        df.loc[symbol_mask, 'min_close_future'] = min_future_prices
-    
-    # Calculate percentage moves, handling zeros and NaNs
-    close_nonzero = df["close"].replace(0, np.nan)
-    df["percent_up_move"] = ((df["max_close_future"] - df["close"]) / close_nonzero) * 100
-    df["percent_down_move"] = ((df["min_close_future"] - df["close"]) / close_nonzero) * 100
-    
-    # Create binary target variables
-    df["strong_move_target"] = ((df["percent_up_move"] >= threshold_percent) | 
-                              (df["percent_down_move"].abs() >= threshold_percent)).astype(int)
-    df["direction_target"] = (df["percent_up_move"] > df["percent_down_move"].abs()).astype(int)
+    # Forward-window labels over [min_days, max_days] for all symbols at once
+    df, strong_move_labels = build_labels(df, [threshold_percent], min_days, max_days)
+    df["strong_move_target"] = strong_move_labels[float(threshold_percent)]
     
     # Drop rows with missing targets
     df = df.dropna(subset=["strong_move_target", "direction_target"])
@@ -249,7 +230,7 @@ def evaluate_model(model, X_test, y_test) -> Dict[str, float]:
     
     return metrics
 
-def train_with_balanced_sampling(X_train, y_train, model):
+def train_with_balanced_sampling(X_train, y_train, model, **fit_params):
     """Train models with balanced sampling for better performance on imbalanced data."""
     # Check class imbalance
     pos_ratio = y_train.mean()
@@ -265,7 +246,7 @@ def train_with_balanced_sampling(X_train, y_train, model):
             model.scale_pos_weight = scale_weight
     
     # Train the model
-    model.fit(X_train, y_train)
+    model.fit(X_train, y_train, **fit_params)
     return model
 
 def cross_validate_with_time_series(X, y, model, n_splits=3):
@@ -289,9 +270,17 @@ def cross_validate_with_time_series(X, y, model, n_splits=3):
         "mean_f1": sum(f1_scores) / len(f1_scores)
     }
 
-def save_model_performance(session: Session, symbol: str, model_type: str, metrics: Dict, selected_features: List[str], threshold: float) -> bool:
+_performance_schema_checked = False
+
+def save_model_performance(session: Session, symbol: str, model_type: str, metrics: Dict, selected_features: List[str], threshold: float, fingerprint: str = None) -> bool:
     """Save model performance metrics to database."""
+    global _performance_schema_checked
     try:
+        # Older databases predate the data_fingerprint column
+        if not _performance_schema_checked:
+            ensure_columns(ModelPerformance)
+            _performance_schema_checked = True
+        
         # Check if we already have a record for today
         existing = session.query(ModelPerformance).filter(ModelPerformance.trading_symbol == symbol, ModelPerformance.model_type == model_type, ModelPerformance.evaluation_date == datetime.now().date()).first()
         
@@ -309,6 +298,7 @@ def save_model_performance(session: Session, symbol: str, model_type: str, metri
         performance.f1_score = metrics.get("f1", 0)
         performance.sensitivity_threshold = threshold
         performance.effective_features = json.dumps(selected_features)
+        performance.data_fingerprint = fingerprint
         
         # Set prediction counts (these were missing before)
         performance.predictions_count = len(metrics.get("y_test", [])) if "y_test" in metrics else 100  # Default value
@@ -323,8 +313,72 @@ def save_model_performance(session: Session, symbol: str, model_type: str, metri
         timestamped_log(f"[WARNING] Failed to save performance for {symbol}: {e}")
         return False
 
-def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direction_classifiers: List[str], threshold_percent: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, min_days: int = 1, max_days: int = 5) -> Dict[str, float]:
-    """Train models for a single symbol with comprehensive error handling and logging."""
+def plan_symbol_model(symbol: str, model_type: str, classifier_name: str, df: pd.DataFrame, feature_cols: List[str], y: pd.Series, incremental: bool, target: Dict) -> Tuple[List[str], Dict, str]:
+    """Choose features and decide between warm start and full refit for one symbol model.
+
+    Returns (selected_features, previous model data or None, full refit reason or None).
+    A warm start keeps the previous model's feature list so boosting can continue on it.
+    """
+    if not incremental:
+        return select_best_features(df[feature_cols], y, n_features=6, symbol=symbol, target=model_type), None, "incremental training disabled"
+
+    previous = load_previous_model(get_model_path(symbol, model_type))
+    stored_features = (previous or {}).get("selected_features") or []
+    if previous is not None and previous.get("target") != target:
+        reason = "target definition changed"
+    elif previous is not None and not set(stored_features).issubset(df.columns):
+        reason = "feature set changed"
+    else:
+        # Drift check on the newest rows
+        X_recent = clean_data_for_model(df[stored_features]).iloc[-WARM_START_WINDOW_ROWS:] if stored_features else None
+        reason = full_refit_reason(previous, classifier_name, X_recent, y.iloc[-WARM_START_WINDOW_ROWS:]) or warm_start_window_reason(y)
+
+    if reason is None:
+        return stored_features, previous, None
+    return select_best_features(df[feature_cols], y, n_features=6, symbol=symbol, target=model_type, previous=previous), previous, reason
+
+def warm_start_window_reason(y: pd.Series, train_fraction: float = 0.8) -> str:
+    """Why the newest rows cannot support a warm start, or None."""
+    n_test = len(y) - int(len(y) * train_fraction)
+    if len(y) < WARM_START_WINDOW_ROWS + n_test:
+        return "history too short for a warm-start window and holdout"
+    if y.iloc[-WARM_START_WINDOW_ROWS:].nunique() < 2:
+        return "single-class training window"
+    return None
+
+def split_train_test(X: pd.DataFrame, y: pd.Series, warm_start: bool, train_fraction: float = 0.8) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """Chronological (X_train, X_test, y_train, y_test).
+
+    A full refit trains on the oldest `train_fraction` of rows and tests on the rest. A warm
+    start trains on the newest WARM_START_WINDOW_ROWS rows, latest bar included, and tests on
+    a holdout of the same size as the full-refit test set taken just before that window.
+    """
+    n_test = len(X) - int(len(X) * train_fraction)
+    if not warm_start:
+        cut = len(X) - n_test
+        return X.iloc[:cut], X.iloc[cut:], y.iloc[:cut], y.iloc[cut:]
+    window_start = len(X) - WARM_START_WINDOW_ROWS
+    test_start = window_start - n_test
+    return X.iloc[window_start:], X.iloc[test_start:window_start], y.iloc[window_start:], y.iloc[test_start:window_start]
+
+def fit_symbol_model(classifier_name: str, X_train: pd.DataFrame, y_train: pd.Series, previous: Dict, reason: str):
+    """Fit a fresh model, or continue boosting the previous one on the warm-start window from `split_train_test`."""
+    if reason is None:
+        model, fit_params = warm_start_model(previous["model"])
+        train_with_balanced_sampling(X_train, y_train, model, **fit_params)
+        return model, build_lineage(previous, model, "warm_start", None, len(X_train))
+
+    model = clone(get_classifier(classifier_name))
+    train_with_balanced_sampling(X_train, y_train, model)
+    return model, build_lineage(previous, model, "full", reason, len(X_train))
+
+def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direction_classifiers: List[str], threshold_percent: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, min_days: int = 1, max_days: int = 5, incremental: bool = INCREMENTAL_TRAINING_ENABLED, skip_unchanged: bool = True) -> Dict[str, float]:
+    """Train models for a single symbol with comprehensive error handling and logging.
+
+    With `incremental`, LightGBM models are warm-started from their previous artifact when allowed.
+    With `skip_unchanged`, a symbol whose inputs match the fingerprint of its current move
+    model is not retrained and gets status "skipped".
+    """
     start_time = datetime.now()
     results = {"symbol": symbol, "status": "failed", "move_metrics": {}, "direction_metrics": {}, "duration": 0, "error": None}
     
@@ -336,6 +390,16 @@ def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direct
             timestamped_log(f"⚠️ No data found for {symbol}. Skipping.")
             results["error"] = "No data found"
             return results
+        
+        # Fingerprint the inputs; unchanged data, target and classifier params need no retraining
+        target = {"threshold": float(threshold_percent), "min_days": min_days, "max_days": max_days}
+        classifiers = {"move": [move_classifiers[0], classifier_signature(get_classifier(move_classifiers[0]))], "direction": [direction_classifiers[0], classifier_signature(get_classifier(direction_classifiers[0]))]}
+        fingerprint = compute_fingerprint(features_df, closes_df, target, classifiers)
+        if skip_unchanged and read_fingerprint(get_model_path(symbol, "move")) == fingerprint["fingerprint"]:
+            timestamped_log(f"⏭️ Inputs unchanged for {symbol} since last training. Skipping.")
+            results["status"] = "skipped"
+            results["duration"] = (datetime.now() - start_time).total_seconds()
+            return results
             
         timestamped_log(f"📊 Preparing training data for {symbol}...")
         df, feature_cols = prepare_training_data(features_df, closes_df, threshold_percent, min_days, max_days)
@@ -354,30 +418,24 @@ def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direct
         timestamped_log(f"🧮 Features: {len(feature_cols)}, Samples: {len(df)}, Positive examples: {move_positives} ({move_positives/len(df)*100:.1f}%)")
         
         # --------------- Train Move Model ---------------
-        # Exclude non-numeric and date columns before selecting features
-        X = df[feature_cols].copy()
         y = df["strong_move_target"].copy()
         
-        # Select best features - reduced to 6 features for speed
-        selected_features = select_best_features(X, y, n_features=6)
+        # Select best features - reduced to 6 features for speed (or reuse them for a warm start)
+        selected_features, previous, refit_reason = plan_symbol_model(symbol, "move", move_classifiers[0], df, feature_cols, y, incremental, target)
         
-        # Clean data for modeling
-        X_selected = clean_data_for_model(df[selected_features])
+        # Fit the cleaning step once; it is stored with the model and reused at inference
+        preprocessor = FeaturePreprocessor().fit(df[selected_features])
+        X_selected = preprocessor.transform(df[selected_features])
         
-        # Use a simpler train/test split - 80/20
-        train_size = int(len(X_selected) * 0.8)
-        X_train = X_selected.iloc[:train_size]
-        X_test = X_selected.iloc[train_size:]
-        y_train = y.iloc[:train_size]
-        y_test = y.iloc[train_size:]
+        # 80/20 chronological split; a warm start trains on the newest window instead
+        X_train, X_test, y_train, y_test = split_train_test(X_selected, y, warm_start=refit_reason is None)
         
         # Create and train model - use only one model type for speed
-        timestamped_log(f"🏋️ Training Move Model for {symbol} with {move_classifiers[0]}...")
-        move_model = get_classifier(move_classifiers[0])
+        timestamped_log(f"🏋️ Training Move Model for {symbol} with {move_classifiers[0]} ({'warm start' if refit_reason is None else 'full refit: ' + refit_reason})...")
         
         # Train with timing
         train_start = datetime.now()
-        train_with_balanced_sampling(X_train, y_train, move_model)
+        move_model, lineage = fit_symbol_model(move_classifiers[0], X_train, y_train, previous, refit_reason)
         train_time = (datetime.now() - train_start).total_seconds()
         
         # Evaluate
@@ -389,13 +447,13 @@ def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direct
         timestamped_log(f"   Accuracy: {metrics['accuracy']:.3f}, Precision: {metrics['precision']:.3f}, Recall: {metrics['recall']:.3f}, F1: {metrics['f1']:.3f}")
         
         # Save model and selected features
-        model_data = {"model": move_model, "selected_features": selected_features, "metrics": metrics, "training_date": datetime.now().strftime("%Y-%m-%d"), "positive_samples": int(y_train.sum()), "total_samples": len(y_train)}
-        joblib.dump(model_data, get_model_path(symbol, "move"))
+        model_data = {"model": move_model, "selected_features": selected_features, "preprocessor": preprocessor, "metrics": metrics, "training_date": datetime.now().strftime("%Y-%m-%d"), "positive_samples": int(y_train.sum()), "total_samples": len(y_train), "target": target, "lineage": lineage, "data_fingerprint": fingerprint["fingerprint"]}
+        dump_artifact(model_data, get_model_path(symbol, "move"))
         
         # Save performance metrics to database
         session = get_db_session()
         try:
-            save_model_performance(session=session, symbol=symbol, model_type="move", metrics=metrics, selected_features=selected_features, threshold=threshold_percent)
+            save_model_performance(session=session, symbol=symbol, model_type="move", metrics=metrics, selected_features=selected_features, threshold=threshold_percent, fingerprint=fingerprint["fingerprint"])
         except Exception as e:
             timestamped_log(f"[ERROR] Failed to save model performance: {e}")
         
@@ -405,15 +463,16 @@ def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direct
         if len(df_dir) < 10:
             timestamped_log(f"⚠️ Not enough direction data for {symbol}. Skipping direction model.")
             results["status"] = "partial_success"
+            write_fingerprint(get_model_path(symbol, "move"), fingerprint)
             session.close()
             return results
             
-        X_dir = df_dir[feature_cols]
         y_dir = df_dir["direction_target"]
         
         # Feature selection for direction model
-        selected_dir_features = select_best_features(X_dir, y_dir, n_features=6)
-        X_dir_selected = clean_data_for_model(df_dir[selected_dir_features])
+        selected_dir_features, previous_dir, dir_refit_reason = plan_symbol_model(symbol, "direction", direction_classifiers[0], df_dir, feature_cols, y_dir, incremental, target)
+        dir_preprocessor = FeaturePreprocessor().fit(df_dir[selected_dir_features])
+        X_dir_selected = dir_preprocessor.transform(df_dir[selected_dir_features])
         
         # Direction model - simple 80/20 train/test split
         dir_train_size = int(len(X_dir_selected) * 0.8)
@@ -421,21 +480,18 @@ def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direct
         if dir_train_size < 5 or len(X_dir_selected) - dir_train_size < 5:
             timestamped_log(f"⚠️ Not enough train/test samples for {symbol} direction model. Skipping.")
             results["status"] = "partial_success"
+            write_fingerprint(get_model_path(symbol, "move"), fingerprint)
             session.close()
             return results
             
-        Xd_train = X_dir_selected.iloc[:dir_train_size]
-        Xd_test = X_dir_selected.iloc[dir_train_size:]
-        yd_train = y_dir.iloc[:dir_train_size]
-        yd_test = y_dir.iloc[dir_train_size:]
+        Xd_train, Xd_test, yd_train, yd_test = split_train_test(X_dir_selected, y_dir, warm_start=dir_refit_reason is None)
         
         # Create and train model - ONLY USE ONE MODEL
-        timestamped_log(f"🏋️ Training Direction Model for {symbol} with {direction_classifiers[0]}...")
-        direction_model = get_classifier(direction_classifiers[0])
+        timestamped_log(f"🏋️ Training Direction Model for {symbol} with {direction_classifiers[0]} ({'warm start' if dir_refit_reason is None else 'full refit: ' + dir_refit_reason})...")
         
         # Train with timing
         dir_train_start = datetime.now()
-        train_with_balanced_sampling(Xd_train, yd_train, direction_model)
+        direction_model, dir_lineage = fit_symbol_model(direction_classifiers[0], Xd_train, yd_train, previous_dir, dir_refit_reason)
         dir_train_time = (datetime.now() - dir_train_start).total_seconds()
         
         # Evaluate
@@ -447,13 +503,17 @@ def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direct
         timestamped_log(f"   Accuracy: {dir_metrics['accuracy']:.3f}, Precision: {dir_metrics['precision']:.3f}, Recall: {dir_metrics['recall']:.3f}, F1: {dir_metrics['f1']:.3f}")
         
         # Save model and selected features
-        dir_model_data = {"model": direction_model, "selected_features": selected_dir_features, "metrics": dir_metrics, "training_date": datetime.now().strftime("%Y-%m-%d"), "positive_samples": int(yd_train.sum()), "total_samples": len(yd_train)}
-        joblib.dump(dir_model_data, get_model_path(symbol, "direction"))
+        dir_model_data = {"model": direction_model, "selected_features": selected_dir_features, "preprocessor": dir_preprocessor, "metrics": dir_metrics, "training_date": datetime.now().strftime("%Y-%m-%d"), "positive_samples": int(yd_train.sum()), "total_samples": len(yd_train), "target": target, "lineage": dir_lineage, "data_fingerprint": fingerprint["fingerprint"]}
+        dump_artifact(dir_model_data, get_model_path(symbol, "direction"))
+        write_fingerprint(get_model_path(symbol, "direction"), fingerprint)
         
         # Save direction model performance
-        save_model_performance(session=session, symbol=symbol, model_type="direction", metrics=dir_metrics, selected_features=selected_dir_features, threshold=threshold_percent)
+        save_model_performance(session=session, symbol=symbol, model_type="direction", metrics=dir_metrics, selected_features=selected_dir_features, threshold=threshold_percent, fingerprint=fingerprint["fingerprint"])
         session.close()
         
+        # Mark the symbol as trained on these inputs only once both models are saved
+        write_fingerprint(get_model_path(symbol, "move"), fingerprint)
+        
         total_time = (datetime.now() - start_time).total_seconds()
         timestamped_log(f"⌛ Total training time for {symbol}: {total_time:.1f}s")
         
@@ -472,17 +532,50 @@ def train_models_for_one_symbol(symbol: str, move_classifiers: List[str], direct
         # Force garbage collection
         gc.collect()
 
+def init_training_worker(dataset_handle, classifiers: List[str]):
+    """Pool initializer: attach the shared dataset and import model libraries once per worker."""
+    attach_training_dataset(dataset_handle)
+    for classifier_name in set(classifiers):
+        try:
+            get_classifier(classifier_name)
+        except Exception as e:
+            timestamped_log(f"[WARNING] Could not warm up {classifier_name}: {e}")
+
 def train_symbol_wrapper(symbol: str, move_classifiers, direction_classifiers, threshold_percent, min_days, max_days):
-    """Wrapper function for multiprocessing."""
+    """Wrapper function for multiprocessing; records when the worker started and finished the symbol."""
+    started_at = time.time()
     try:
-        return train_models_for_one_symbol(symbol=symbol, move_classifiers=move_classifiers, direction_classifiers=direction_classifiers, threshold_percent=threshold_percent, min_days=min_days, max_days=max_days)
+        result = train_models_for_one_symbol(symbol=symbol, move_classifiers=move_classifiers, direction_classifiers=direction_classifiers, threshold_percent=threshold_percent, min_days=min_days, max_days=max_days)
     except Exception as e:
-        return {"symbol": symbol, "status": "error", "error": str(e), "move_metrics": {}, "direction_metrics": {}, "duration": 0}
+        result = {"symbol": symbol, "status": "error", "error": str(e), "move_metrics": {}, "direction_metrics": {}, "duration": 0}
+    result["started_at"] = started_at
+    result["finished_at"] = time.time()
+    return result
+
+def order_symbols_by_cost(symbol_list: List[str], row_counts: Dict[str, int]) -> List[str]:
+    """Longest-first schedule: symbols with the most training rows start first."""
+    return sorted(symbol_list, key=lambda s: row_counts.get(s, 0), reverse=True)
+
+def log_schedule_stats(results: List[Dict], submitted_at: float):
+    """Report per-symbol wall time, queue wait and overall makespan for a pool run."""
+    timed = [r for r in results if "started_at" in r]
+    if not timed:
+        return
+    wall = np.array([r["finished_at"] - r["started_at"] for r in timed])
+    wait = np.array([r["started_at"] - submitted_at for r in timed])
+    makespan = max(r["finished_at"] for r in timed) - submitted_at
+    slowest = max(timed, key=lambda r: r["finished_at"] - r["started_at"])
+    timestamped_log(f"Schedule Summary:")
+    timestamped_log(f"  Makespan: {makespan:.1f}s for {len(timed)} symbols")
+    timestamped_log(f"  Wall time per symbol: mean={wall.mean():.1f}s, p95={np.percentile(wall, 95):.1f}s, max={wall.max():.1f}s ({slowest['symbol']})")
+    timestamped_log(f"  Queue wait: mean={wait.mean():.1f}s, max={wait.max():.1f}s")
+    timestamped_log(f"  Busy time / makespan: {wall.sum() / max(makespan, 1e-9):.1f} workers")
 
 def train_daily_model(move_classifiers: List[str] = [LIGHTGBM], direction_classifiers: List[str] = [LIGHTGBM], threshold_percent: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, min_days: int = 1, max_days: int = 5, max_workers: int = None):
     """Run training for all active symbols with improved parallelization and adaptive timeframes."""
     session = get_db_session()
     total_start_time = datetime.now()
+    dataset = None
     
     try:
         # Get all active symbols
@@ -504,33 +597,41 @@ def train_daily_model(move_classifiers: List[str] = [LIGHTGBM], direction_classi
         timestamped_log(f"Using adaptive timeframes: {min_days}-{max_days} days")
         timestamped_log(f"Using model types: Move={move_classifiers}, Direction={direction_classifiers}")
         
+        # Load features and closes for every symbol once; workers attach to the shared buffers
+        try:
+            dataset = load_shared_training_dataset()
+        except Exception as e:
+            dataset = None
+            timestamped_log(f"[WARNING] Shared training dataset unavailable, falling back to per-symbol queries: {e}")
+        dataset_handle = dataset.handle() if dataset is not None else None
+        
         # Prepare partial function for multiprocessing
         train_fn = partial(train_symbol_wrapper, move_classifiers=move_classifiers, direction_classifiers=direction_classifiers, threshold_percent=threshold_percent, min_days=min_days, max_days=max_days)
         
-        # Process symbols in batches for better memory management
-        batch_size = 50  # Process 50 symbols at a time
+        # Longest symbols first so the tail of the run is made of short jobs
+        row_counts = dataset.row_counts() if dataset is not None else {}
+        symbol_list = order_symbols_by_cost(symbol_list, row_counts)
         results = []
         
-        for i in range(0, total_symbols, batch_size):
-            batch_symbols = symbol_list[i:i+batch_size]
-            timestamped_log(f"Processing batch {i//batch_size + 1}/{(total_symbols+batch_size-1)//batch_size} ({len(batch_symbols)} symbols)")
-            
-            with ProcessPoolExecutor(max_workers=max_workers) as executor:
-                futures = {executor.submit(train_fn, symbol): symbol for symbol in batch_symbols}
-                
-                for future in as_completed(futures):
-                    symbol = futures[future]
-                    try:
-                        result = future.result()
-                        results.append(result)
-                        
-                        status_icon = "✅" if result["status"] == "success" else "⚠️" if result["status"] == "partial_success" else "❌"
-                        timestamped_log(f"[{status_icon}] {symbol}: {result['status']}")
-                    except Exception as e:
-                        timestamped_log(f"[ERROR] Failed processing {symbol}: {str(e)}")
+        # One long-lived pool; idle workers pick up the next symbol without batch barriers
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_training_worker, initargs=(dataset_handle, list(move_classifiers) + list(direction_classifiers))) as executor:
+            submitted_at = time.time()
+            futures = {executor.submit(train_fn, symbol): symbol for symbol in symbol_list}
             
-            # Force garbage collection between batches
-            gc.collect()
+            for done, future in enumerate(as_completed(futures), start=1):
+                symbol = futures[future]
+                try:
+                    result = future.result()
+                    results.append(result)
+                    
+                    status_icon = "✅" if result["status"] == "success" else "⏭️" if result["status"] == "skipped" else "⚠️" if result["status"] == "partial_success" else "❌"
+                    wall_time = result.get("finished_at", 0) - result.get("started_at", 0)
+                    queue_wait = result.get("started_at", submitted_at) - submitted_at
+                    timestamped_log(f"[{status_icon}] {symbol}: {result['status']} ({done}/{total_symbols}, rows={row_counts.get(symbol, 'n/a')}, wall={wall_time:.1f}s, wait={queue_wait:.1f}s)")
+                except Exception as e:
+                    timestamped_log(f"[ERROR] Failed processing {symbol}: {str(e)}")
+        
+        log_schedule_stats(results, submitted_at)
         
         # Calculate average metrics for successful runs
         success_results = [r for r in results if r["status"] == "success" and r["move_metrics"]]
@@ -544,11 +645,12 @@ def train_daily_model(move_classifiers: List[str] = [LIGHTGBM], direction_classi
             timestamped_log(f"  Total symbols: {total_symbols}")
             timestamped_log(f"  Successful: {len([r for r in results if r['status'] == 'success'])}")
             timestamped_log(f"  Partial success: {len([r for r in results if r['status'] == 'partial_success'])}")
+            timestamped_log(f"  Skipped (unchanged inputs): {len([r for r in results if r['status'] == 'skipped'])}")
             timestamped_log(f"  Failed: {len([r for r in results if r['status'] == 'failed' or r['status'] == 'error'])}")
             timestamped_log(f"  Average metrics: Accuracy={avg_accuracy:.3f}, F1={avg_f1:.3f}")
             timestamped_log(f"  Average training time: {avg_time:.1f}s per symbol")
         else:
-            timestamped_log(f"No successful training runs to calculate average metrics")
+            timestamped_log(f"No successful training runs to calculate average metrics ({len([r for r in results if r['status'] == 'skipped'])} skipped as unchanged)")
 
         total_time = (datetime.now() - total_start_time).total_seconds() / 60
         timestamped_log(f"Training completed in {total_time:.1f} minutes.")
@@ -556,6 +658,8 @@ def train_daily_model(move_classifiers: List[str] = [LIGHTGBM], direction_classi
     except Exception as e:
         timestamped_log(f"[ERROR] Exception during daily model training: {e}")
     finally:
+        if dataset is not None:
+            dataset.close()
         session.close()
 
 if __name__ == "__main__":
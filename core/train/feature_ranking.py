@@ -0,0 +1,75 @@
+# core/train/feature_ranking.py
+
+import os
+import json
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from core.config import FEATURE_RANKING_DIR, FEATURE_RANKING_REFRESH_DAYS, FEATURE_RANKING_DRIFT_TOLERANCE
+
+def get_ranking_path(symbol: str, target: str) -> str:
+    return os.path.join(FEATURE_RANKING_DIR, f"{symbol}_{target}.json")
+
+def load_ranking(symbol: str, target: str) -> Optional[Dict[str, Any]]:
+    """Cached ranking for a symbol and target ("move" or "direction"), or None."""
+    path = get_ranking_path(symbol, target)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_ranking(symbol: str, target: str, importances: pd.Series, source: str, candidates: List[str], y: pd.Series):
+    """Store a full ranking (most important first) with the context used to detect drift."""
+    ranked = importances.sort_values(ascending=False)
+    entry = {
+        "ranking": ranked.index.tolist(),
+        "importances": {k: float(v) for k, v in ranked.items()},
+        "source": source,
+        "candidates": sorted(candidates),
+        "positive_rate": float(y.mean()) if len(y) else None,
+        "rows": int(len(y)),
+        "computed_date": datetime.now().strftime("%Y-%m-%d"),
+    }
+    with open(get_ranking_path(symbol, target), "w") as f:
+        json.dump(entry, f)
+
+def stale_reason(entry: Optional[Dict[str, Any]], candidates: List[str], y: pd.Series, today=None) -> Optional[str]:
+    """Why a cached ranking must be recomputed, or None when it is still usable.
+
+    Rankings expire after FEATURE_RANKING_REFRESH_DAYS, when the candidate features
+    change, or when the target's positive rate drifts beyond the tolerance.
+    """
+    if entry is None:
+        return "no cached ranking"
+    if sorted(candidates) != entry.get("candidates"):
+        return "candidate features changed"
+
+    today = today or datetime.now().date()
+    try:
+        age = (today - datetime.strptime(entry["computed_date"], "%Y-%m-%d").date()).days
+    except (KeyError, TypeError, ValueError):
+        return "unknown ranking date"
+    if age >= FEATURE_RANKING_REFRESH_DAYS:
+        return "refresh due"
+
+    cached_rate = entry.get("positive_rate")
+    if cached_rate is not None and len(y) and abs(float(y.mean()) - cached_rate) > FEATURE_RANKING_DRIFT_TOLERANCE:
+        return "target drift"
+    return None
+
+def gain_importances(model_data: Optional[Dict[str, Any]]) -> Optional[pd.Series]:
+    """Gain importances of a previous LightGBM artifact, indexed by every feature its booster was fitted on."""
+    if not model_data:
+        return None
+    booster = getattr(model_data.get("model"), "booster_", None)
+    if booster is None:
+        return None
+    return pd.Series(booster.feature_importance(importance_type="gain"), index=booster.feature_name())
+
+def merge_gain_ranking(gains: pd.Series, fallback: List[str]) -> List[str]:
+    """Features with positive gain ordered by gain, followed by the rest of `fallback` in its order."""
+    ranked = gains[gains > 0].sort_values(ascending=False).index.tolist()
+    return ranked + [f for f in fallback if f not in ranked]
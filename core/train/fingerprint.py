@@ -0,0 +1,64 @@
+# core/train/fingerprint.py
+
+import os
+import json
+import hashlib
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, Optional
+from db.models.feature_data import FeatureData
+
+# Trailing rows hashed into the fingerprint; older history is covered by the row count
+FINGERPRINT_WINDOW_ROWS = 60
+
+def classifier_signature(model) -> Dict[str, Any]:
+    """JSON-safe subset of a classifier's parameters."""
+    params = model.get_params() if hasattr(model, "get_params") else {}
+    return {k: v for k, v in sorted(params.items()) if isinstance(v, (int, float, str, bool)) or v is None}
+
+def compute_fingerprint(features_df: pd.DataFrame, closes_df: pd.DataFrame, target: Dict[str, Any], classifiers: Dict[str, Any]) -> Dict[str, Any]:
+    """Cheap fingerprint of a symbol's training inputs.
+
+    Combines the number of feature rows with a close, the last date, a hash of the
+    trailing window of features and closes, the target definition and classifier params.
+    """
+    feature_cols = ["week_day"] + FeatureData.get_feature_columns()
+    features = features_df[["date"] + [c for c in feature_cols if c in features_df.columns]].copy()
+    features["date"] = pd.to_datetime(features["date"])
+    closes = closes_df[["date", "close"]].copy()
+    closes["date"] = pd.to_datetime(closes["date"])
+
+    # Normalize dtypes so the database and shared-memory load paths hash identically
+    merged = features.merge(closes, on="date", how="inner").sort_values("date")
+    values = merged.drop(columns=["date"]).astype("float64")
+    tail = pd.concat([merged[["date"]], values], axis=1).tail(FINGERPRINT_WINDOW_ROWS)
+    window_hash = hashlib.sha256(pd.util.hash_pandas_object(tail, index=False).values.tobytes()).hexdigest()
+
+    components = {
+        "rows": int(len(merged)),
+        "last_date": merged["date"].max().strftime("%Y-%m-%d") if len(merged) else None,
+        "window_hash": window_hash,
+        "target": target,
+        "classifiers": classifiers,
+    }
+    digest = hashlib.sha256(json.dumps(components, sort_keys=True, default=str).encode()).hexdigest()
+    return {"fingerprint": digest, "components": components}
+
+def fingerprint_path(model_path: str) -> str:
+    """Sidecar file stored next to a model artifact."""
+    return os.path.splitext(model_path)[0] + ".fingerprint"
+
+def read_fingerprint(model_path: str) -> Optional[str]:
+    """Fingerprint the artifact at `model_path` was trained on, or None when unknown."""
+    if not os.path.exists(model_path):
+        return None
+    try:
+        with open(fingerprint_path(model_path), "r") as f:
+            return json.load(f).get("fingerprint")
+    except (OSError, ValueError):
+        return None
+
+def write_fingerprint(model_path: str, fingerprint: Dict[str, Any]):
+    """Write the sidecar after the artifact itself has been saved."""
+    with open(fingerprint_path(model_path), "w") as f:
+        json.dump({**fingerprint, "written_at": datetime.now().isoformat(timespec="seconds")}, f, default=str)
@@ -0,0 +1,69 @@
+# core/train/labeling.py
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Tuple
+
+def forward_window_extremes(closes: np.ndarray, min_days: int = 1, max_days: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """Forward rolling max/min of closes over the [t + min_days, t + max_days] horizon.
+
+    `closes` is a (symbols x bars) array, left-aligned and NaN padded. Windows running past
+    the end of a row use the bars that exist; rows with no future bar get NaN.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if closes.ndim == 1:
+        closes = closes[np.newaxis, :]
+    if min_days < 0 or max_days < min_days:
+        raise ValueError(f"Invalid horizon: min_days={min_days}, max_days={max_days}")
+
+    n_rows, n_cols = closes.shape
+    window = max_days - min_days + 1
+
+    # Pad the right edge so every bar has a full (possibly NaN) window, then slide over it
+    padded = np.concatenate([closes, np.full((n_rows, max_days), np.nan)], axis=1)[:, min_days:]
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)[:, :n_cols]
+
+    # fmax/fmin ignore NaN and return NaN only for an all-NaN window
+    return np.fmax.reduce(windows, axis=-1), np.fmin.reduce(windows, axis=-1)
+
+def compute_forward_moves(df: pd.DataFrame, min_days: int = 1, max_days: int = 5) -> pd.DataFrame:
+    """Add future max/min closes and percentage moves for every symbol in one pass.
+
+    Rows must be in date order within each symbol; symbols may be interleaved.
+    """
+    if df.empty:
+        for col in ("max_close_future", "min_close_future", "percent_up_move", "percent_down_move"):
+            df[col] = pd.Series(dtype=float)
+        return df
+
+    codes, _ = pd.factorize(df["trading_symbol"])
+    positions = df.groupby(codes).cumcount().to_numpy()
+    closes = np.full((codes.max() + 1, positions.max() + 1), np.nan)
+    closes[codes, positions] = df["close"].to_numpy(dtype=np.float64)
+
+    max_future, min_future = forward_window_extremes(closes, min_days, max_days)
+    df["max_close_future"] = max_future[codes, positions]
+    df["min_close_future"] = min_future[codes, positions]
+
+    # Calculate percentage moves, handling zeros and NaNs
+    close_nonzero = df["close"].replace(0, np.nan)
+    df["percent_up_move"] = ((df["max_close_future"] - df["close"]) / close_nonzero) * 100
+    df["percent_down_move"] = ((df["min_close_future"] - df["close"]) / close_nonzero) * 100
+    return df
+
+def label_thresholds(df: pd.DataFrame, thresholds: Iterable[float]) -> Dict[float, pd.Series]:
+    """Strong-move labels for several thresholds from already computed percentage moves."""
+    up = df["percent_up_move"].to_numpy()
+    down = np.abs(df["percent_down_move"].to_numpy())
+    with np.errstate(invalid="ignore"):
+        return {float(t): pd.Series(((up >= t) | (down >= t)).astype(int), index=df.index) for t in thresholds}
+
+def direction_labels(df: pd.DataFrame) -> pd.Series:
+    """1 when the upside excursion beats the downside one."""
+    return (df["percent_up_move"] > df["percent_down_move"].abs()).astype(int)
+
+def build_labels(df: pd.DataFrame, thresholds: Iterable[float], min_days: int = 1, max_days: int = 5) -> Tuple[pd.DataFrame, Dict[float, pd.Series]]:
+    """Compute forward moves once and strong-move labels for every threshold."""
+    df = compute_forward_moves(df, min_days, max_days)
+    df["direction_target"] = direction_labels(df)
+    return df, label_thresholds(df, thresholds)
@@ -0,0 +1,137 @@
+# core/train/panel_trainer.py
+
+import os
+import gc
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from typing import Dict, Tuple
+from db.models.feature_data import FeatureData
+from core.train.training_data import SharedTrainingDataset, get_training_dataset
+from core.train.daily_trainer import prepare_training_data, evaluate_model, train_with_balanced_sampling, timestamped_log
+from core.predict.model_registry import dump_artifact
+from core.config import DAILY_MODELS_DIR, DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, RANDOM_SEED, LIGHTGBM_N_ESTIMATORS, LIGHTGBM_LEARNING_RATE, LIGHTGBM_MAX_DEPTH, LIGHTGBM_NUM_LEAVES, LIGHTGBM_MIN_CHILD_WEIGHT
+
+# Per-symbol context columns appended to the stored features
+SYMBOL_CODE_COLUMN = "symbol_code"
+CONTEXT_COLUMNS = ["symbol_volatility", "symbol_move_rate", "symbol_history"]
+
+# Only columns the predictor can read from the latest features row (fo_eligible as float)
+BASE_FEATURES = ["week_day"] + [c for c in FeatureData.get_feature_columns() if c != "fo_eligible"] + ["fo_eligible"]
+
+def get_panel_model_path(model_type: str) -> str:
+    """Path of the cross-sectional model artifact for a model type ("move" or "direction")."""
+    return os.path.join(DAILY_MODELS_DIR, f"panel_{model_type}.pkl")
+
+def get_panel_classifier(n_jobs: int = -1):
+    """Multi-threaded LightGBM classifier for the stacked panel."""
+    from lightgbm import LGBMClassifier
+    return LGBMClassifier(n_estimators=LIGHTGBM_N_ESTIMATORS, learning_rate=LIGHTGBM_LEARNING_RATE, max_depth=LIGHTGBM_MAX_DEPTH, num_leaves=LIGHTGBM_NUM_LEAVES, min_child_weight=LIGHTGBM_MIN_CHILD_WEIGHT, subsample=0.8, subsample_freq=1, colsample_bytree=0.8, random_state=RANDOM_SEED, verbosity=-1, n_jobs=n_jobs)
+
+def symbol_context(df: pd.DataFrame, train_mask: pd.Series) -> pd.DataFrame:
+    """Per-symbol context computed on training rows only: volatility level, strong-move base rate, history length."""
+    train = df[train_mask]
+    context = train.groupby("trading_symbol").agg(
+        symbol_volatility=("atr_14_normalized", "mean"),
+        symbol_move_rate=("strong_move_target", "mean"),
+        symbol_history=("date", "size"),
+    )
+    return context.astype(float)
+
+def add_panel_columns(df: pd.DataFrame, symbol_index: Dict[str, int], context: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+    """Attach the categorical symbol code and context features; unknown symbols get NaN."""
+    codes = df["trading_symbol"].map(symbol_index)
+    df[SYMBOL_CODE_COLUMN] = pd.Categorical(codes, categories=range(len(symbol_index)))
+    context_df = pd.DataFrame.from_dict(context, orient="index")
+    for col in CONTEXT_COLUMNS:
+        df[col] = df["trading_symbol"].map(context_df[col]) if col in context_df.columns else np.nan
+    return df
+
+def load_panel_frames() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Stacked features and closes for all active symbols, reusing an attached dataset when present."""
+    dataset = get_training_dataset()
+    if dataset is not None:
+        return dataset.stacked_frames()
+
+    dataset = SharedTrainingDataset.load()
+    try:
+        features_df, closes_df = dataset.stacked_frames()
+        # Frames reference the shared buffers; copy before they are released
+        return features_df.copy(), closes_df.copy()
+    finally:
+        dataset.close()
+
+def fit_panel_model(X: pd.DataFrame, y: pd.Series, dates: pd.Series, train_fraction: float = 0.8) -> Tuple[object, Dict, int]:
+    """Fit on the earliest `train_fraction` of dates and evaluate on the rest (no look-ahead across symbols)."""
+    cutoff = dates.quantile(train_fraction)
+    train_mask = (dates <= cutoff).to_numpy()
+    model = get_panel_classifier()
+    train_with_balanced_sampling(X[train_mask], y[train_mask], model)
+    metrics = evaluate_model(model, X[~train_mask], y[~train_mask]) if (~train_mask).any() else {}
+    return model, metrics, int(y[train_mask].sum())
+
+def train_panel_model(threshold_percent: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, min_days: int = 1, max_days: int = 5, train_fraction: float = 0.8) -> Dict:
+    """Train one move and one direction model over all symbols' stacked features."""
+    start_time = datetime.now()
+    results = {"status": "failed", "move_metrics": {}, "direction_metrics": {}, "duration": 0, "error": None}
+
+    try:
+        timestamped_log("⏳ Loading stacked training data for panel model...")
+        features_df, closes_df = load_panel_frames()
+        df, _ = prepare_training_data(features_df, closes_df, threshold_percent, min_days, max_days)
+        del features_df, closes_df
+        if df.empty:
+            results["error"] = "No training data"
+            return results
+
+        # Only columns the predictor can read from the latest features row, plus symbol context
+        base_features = list(BASE_FEATURES)
+        df["fo_eligible"] = df["fo_eligible"].astype(float)
+
+        symbols = sorted(df["trading_symbol"].unique())
+        symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        train_mask = df["date"] <= df["date"].quantile(train_fraction)
+        context = symbol_context(df, train_mask).to_dict(orient="index")
+        df = add_panel_columns(df, symbol_index, context)
+        feature_cols = base_features + [SYMBOL_CODE_COLUMN] + CONTEXT_COLUMNS
+
+        for col in base_features + CONTEXT_COLUMNS:
+            df[col] = df[col].replace([np.inf, -np.inf], np.nan)
+
+        timestamped_log(f"🧮 Panel: {len(symbols)} symbols, {len(df)} samples, {len(feature_cols)} features, positives: {int(df['strong_move_target'].sum())}")
+        artifact = {"panel": True, "selected_features": feature_cols, "symbol_index": symbol_index, "symbol_context": context, "categorical_features": [SYMBOL_CODE_COLUMN], "training_date": datetime.now().strftime("%Y-%m-%d"), "threshold": threshold_percent}
+
+        # --------------- Move Model ---------------
+        train_start = datetime.now()
+        move_model, metrics, positives = fit_panel_model(df[feature_cols], df["strong_move_target"], df["date"], train_fraction)
+        results["move_metrics"] = metrics
+        timestamped_log(f"✅ Panel Move Model trained in {(datetime.now() - train_start).total_seconds():.1f}s: " + ", ".join(f"{k}={v:.3f}" for k, v in metrics.items()))
+        dump_artifact({**artifact, "model": move_model, "metrics": metrics, "positive_samples": positives, "total_samples": int(train_mask.sum())}, get_panel_model_path("move"))
+
+        # --------------- Direction Model ---------------
+        df_dir = df[df["strong_move_target"] == 1]
+        if len(df_dir) < 10:
+            timestamped_log("⚠️ Not enough direction data for panel model. Skipping direction model.")
+            results["status"] = "partial_success"
+            return results
+
+        train_start = datetime.now()
+        direction_model, dir_metrics, dir_positives = fit_panel_model(df_dir[feature_cols], df_dir["direction_target"], df_dir["date"], train_fraction)
+        results["direction_metrics"] = dir_metrics
+        timestamped_log(f"✅ Panel Direction Model trained in {(datetime.now() - train_start).total_seconds():.1f}s: " + ", ".join(f"{k}={v:.3f}" for k, v in dir_metrics.items()))
+        dump_artifact({**artifact, "model": direction_model, "metrics": dir_metrics, "positive_samples": dir_positives, "total_samples": int((df_dir["date"] <= df_dir["date"].quantile(train_fraction)).sum())}, get_panel_model_path("direction"))
+
+        results["status"] = "success"
+        return results
+
+    except Exception as e:
+        timestamped_log(f"[ERROR] Exception during panel model training: {e}")
+        results["error"] = str(e)
+        return results
+    finally:
+        results["duration"] = (datetime.now() - start_time).total_seconds()
+        timestamped_log(f"⌛ Panel training finished in {results['duration'] / 60:.1f} minutes ({results['status']})")
+        gc.collect()
+
+if __name__ == "__main__":
+    train_panel_model(min_days=1, max_days=5)
@@ -0,0 +1,58 @@
+# core/train/preprocessing.py
+
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+class FeaturePreprocessor:
+    """Fitted cleaning step shared by training and inference.
+
+    `fit` learns column means (for NaN/inf filling) and 1%/99% clip bounds computed on the
+    filled data; `transform` applies both to all columns in single array operations. The
+    fitted object is saved in the model dict so inference cleans rows exactly like training.
+    """
+
+    def __init__(self, lower_quantile: float = 0.01, upper_quantile: float = 0.99, min_rows: int = 10):
+        self.lower_quantile = lower_quantile
+        self.upper_quantile = upper_quantile
+        self.min_rows = min_rows
+        self.columns: Optional[List[str]] = None
+        self.means: Optional[np.ndarray] = None
+        self.lower: Optional[np.ndarray] = None
+        self.upper: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _as_array(X: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        values = X.reindex(columns=columns).to_numpy(dtype=np.float64, na_value=np.nan)
+        values[~np.isfinite(values)] = np.nan
+        return values
+
+    def fit(self, X: pd.DataFrame) -> "FeaturePreprocessor":
+        self.columns = X.select_dtypes(include=['number']).columns.tolist()
+        values = self._as_array(X, self.columns)
+
+        with np.errstate(invalid="ignore"):
+            counts = (~np.isnan(values)).sum(axis=0)
+            means = np.where(counts > 0, np.nansum(values, axis=0) / np.maximum(counts, 1), 0.0)
+        self.means = means
+        filled = np.where(np.isnan(values), means, values)
+
+        # Clip bounds only when there is enough data; otherwise leave columns unclipped
+        if len(filled) > self.min_rows:
+            self.lower, self.upper = np.quantile(filled, [self.lower_quantile, self.upper_quantile], axis=0)
+        else:
+            self.lower = np.full(len(self.columns), -np.inf)
+            self.upper = np.full(len(self.columns), np.inf)
+        return self
+
+    def transform_array(self, X: pd.DataFrame) -> np.ndarray:
+        """Cleaned values as a float64 array in `self.columns` order; missing columns use the means."""
+        values = self._as_array(X, self.columns)
+        values = np.where(np.isnan(values), self.means, values)
+        return np.clip(values, self.lower, self.upper)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(self.transform_array(X), columns=self.columns, index=X.index)
+
+    def fit_transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(X).transform(X)
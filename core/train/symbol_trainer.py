@@ -1,6 +1,5 @@
 # core/train/symbol_trainer.py
 
-import joblib
 import pandas as pd
 from typing import List
 from datetime import datetime
@@ -13,6 +12,7 @@ from sklearn.metrics import classification_report
 from sklearn.ensemble import VotingClassifier
 from core.config import DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, RANDOM_SEED
 from core.train.model_selector import get_classifier, get_model_path
+from core.predict.model_registry import dump_artifact
 
 def timestamped_log(msg): print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
 
@@ -58,7 +58,7 @@ def train_symbol_model(symbol: str, move_classifiers: List[str], direction_class
         move_model = move_models[0][1] if len(move_models) == 1 else VotingClassifier(estimators=move_models, voting="soft")
         move_model.fit(X_train, y_train)
         timestamped_log(f"✅ Move Model for {symbol}\n" + classification_report(y_test, move_model.predict(X_test)))
-        joblib.dump(move_model, get_model_path(symbol, "move"))
+        dump_artifact(move_model, get_model_path(symbol, "move"))
 
         df_dir = df[df["strong_move_target"] == 1]
         if len(df_dir) < 10:
@@ -74,7 +74,7 @@ def train_symbol_model(symbol: str, move_classifiers: List[str], direction_class
         dir_model = dir_models[0][1] if len(dir_models) == 1 else VotingClassifier(estimators=dir_models, voting="soft")
         dir_model.fit(Xd_train, yd_train)
         timestamped_log(f"✅ Direction Model for {symbol}\n" + classification_report(yd_test, dir_model.predict(Xd_test)))
-        joblib.dump(dir_model, get_model_path(symbol, "direction"))
+        dump_artifact(dir_model, get_model_path(symbol, "direction"))
 
     except Exception as e:
         timestamped_log(f"[ERROR] {symbol} training failed: {e}")
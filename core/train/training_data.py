@@ -0,0 +1,177 @@
+# core/train/training_data.py
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from db.database import SessionLocal
+from db.models.feature_data import FeatureData
+
+# Numeric columns held in the shared buffer, in storage order
+DATASET_COLUMNS = ["week_day"] + FeatureData.get_feature_columns() + ["close"]
+
+# Columns restored to bool when frames are rebuilt (kept out of models by select_dtypes)
+BOOL_COLUMNS = ["fo_eligible"]
+
+LOAD_CHUNK_ROWS = 250_000
+
+def _dataset_query(columns: List[str]):
+    feature_cols = ", ".join(f"f.{c}" for c in columns if c != "close")
+    return text(f"""
+        SELECT f.trading_symbol, f.exchange, f.date, {feature_cols}, e.close
+        FROM features_data f
+        JOIN eod_data e ON e.trading_symbol = f.trading_symbol AND e.exchange = f.exchange AND e.date = f.date
+        JOIN symbols s ON s.trading_symbol = f.trading_symbol AND s.active = TRUE
+        ORDER BY f.trading_symbol, f.date
+    """)
+
+COUNT_QUERY = text("""
+    SELECT COUNT(*)
+    FROM features_data f
+    JOIN eod_data e ON e.trading_symbol = f.trading_symbol AND e.exchange = f.exchange AND e.date = f.date
+    JOIN symbols s ON s.trading_symbol = f.trading_symbol AND s.active = TRUE
+""")
+
+class SharedTrainingDataset:
+    """Columnar features + closes for all active symbols, held in shared memory.
+
+    The parent process loads the data once with `load()` and passes `handle()` to workers,
+    which `attach()` to the same buffers without copying or pickling the rows.
+    """
+
+    def __init__(self, values_shm, dates_shm, shape: Tuple[int, int], columns: List[str], index: Dict[str, Tuple[int, int, str]], owner: bool):
+        self._values_shm = values_shm
+        self._dates_shm = dates_shm
+        self.columns = list(columns)
+        self.index = index
+        self.owner = owner
+        self.values = np.ndarray(shape, dtype=np.float64, buffer=values_shm.buf)
+        self.dates = np.ndarray((shape[0],), dtype=np.int64, buffer=dates_shm.buf)
+
+    @classmethod
+    def load(cls, columns: List[str] = DATASET_COLUMNS, chunk_rows: int = LOAD_CHUNK_ROWS) -> "SharedTrainingDataset":
+        """Bulk-load features joined with closes for every active symbol into shared memory.
+
+        The row count that sizes the buffers and the streamed rows come from one REPEATABLE READ
+        snapshot, so rows written meanwhile cannot be cut off or split a symbol's span.
+        """
+        session = SessionLocal()
+        try:
+            connection = session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            n_rows = connection.execute(COUNT_QUERY).scalar() or 0
+            shape = (n_rows, len(columns))
+            values_shm = shared_memory.SharedMemory(create=True, size=max(n_rows * len(columns) * 8, 1))
+            dates_shm = shared_memory.SharedMemory(create=True, size=max(n_rows * 8, 1))
+            dataset = cls(values_shm, dates_shm, shape, columns, {}, owner=True)
+
+            # Stream the symbol-ordered rows straight into the shared buffers
+            offset, spans = 0, []
+            for chunk in pd.read_sql(_dataset_query(columns), connection, chunksize=chunk_rows):
+                stop = offset + len(chunk)
+                if stop > n_rows:
+                    dataset.close()
+                    raise RuntimeError(f"Training dataset changed while loading: streamed more than the {n_rows} counted rows")
+                dataset.values[offset:stop] = chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+                dataset.dates[offset:stop] = pd.to_datetime(chunk["date"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+                sizes = chunk.groupby("trading_symbol", sort=False).agg(rows=("date", "size"), exchange=("exchange", "first"))
+                for symbol, row in sizes.iterrows():
+                    if spans and spans[-1][0] == symbol:
+                        spans[-1][2] += int(row["rows"])
+                    else:
+                        spans.append([symbol, offset, int(row["rows"]), row["exchange"]])
+                    offset += int(row["rows"])
+
+            if offset != n_rows:
+                dataset.close()
+                raise RuntimeError(f"Training dataset changed while loading: streamed {offset} of {n_rows} counted rows")
+            dataset.index = {symbol: (start, start + size, exchange) for symbol, start, size, exchange in spans}
+            return dataset
+        finally:
+            session.close()
+
+    @classmethod
+    def attach(cls, handle: Dict) -> "SharedTrainingDataset":
+        """Attach to buffers created by another process (zero-copy)."""
+        values_shm = shared_memory.SharedMemory(name=handle["values_name"])
+        dates_shm = shared_memory.SharedMemory(name=handle["dates_name"])
+        return cls(values_shm, dates_shm, tuple(handle["shape"]), handle["columns"], handle["index"], owner=False)
+
+    def handle(self) -> Dict:
+        """Small picklable description of the shared buffers."""
+        return {
+            "values_name": self._values_shm.name,
+            "dates_name": self._dates_shm.name,
+            "shape": self.values.shape,
+            "columns": self.columns,
+            "index": self.index,
+        }
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def row_counts(self) -> Dict[str, int]:
+        return {symbol: stop - start for symbol, (start, stop, _) in self.index.items()}
+
+    def symbol_frames(self, symbol: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Rebuild the (features_df, closes_df) pair `load_symbol_data` returns for a symbol."""
+        start, stop, exchange = self.index[symbol]
+        return self._frames(slice(start, stop), symbol, exchange)
+
+    def stacked_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(features_df, closes_df) for every symbol stacked in symbol/date order."""
+        spans = sorted(self.index.items(), key=lambda item: item[1][0])
+        sizes = [stop - start for _, (start, stop, _) in spans]
+        symbols = np.repeat([symbol for symbol, _ in spans], sizes)
+        exchanges = np.repeat([exchange for _, (_, _, exchange) in spans], sizes)
+        return self._frames(slice(0, int(sum(sizes))), symbols, exchanges)
+
+    def _frames(self, rows: slice, symbols, exchanges) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        block = pd.DataFrame(self.values[rows], columns=self.columns)
+        dates = pd.to_datetime(self.dates[rows].view("datetime64[ns]"))
+        keys = pd.DataFrame({"trading_symbol": symbols, "exchange": exchanges, "date": dates})
+
+        features_df = pd.concat([keys, block.drop(columns=["close"])], axis=1)
+        for col in BOOL_COLUMNS:
+            if col in features_df.columns:
+                features_df[col] = features_df[col].fillna(0).astype(bool)
+        closes_df = pd.concat([keys, block[["close"]]], axis=1)
+        return features_df, closes_df
+
+    def close(self):
+        """Detach from the buffers; the owning process also frees them."""
+        self.values = None
+        self.dates = None
+        self._values_shm.close()
+        self._dates_shm.close()
+        if self.owner:
+            self._values_shm.unlink()
+            self._dates_shm.unlink()
+
+# Dataset attached in this process (set in pool workers by the initializer)
+_attached_dataset: Optional[SharedTrainingDataset] = None
+
+def attach_training_dataset(handle: Optional[Dict]):
+    """Process-pool initializer: attach the shared training dataset once per worker."""
+    global _attached_dataset
+    if handle is not None:
+        _attached_dataset = SharedTrainingDataset.attach(handle)
+
+def set_training_dataset(dataset: Optional[SharedTrainingDataset]):
+    """Use an already loaded dataset in the current process."""
+    global _attached_dataset
+    _attached_dataset = dataset
+
+def get_training_dataset() -> Optional[SharedTrainingDataset]:
+    return _attached_dataset
+
+def load_shared_training_dataset() -> SharedTrainingDataset:
+    """Load the dataset once for a pipeline run, logging size and duration."""
+    start = datetime.now()
+    dataset = SharedTrainingDataset.load()
+    size_mb = dataset.values.nbytes / (1024 * 1024)
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Loaded shared training dataset: {dataset.values.shape[0]} rows, {len(dataset.index)} symbols, {size_mb:.1f} MB in {elapsed:.1f}s")
+    return dataset
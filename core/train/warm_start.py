@@ -0,0 +1,84 @@
+# core/train/warm_start.py
+
+import os
+import joblib
+import pandas as pd
+from datetime import datetime, date
+from typing import Any, Dict, Optional
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from core.config import LIGHTGBM, WARM_START_EXTRA_TREES, WARM_START_MAX_TREES, FULL_REFIT_INTERVAL_DAYS, WARM_START_DRIFT_TOLERANCE
+
+def load_previous_model(model_path: str) -> Optional[Dict[str, Any]]:
+    """Load an existing model artifact, or None when missing or unreadable."""
+    if not os.path.exists(model_path):
+        return None
+    try:
+        model_data = joblib.load(model_path)
+        return model_data if isinstance(model_data, dict) and "model" in model_data else None
+    except Exception:
+        return None
+
+def tree_count(model) -> int:
+    booster = getattr(model, "booster_", None)
+    return booster.num_trees() if booster is not None else 0
+
+def full_refit_reason(previous: Optional[Dict[str, Any]], classifier_name: str, X_recent: Optional[pd.DataFrame] = None, y_recent: Optional[pd.Series] = None, today: Optional[date] = None) -> Optional[str]:
+    """Return why a model must be refit from scratch, or None when it can be warm-started.
+
+    A full refit happens when there is no usable LightGBM artifact, on the refit schedule,
+    once the model reaches the tree cap, or when accuracy on the most recent rows has
+    drifted below the stored evaluation accuracy.
+    """
+    if previous is None:
+        return "no previous model"
+    if classifier_name != LIGHTGBM or getattr(previous["model"], "booster_", None) is None:
+        return "not a LightGBM model"
+    if not previous.get("selected_features"):
+        return "no stored feature list"
+
+    today = today or datetime.now().date()
+    lineage = previous.get("lineage") or {}
+    last_full = lineage.get("full_refit_date") or previous.get("training_date")
+    try:
+        if (today - datetime.strptime(last_full, "%Y-%m-%d").date()).days >= FULL_REFIT_INTERVAL_DAYS:
+            return "scheduled full refit"
+    except (TypeError, ValueError):
+        return "unknown last full refit"
+
+    if tree_count(previous["model"]) + WARM_START_EXTRA_TREES > WARM_START_MAX_TREES:
+        return "tree cap reached"
+
+    if X_recent is not None and y_recent is not None and len(y_recent) > 0:
+        if y_recent.nunique() < 2:
+            return "single-class recent window"
+        recent_accuracy = accuracy_score(y_recent, previous["model"].predict(X_recent))
+        stored_accuracy = (previous.get("metrics") or {}).get("accuracy")
+        if stored_accuracy is not None and recent_accuracy < stored_accuracy - WARM_START_DRIFT_TOLERANCE:
+            return f"drift (recent accuracy {recent_accuracy:.3f} vs {stored_accuracy:.3f})"
+    return None
+
+def warm_start_model(previous_model, extra_trees: int = WARM_START_EXTRA_TREES):
+    """Unfitted copy of a LightGBM model that adds `extra_trees` on top of the previous booster when fit."""
+    model = clone(previous_model)
+    model.set_params(n_estimators=extra_trees)
+    return model, {"init_model": previous_model.booster_}
+
+def build_lineage(previous: Optional[Dict[str, Any]], model, mode: str, reason: Optional[str], window_rows: int = 0) -> Dict[str, Any]:
+    """Lineage block stored with the model: how it was produced and since when it has been warm-started."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    prev_lineage = (previous or {}).get("lineage") or {}
+    if mode == "warm_start":
+        full_refit_date = prev_lineage.get("full_refit_date") or previous.get("training_date")
+        warm_starts = prev_lineage.get("warm_starts_since_refit", 0) + 1
+    else:
+        full_refit_date, warm_starts = today, 0
+    return {
+        "mode": mode,
+        "reason": reason,
+        "full_refit_date": full_refit_date,
+        "warm_starts_since_refit": warm_starts,
+        "parent_training_date": (previous or {}).get("training_date"),
+        "n_trees": tree_count(model),
+        "window_rows": window_rows,
+    }
@@ -9,6 +9,7 @@ from sqlalchemy import text
 from db.database import SessionLocal
 from core.validate.model_evaluator import identify_worst_performing_models, get_model_performance_metrics
 from core.train.daily_trainer import train_models_for_one_symbol
+from core.predict.model_registry import dump_artifact
 from core.config import LIGHTGBM, XGBOOST, DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, STRONG_MOVE_CONFIDENCE_THRESHOLD
 from typing import Dict, List, Optional, Any, Tuple
 
@@ -96,6 +97,7 @@ def analyze_optimal_parameters(symbol: str) -> Dict[str, Any]:
                 optimal_confidence = level
                 
         # Find optimal move threshold based on actual moves
+        # (verified prediction outcomes, not relabeled history; training labels come from build_labels)
         moves = df['actual_move_percent'].dropna().abs()
         if len(moves) >= 20:
             # Use percentiles to determine thresholds
@@ -177,7 +179,8 @@ def retrain_with_feedback(symbol: str, custom_threshold: Optional[float] = None)
             max_days=max_days
         )
         
-        success = result["status"] == "success" or result["status"] == "partial_success"
+        # "skipped" means the current models were already trained on identical inputs
+        success = result["status"] in ("success", "partial_success", "skipped")
         
         # Add training metrics to results
         params["training_result"] = {
@@ -256,7 +259,7 @@ def update_model_config(symbol: str, threshold_percent: float, min_days: int = 1
                 model_data["config_updated_date"] = datetime.now().strftime("%Y-%m-%d")
                 
                 # Save updated model
-                joblib.dump(model_data, move_path)
+                dump_artifact(model_data, move_path)
                 print(f"[INFO] Updated configuration for {symbol} move model")
             else:
                 print(f"[WARNING] Model for {symbol} uses old format, cannot update config")
@@ -273,7 +276,7 @@ def update_model_config(symbol: str, threshold_percent: float, min_days: int = 1
                 dir_model_data["config_updated_date"] = datetime.now().strftime("%Y-%m-%d")
                 
                 # Save updated model
-                joblib.dump(dir_model_data, direction_path)
+                dump_artifact(dir_model_data, direction_path)
                 
         return True
             
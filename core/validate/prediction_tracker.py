@@ -7,8 +7,9 @@ from sqlalchemy import text, func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from db.database import SessionLocal
+from db.bulk_writer import bulk_update
 from db.models.prediction_results import PredictionResult
-from db.models.eod_data import EODData
+from db.models.prediction_tracking import PredictionTracking
 from typing import Dict, List, Optional, Tuple
 from core.config import DEFAULT_DAILY_STRONG_MOVE_THRESHOLD
 
@@ -16,92 +17,235 @@ def get_db_session() -> Session:
     """Creates and returns a database session."""
     return SessionLocal()
 
-def update_prediction_results() -> Tuple[int, int]:
+# Verification horizon: calendar days of prices checked, and bars needed before a miss is final
+VERIFICATION_WINDOW_DAYS = 20
+MIN_BARS_TO_FINALIZE = 10
+
+# Price bars after every pending prediction, with its base close, in one range query
+PENDING_WINDOWS_QUERY = text("""
+    SELECT p.id, p.trading_symbol, p.date AS prediction_date, p.direction_prediction,
+           b.close AS base_close, e.date, e.high, e.low
+    FROM prediction_results p
+    JOIN eod_data b ON b.trading_symbol = p.trading_symbol AND b.date = p.date
+    JOIN eod_data e ON e.trading_symbol = p.trading_symbol
+                   AND e.date > p.date
+                   AND e.date <= p.date + CAST(:window_days AS integer)
+    WHERE p.verified = FALSE AND p.date < :cutoff
+    ORDER BY p.id, e.date
+""")
+
+PENDING_COUNT_QUERY = text("""
+    SELECT COUNT(*) FROM prediction_results WHERE verified = FALSE AND date < :cutoff
+""")
+
+# Start tracking unverified predictions that are not tracked yet
+SEED_TRACKING_QUERY = text("""
+    INSERT INTO prediction_tracking (prediction_id, trading_symbol, prediction_date, direction_prediction,
+                                     base_close, max_up_move, max_down_move, bars_observed, last_bar_date, is_open)
+    SELECT p.id, p.trading_symbol, p.date, p.direction_prediction, b.close, 0, 0, 0, p.date, TRUE
+    FROM prediction_results p
+    JOIN eod_data b ON b.trading_symbol = p.trading_symbol AND b.date = p.date
+    WHERE p.verified = FALSE AND p.date < :cutoff
+      AND b.close IS NOT NULL AND b.close <> 0
+      AND NOT EXISTS (SELECT 1 FROM prediction_tracking t WHERE t.prediction_id = p.id)
+    ON CONFLICT (prediction_id) DO NOTHING
+""")
+
+OPEN_TRACKING_QUERY = text("""
+    SELECT id, prediction_id, trading_symbol, prediction_date, direction_prediction, base_close,
+           max_up_move, max_down_move, max_up_date, max_down_date, up_hit_date, down_hit_date,
+           bars_observed, last_bar_date
+    FROM prediction_tracking
+    WHERE is_open = TRUE
+""")
+
+# Bars not yet folded into each open prediction, capped at the bars still to observe
+NEW_BARS_QUERY = text("""
+    SELECT id, date, high, low FROM (
+        SELECT t.id, e.date, e.high, e.low,
+               ROW_NUMBER() OVER (PARTITION BY t.id ORDER BY e.date) AS bar_number,
+               t.bars_observed
+        FROM prediction_tracking t
+        JOIN eod_data e ON e.trading_symbol = t.trading_symbol
+                       AND e.date > t.last_bar_date
+                       AND e.date <= t.prediction_date + CAST(:window_days AS integer)
+        WHERE t.is_open = TRUE
+    ) bars
+    WHERE bar_number <= CAST(:min_bars AS integer) - bars_observed
+    ORDER BY id, date
+""")
+
+TRACKING_STATE_COLUMNS = ["max_up_move", "max_down_move", "max_up_date", "max_down_date", "up_hit_date", "down_hit_date", "bars_observed", "last_bar_date", "is_open"]
+
+def evaluate_price_windows(windows: pd.DataFrame, threshold: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, min_bars: int = MIN_BARS_TO_FINALIZE) -> pd.DataFrame:
+    """Vectorized verification outcome for every prediction in `windows`.
+
+    `windows` has one row per (prediction id, bar after the prediction date) sorted by id and
+    date. Returns one row per prediction with max up/down moves, first days each side crossed
+    the threshold, the bar count and the resulting verification fields. `finalize` marks rows
+    that should be written: verified hits, or misses observed for at least `min_bars` bars.
+    """
+    windows = windows[windows["base_close"].notna() & (windows["base_close"] != 0)].copy()
+    windows["date"] = pd.to_datetime(windows["date"])
+    windows["prediction_date"] = pd.to_datetime(windows["prediction_date"])
+    windows["up_pct"] = (windows["high"] - windows["base_close"]) / windows["base_close"] * 100
+    windows["down_pct"] = (windows["low"] - windows["base_close"]) / windows["base_close"] * 100
+    windows["up_hit_date"] = windows["date"].where(windows["up_pct"] >= threshold)
+    windows["down_hit_date"] = windows["date"].where(windows["down_pct"] <= -threshold)
+
+    grouped = windows.groupby("id", sort=False)
+    result = grouped.agg(
+        trading_symbol=("trading_symbol", "first"),
+        prediction_date=("prediction_date", "first"),
+        direction_prediction=("direction_prediction", "first"),
+        max_up_move=("up_pct", "max"),
+        max_down_move=("down_pct", "min"),
+        up_hit_date=("up_hit_date", "min"),
+        down_hit_date=("down_hit_date", "min"),
+        bars=("date", "size"),
+    )
+    # Moves are measured against zero, as when scanning from an unmoved start
+    result["max_up_move"] = result["max_up_move"].clip(lower=0)
+    result["max_down_move"] = result["max_down_move"].clip(upper=0)
+    return verification_outcome(result, min_bars).reset_index()
+
+def verification_outcome(result: pd.DataFrame, min_bars: int = MIN_BARS_TO_FINALIZE) -> pd.DataFrame:
+    """Add verification fields to per-prediction running state.
+
+    `result` needs direction_prediction, prediction_date, max_up_move, max_down_move,
+    up_hit_date, down_hit_date and bars. Adds verified, verification_date, actual_direction,
+    actual_move_percent, days_to_fulfill and `finalize`.
+    """
+    up_hit = result["up_hit_date"].notna()
+    down_hit = result["down_hit_date"].notna()
+    called_up = (result["direction_prediction"] == "UP") & up_hit
+    called_down = (result["direction_prediction"] == "DOWN") & down_hit & ~called_up
+    wrong_way = ~called_up & ~called_down & (up_hit | down_hit)
+    up_larger = result["max_up_move"] > result["max_down_move"].abs()
+
+    result["verified"] = called_up | called_down
+    verification_date = result["up_hit_date"].where(called_up, result["down_hit_date"].where(called_down))
+    result["verification_date"] = verification_date.dt.date.where(verification_date.notna(), None)
+    result["actual_direction"] = np.select([called_up, called_down, wrong_way & up_larger, wrong_way], ["UP", "DOWN", "UP", "DOWN"], default=None)
+    result["actual_move_percent"] = np.select([called_up, called_down, wrong_way & up_larger, wrong_way], [result["max_up_move"], result["max_down_move"], result["max_up_move"], result["max_down_move"]], default=np.nan)
+    result["days_to_fulfill"] = (verification_date - result["prediction_date"]).dt.days.astype("Int64")
+    result["finalize"] = result["verified"] | (result["bars"] >= min_bars)
+    return result
+
+def advance_tracking_state(state: pd.DataFrame, bars: pd.DataFrame, threshold: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD) -> pd.DataFrame:
+    """Fold new bars into open tracking rows with grouped vectorized operations.
+
+    `state` has one row per open prediction (OPEN_TRACKING_QUERY columns); `bars` has one
+    row per (tracking id, new bar). Max moves only grow, first-hit dates are kept once set,
+    and `changed` marks rows that received bars.
+    """
+    state = state.set_index("id")
+    for col in ["prediction_date", "max_up_date", "max_down_date", "up_hit_date", "down_hit_date", "last_bar_date"]:
+        state[col] = pd.to_datetime(state[col])
+    state["changed"] = False
+    if bars.empty:
+        return state.reset_index()
+
+    bars = bars.join(state["base_close"], on="id")
+    bars["date"] = pd.to_datetime(bars["date"])
+    bars["up_pct"] = (bars["high"] - bars["base_close"]) / bars["base_close"] * 100
+    bars["down_pct"] = (bars["low"] - bars["base_close"]) / bars["base_close"] * 100
+    grouped = bars.groupby("id", sort=False)
+    bars["up_peak_date"] = bars["date"].where(bars["up_pct"] == grouped["up_pct"].transform("max"))
+    bars["down_peak_date"] = bars["date"].where(bars["down_pct"] == grouped["down_pct"].transform("min"))
+    bars["up_hit_date"] = bars["date"].where(bars["up_pct"] >= threshold)
+    bars["down_hit_date"] = bars["date"].where(bars["down_pct"] <= -threshold)
+
+    new = bars.groupby("id", sort=False).agg(
+        new_up=("up_pct", "max"),
+        new_down=("down_pct", "min"),
+        new_up_date=("up_peak_date", "min"),
+        new_down_date=("down_peak_date", "min"),
+        new_up_hit=("up_hit_date", "min"),
+        new_down_hit=("down_hit_date", "min"),
+        new_bars=("date", "size"),
+        new_last=("date", "max"),
+    )
+    state = state.join(new)
+
+    # Strictly larger moves replace the running extremes (NaN compares False)
+    up_better = state["new_up"] > state["max_up_move"]
+    down_better = state["new_down"] < state["max_down_move"]
+    state["max_up_move"] = state["new_up"].where(up_better, state["max_up_move"])
+    state["max_up_date"] = state["new_up_date"].where(up_better, state["max_up_date"])
+    state["max_down_move"] = state["new_down"].where(down_better, state["max_down_move"])
+    state["max_down_date"] = state["new_down_date"].where(down_better, state["max_down_date"])
+
+    # Earlier hits always win, so existing first-hit dates are kept
+    state["up_hit_date"] = state["up_hit_date"].fillna(state["new_up_hit"])
+    state["down_hit_date"] = state["down_hit_date"].fillna(state["new_down_hit"])
+
+    state["changed"] = state["new_bars"].notna()
+    state["bars_observed"] = state["bars_observed"] + state["new_bars"].fillna(0).astype(int)
+    state["last_bar_date"] = state["new_last"].where(state["changed"], state["last_bar_date"])
+    return state.drop(columns=new.columns).reset_index()
+
+def advance_prediction_tracking(session: Session, cutoff, threshold: float = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD) -> Tuple[int, int]:
+    """Advance every open prediction by the bars that arrived since the last run.
+
+    New unverified predictions are seeded into `prediction_tracking`, only bars after each
+    row's `last_bar_date` are read, and predictions are finalized on a threshold hit in the
+    predicted direction or after MIN_BARS_TO_FINALIZE bars. Rows whose window has passed
+    without enough bars are closed without writing an outcome. The caller owns the
+    transaction. Returns (verified, open predictions processed).
+    """
+    PredictionTracking.__table__.create(bind=session.connection(), checkfirst=True)
+    session.execute(SEED_TRACKING_QUERY, {"cutoff": cutoff})
+
+    state = pd.read_sql(OPEN_TRACKING_QUERY, session.connection())
+    if state.empty:
+        return 0, 0
+    bars = pd.read_sql(NEW_BARS_QUERY, session.connection(), params={"window_days": VERIFICATION_WINDOW_DAYS, "min_bars": MIN_BARS_TO_FINALIZE})
+
+    state = advance_tracking_state(state, bars, threshold)
+    state = verification_outcome(state.assign(bars=state["bars_observed"]))
+    window_passed = state["prediction_date"] + pd.Timedelta(days=VERIFICATION_WINDOW_DAYS) < pd.Timestamp(cutoff)
+    state["is_open"] = ~(state["finalize"] | window_passed)
+
+    touched = state[state["changed"] | ~state["is_open"]]
+    bulk_update(session, PredictionTracking, touched[["id"] + TRACKING_STATE_COLUMNS], key_columns=["id"])
+
+    final = state[state["finalize"]].rename(columns={"id": "tracking_id", "prediction_id": "id"})
+    bulk_update(session, PredictionResult, final[["id", "verified", "verification_date", "actual_move_percent", "actual_direction", "days_to_fulfill"]], key_columns=["id"])
+    return int(final["verified"].sum()), len(state)
+
+def update_prediction_results(incremental: bool = True) -> Tuple[int, int]:
     """
     Daily job to verify predictions against actual price movements.
     Returns count of verified and total predictions checked.
+
+    By default open predictions are advanced incrementally from `prediction_tracking`, so the
+    cost scales with the number of open predictions. With `incremental=False` all price
+    windows are pulled with one range query, outcomes are computed with grouped vectorized
+    operations, and finalized predictions are written with one bulk UPDATE.
     """
     session = get_db_session()
     verified_count, total_count = 0, 0
     
     try:
-        # Get unverified predictions older than 1 day
-        predictions = session.query(PredictionResult).filter(
-            PredictionResult.verified == False,
-            PredictionResult.date < datetime.now().date() - timedelta(days=1)
-        ).all()
-        
-        total_count = len(predictions)
+        # Unverified predictions older than 1 day
+        cutoff = datetime.now().date() - timedelta(days=1)
+        if incremental:
+            verified_count, total_count = advance_prediction_tracking(session, cutoff)
+            session.commit()
+            print(f"[INFO] Verified {verified_count} out of {total_count} open predictions")
+            return verified_count, total_count
+
+        total_count = session.execute(PENDING_COUNT_QUERY, {"cutoff": cutoff}).scalar() or 0
+        windows = pd.read_sql(PENDING_WINDOWS_QUERY, session.bind, params={"cutoff": cutoff, "window_days": VERIFICATION_WINDOW_DAYS})
         
-        for pred in predictions:
-            # Get historical prices after prediction date
-            prices = session.query(EODData.date,EODData.high,EODData.low,EODData.close).filter(EODData.trading_symbol == pred.trading_symbol,EODData.date > pred.date,EODData.date <= pred.date + timedelta(days=20)).order_by(EODData.date.asc()).all()
-            
-            if not prices:
-                continue
-                
-            # Calculate max move from prediction date
-            base_close = session.query(EODData.close).filter(EODData.trading_symbol == pred.trading_symbol,EODData.date == pred.date).scalar()
-            
-            if not base_close:
-                continue
-                
-            # Calculate maximum moves
-            max_up_move, max_down_move = 0, 0
-            up_day, down_day = None, None
-            
-            for i, price in enumerate(prices):
-                # Calculate up move
-                up_pct = (price.high - base_close) / base_close * 100
-                if up_pct > max_up_move:
-                    max_up_move = up_pct
-                    up_day = price.date
-                
-                # Calculate down move
-                down_pct = (price.low - base_close) / base_close * 100
-                if down_pct < max_down_move:
-                    max_down_move = down_pct
-                    down_day = price.date
-            
-            # Determine if prediction was verified
-            threshold = DEFAULT_DAILY_STRONG_MOVE_THRESHOLD  # Use the same threshold as model training
-            verified = False
-            verification_date = None
-            days_to_fulfill = None
-            actual_move_percent = None
-            actual_direction = None
-            
-            if pred.direction_prediction == "UP" and max_up_move >= threshold:
-                verified = True
-                verification_date = up_day
-                days_to_fulfill = (up_day - pred.date).days
-                actual_move_percent = max_up_move
-                actual_direction = "UP"
-            elif pred.direction_prediction == "DOWN" and abs(max_down_move) >= threshold:
-                verified = True
-                verification_date = down_day
-                days_to_fulfill = (down_day - pred.date).days
-                actual_move_percent = max_down_move
-                actual_direction = "DOWN"
-            elif max_up_move >= threshold or abs(max_down_move) >= threshold:
-                # Move happened but direction was wrong
-                verified = False
-                if max_up_move > abs(max_down_move):
-                    actual_move_percent = max_up_move
-                    actual_direction = "UP"
-                else:
-                    actual_move_percent = max_down_move
-                    actual_direction = "DOWN"
+        if not windows.empty:
+            outcomes = evaluate_price_windows(windows)
+            final = outcomes[outcomes["finalize"]]
             
-            # Update prediction record
-            if verified or (len(prices) >= 10):  # Only mark as false after checking at least 10 days
-                pred.verified = verified
-                pred.verification_date = verification_date
-                pred.actual_move_percent = actual_move_percent
-                pred.actual_direction = actual_direction
-                pred.days_to_fulfill = days_to_fulfill
-                session.add(pred)
-                verified_count += 1 if verified else 0
+            # Only mark as false after checking at least MIN_BARS_TO_FINALIZE bars
+            bulk_update(session, PredictionResult, final[["id", "verified", "verification_date", "actual_move_percent", "actual_direction", "days_to_fulfill"]], key_columns=["id"])
+            verified_count = int(final["verified"].sum())
         
         session.commit()
         print(f"[INFO] Verified {verified_count} out of {total_count} predictions")
@@ -0,0 +1,124 @@
+# db/bulk_writer.py
+
+import io
+import uuid
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Union
+from sqlalchemy import Integer, BigInteger, Boolean
+from sqlalchemy.orm import Session
+
+def _to_frame(model, data: Union[pd.DataFrame, Dict[str, np.ndarray]], fill_defaults: bool = False) -> pd.DataFrame:
+    """Normalize a DataFrame or dict of column arrays to the model's column types.
+
+    COPY bypasses SQLAlchemy's Python-side defaults, so with `fill_defaults` missing columns
+    that have a scalar `default` are filled the way an ORM insert would.
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    columns = [c for c in df.columns if c in model.__table__.columns]
+    df = df[columns].copy()
+
+    if fill_defaults:
+        for column in model.__table__.columns:
+            if column.name not in df.columns and not column.primary_key and column.default is not None and column.default.is_scalar:
+                df[column.name] = column.default.arg
+        columns = list(df.columns)
+
+    for col in columns:
+        col_type = model.__table__.columns[col].type
+        if isinstance(col_type, (Integer, BigInteger)):
+            df[col] = pd.to_numeric(df[col]).round().astype("Int64")
+        elif isinstance(col_type, Boolean):
+            df[col] = df[col].astype("boolean")
+        elif df[col].dtype.kind == "f":
+            df[col] = df[col].replace([np.inf, -np.inf], np.nan)
+    return df
+
+def _copy_to_staging(cursor, table_name: str, df: pd.DataFrame) -> str:
+    """Create a temporary staging table shaped like `df` and COPY the rows into it."""
+    staging = f"staging_{table_name}_{uuid.uuid4().hex[:8]}"
+    cols = ", ".join(df.columns)
+    cursor.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {cols} FROM {table_name} WITH NO DATA")
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+    return staging
+
+def bulk_upsert(session: Session, model, data: Union[pd.DataFrame, Dict[str, np.ndarray]], conflict_columns: List[str], update_columns: Optional[List[str]] = None) -> Dict[str, int]:
+    """Stream rows into Postgres with COPY and merge them with ON CONFLICT upsert semantics.
+
+    Rows are copied into a temporary staging table and merged into the model's table in one
+    INSERT ... ON CONFLICT statement. By default every non-key column is updated on conflict;
+    pass `update_columns=[]` to keep existing rows untouched. Columns filled from model defaults
+    only apply to inserted rows. The caller owns the transaction.
+    Returns counts of rows inserted and updated.
+    """
+    supplied = [c for c in (data.columns if isinstance(data, pd.DataFrame) else data.keys()) if c in model.__table__.columns]
+    df = _to_frame(model, data, fill_defaults=True)
+    if df.empty:
+        return {"inserted": 0, "updated": 0}
+
+    # A key may only be merged once per statement
+    df = df.drop_duplicates(subset=conflict_columns, keep="last")
+
+    table_name = model.__tablename__
+    table_columns = model.__table__.columns
+    if update_columns is None:
+        update_columns = [c for c in supplied if c not in conflict_columns]
+
+    cursor = session.connection().connection.cursor()
+    try:
+        staging = _copy_to_staging(cursor, table_name, df)
+        cols = ", ".join(df.columns)
+
+        if update_columns:
+            assignments = [f"{c} = EXCLUDED.{c}" for c in update_columns]
+            if "updated_at" in table_columns and "updated_at" not in update_columns:
+                assignments.append("updated_at = now()")
+            on_conflict = f"DO UPDATE SET {', '.join(assignments)}"
+        else:
+            on_conflict = "DO NOTHING"
+
+        cursor.execute(f"""
+            WITH merged AS (
+                INSERT INTO {table_name} ({cols})
+                SELECT {cols} FROM {staging}
+                ON CONFLICT ({', '.join(conflict_columns)}) {on_conflict}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+        """)
+        inserted, updated = cursor.fetchone()
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        return {"inserted": int(inserted or 0), "updated": int(updated or 0)}
+    finally:
+        cursor.close()
+
+def bulk_update(session: Session, model, data: Union[pd.DataFrame, Dict[str, np.ndarray]], key_columns: List[str], update_columns: Optional[List[str]] = None) -> int:
+    """COPY rows into a staging table and apply them with one UPDATE ... FROM.
+
+    Only rows whose keys already exist are touched; `update_columns` defaults to every
+    non-key column present in `data`. The caller owns the transaction. Returns rows updated.
+    """
+    df = _to_frame(model, data)
+    if df.empty:
+        return 0
+
+    df = df.drop_duplicates(subset=key_columns, keep="last")
+    table_name = model.__tablename__
+    if update_columns is None:
+        update_columns = [c for c in df.columns if c not in key_columns]
+
+    cursor = session.connection().connection.cursor()
+    try:
+        staging = _copy_to_staging(cursor, table_name, df)
+        assignments = ", ".join(f"{c} = s.{c}" for c in update_columns)
+        matches = " AND ".join(f"t.{c} = s.{c}" for c in key_columns)
+        cursor.execute(f"UPDATE {table_name} t SET {assignments} FROM {staging} s WHERE {matches}")
+        updated = cursor.rowcount
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        return int(updated)
+    finally:
+        cursor.close()
@@ -2,7 +2,7 @@
 
 import os
 import time
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from dotenv import load_dotenv
@@ -54,4 +54,23 @@ def check_db_connection() -> bool:
         return True
     except Exception as e:
         print(f"Database connection error: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def ensure_columns(model) -> None:
+    """Add nullable columns declared on `model` but missing from its existing table.
+
+    `create_all` only creates missing tables, so new optional columns on existing
+    tables are added here with ADD COLUMN IF NOT EXISTS.
+    """
+    table = model.__table__
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return
+    existing = {col["name"] for col in inspector.get_columns(table.name)}
+    missing = [col for col in table.columns if col.name not in existing and col.nullable]
+    if not missing:
+        return
+    with engine.begin() as connection:
+        for col in missing:
+            col_type = col.type.compile(dialect=engine.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {col.name} {col_type}"))
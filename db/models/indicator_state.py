@@ -0,0 +1,25 @@
+# db/models/indicator_state.py
+
+from sqlalchemy import Column, Integer, String, Date, Text, UniqueConstraint, DateTime, Index
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+class IndicatorState(Base):
+    __tablename__ = "indicator_state"
+    __table_args__ = (
+        UniqueConstraint('trading_symbol', 'exchange', name='unique_indicator_state_per_symbol'),
+        Index('idx_indicator_state_last_date', 'last_date'),  # For finding stale states
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    trading_symbol = Column(String, nullable=False, index=True)
+    exchange = Column(String, nullable=False)
+    last_date = Column(Date, nullable=False)  # Date of the last bar folded into the state
+    state_version = Column(Integer, nullable=False, default=1)
+    state = Column(Text, nullable=False)  # JSON: EMA values, Wilder averages, rolling buffers
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<IndicatorState(symbol={self.trading_symbol}, last_date={self.last_date}, version={self.state_version})>"
@@ -0,0 +1,28 @@
+# db/models/ingestion_journal.py
+
+from sqlalchemy import Column, Integer, String, Date, Text, UniqueConstraint, DateTime, Index
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+class IngestionJournal(Base):
+    __tablename__ = "ingestion_journal"
+    __table_args__ = (
+        UniqueConstraint('trading_symbol', 'exchange', 'from_date', 'to_date', name='unique_ingestion_range'),
+        Index('idx_ingestion_journal_status', 'status'),  # For loading pending ranges
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    trading_symbol = Column(String, nullable=False, index=True)
+    exchange = Column(String, nullable=False)
+    from_date = Column(Date, nullable=False)
+    to_date = Column(Date, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<IngestionJournal(symbol={self.trading_symbol}, {self.from_date}..{self.to_date}, status={self.status}, attempts={self.attempts})>"
@@ -25,6 +25,7 @@ class ModelPerformance(Base):
     predictions_count = Column(Integer, nullable=False, default=0)
     successful_count = Column(Integer, nullable=False, default=0)
     effective_features = Column(String, nullable=True)  # Store as JSON string of array
+    data_fingerprint = Column(String, nullable=True)  # Fingerprint of the training inputs
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     def __repr__(self):
@@ -0,0 +1,35 @@
+# db/models/prediction_tracking.py
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Index
+from sqlalchemy.sql import func
+from db.base_class import Base
+
+class PredictionTracking(Base):
+    __tablename__ = "prediction_tracking"
+    __table_args__ = (
+        Index('idx_prediction_tracking_open', 'is_open'),  # For loading open predictions
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    prediction_id = Column(Integer, nullable=False, unique=True)  # prediction_results.id
+    trading_symbol = Column(String, nullable=False, index=True)
+    prediction_date = Column(Date, nullable=False)
+    direction_prediction = Column(String, nullable=True)
+    base_close = Column(Float, nullable=False)
+
+    # Running state folded from every bar after the prediction date
+    max_up_move = Column(Float, nullable=False, default=0.0)
+    max_down_move = Column(Float, nullable=False, default=0.0)
+    max_up_date = Column(Date, nullable=True)
+    max_down_date = Column(Date, nullable=True)
+    up_hit_date = Column(Date, nullable=True)  # First bar whose high crossed +threshold
+    down_hit_date = Column(Date, nullable=True)  # First bar whose low crossed -threshold
+    bars_observed = Column(Integer, nullable=False, default=0)
+    last_bar_date = Column(Date, nullable=False)  # Latest bar folded into the state
+    is_open = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<PredictionTracking(symbol={self.trading_symbol}, date={self.prediction_date}, bars={self.bars_observed}, open={self.is_open})>"
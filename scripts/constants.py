@@ -43,6 +43,21 @@ DATA_API_MAX_PER_DAY = 100_000
 SAFE_REQUESTS_PER_SECOND = 2   # Keep some margin
 SAFE_SLEEP_BETWEEN_REQUESTS = 1 / SAFE_REQUESTS_PER_SECOND  # Seconds between requests
 
+# Adaptive (AIMD) pacing, starting from SAFE_REQUESTS_PER_SECOND on the first run
+RATE_MIN_PER_SECOND = 0.5
+RATE_ADDITIVE_STEP = 0.05  # req/s added per successful response
+RATE_DECREASE_FACTOR = 0.5  # Rate multiplier on a 429 or latency spike
+RATE_LATENCY_SPIKE_FACTOR = 3.0  # Latency above this multiple of the moving average is a spike
+
+# Async historical client: requests paced at DATA_API_MAX_PER_SECOND by a token bucket
+ASYNC_FETCH_ENABLED = os.getenv("ASYNC_FETCH_ENABLED", "True").lower() == "true"
+ASYNC_MAX_IN_FLIGHT = 10  # Concurrent requests on the keep-alive connection pool
+ASYNC_REQUEST_TIMEOUT = 30  # seconds
+
+# Journaled backfills (scripts/eod_backfill.py)
+BACKFILL_CHUNK_DAYS = int(os.getenv("BACKFILL_CHUNK_DAYS", "365"))  # Calendar days per journaled request
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", "5"))  # Ranges failing this often are left for review
+
 # Error handling configuration
 MAX_RETRIES = 5
 RETRY_BACKOFF_FACTOR = 2
@@ -2,146 +2,119 @@
 
 import pandas as pd
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, func, text
 from db.base_class import Base
 from db.database import DATABASE_URL, SessionLocal
-from db.models.eod_data import EODData
+from db.bulk_writer import bulk_upsert
 from db.models.symbol import Symbol
 from db.models.feature_data import FeatureData
+from db.models.indicator_state import IndicatorState
 from core.features.feature_engineer import calculate_features
+from core.features.job_planner import DEFAULT_CHUNK_ROWS, DEFAULT_LOOKBACK_ROWS, plan_feature_jobs, stream_feature_inputs
+from core.features.indicator_state import STATE_VERSION, build_states, advance_state, serialize_state, deserialize_state, is_state_ready, state_last_date
 
 # Create engine
 engine = create_engine(DATABASE_URL)
 
 def log(msg): print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
 
-def get_latest_feature_dates(session, symbol):
-    """Get the latest feature date for a symbol more efficiently."""
-    result = session.query(func.max(FeatureData.date)).filter(FeatureData.trading_symbol == symbol).first()
-    return result[0] if result and result[0] else None
+def write_features(session, features_df: pd.DataFrame) -> dict:
+    """Upsert feature rows into features_data with COPY; returns inserted/updated counts."""
+    return bulk_upsert(session, FeatureData, features_df, conflict_columns=["trading_symbol", "exchange", "date"])
 
-def process_symbol(symbol: str):
-    """Process a single symbol with optimized database operations."""
+def save_indicator_state(session, symbol: str, state: dict, existing: IndicatorState = None):
+    """Insert or update the persisted indicator state for a symbol (callers pre-load `existing`)."""
+    record = existing or IndicatorState(trading_symbol=symbol, exchange=state["exchange"])
+    record.last_date = state_last_date(state)
+    record.state_version = STATE_VERSION
+    record.state = serialize_state(state)
+    session.add(record)
+
+def update_features_incremental():
+    """Advance persisted indicator states by today's candles; returns (inserted, symbols needing a rebuild)."""
     session = SessionLocal()
     
     try:
-        # Check if symbol is active
-        sym_obj = session.query(Symbol).filter(Symbol.trading_symbol == symbol, Symbol.active == True).first()
-        if not sym_obj:
-            return f"[SKIP] {symbol} - symbol not active"
-
-        # Get EOD data
-        eod_query = session.query(EODData).filter(EODData.trading_symbol == symbol)
-        eod_count = eod_query.count()
-        
-        if eod_count == 0:
-            return f"[SKIP] {symbol} - no EOD data"
-
-        # Get latest feature date
-        latest_feature_date = get_latest_feature_dates(session, symbol)
-        
-        # Build query for EOD data that needs features
-        if latest_feature_date:
-            eod_query = eod_query.filter(EODData.date > latest_feature_date)
-        
-        eod_rows = eod_query.all()
-        if not eod_rows:
-            return f"[SKIP] {symbol} - all features already present"
-
-        # Convert to dictionary for efficient DataFrame creation
-        eod_data = [{
-            "trading_symbol": r.trading_symbol,
-            "exchange": r.exchange,
-            "date": r.date,
-            "open": r.open,
-            "high": r.high,
-            "low": r.low,
-            "close": r.close,
-            "volume": r.volume
-        } for r in eod_rows]
-
-        # Need historical data for proper feature calculation (lookback periods)
-        if latest_feature_date:
-            # Add some additional lookback data to ensure proper feature calculation
-            lookback_days = 50  # Enough for longer-period indicators
-            lookback_data = session.query(EODData).filter(
-                EODData.trading_symbol == symbol,
-                EODData.date <= latest_feature_date
-            ).order_by(EODData.date.desc()).limit(lookback_days).all()
-            
-            eod_data.extend([{
-                "trading_symbol": r.trading_symbol,
-                "exchange": r.exchange,
-                "date": r.date,
-                "open": r.open,
-                "high": r.high,
-                "low": r.low,
-                "close": r.close,
-                "volume": r.volume
-            } for r in lookback_data])
-
-        # Convert to DataFrames        
-        eod_df = pd.DataFrame(eod_data)
-        symbol_df = pd.DataFrame([{
-            "trading_symbol": sym_obj.trading_symbol,
-            "fo_eligible": sym_obj.fo_eligible
-        }])
-
-        # Calculate features
-        features_df = calculate_features(eod_df, symbol_df)
-        
-        if features_df.empty:
-            return f"[SKIP] {symbol} - no features generated"
-
-        # Filter out features we already have
-        if latest_feature_date:
-            features_df = features_df[features_df["date"] > latest_feature_date]
-
-        if features_df.empty:
-            return f"[SKIP] {symbol} - no new features to add"
-
-        # Create feature objects
-        feature_objects = [
-            FeatureData(
-                trading_symbol=row["trading_symbol"],
-                exchange=row["exchange"],
-                date=row["date"],
-                week_day=row["week_day"],
-                volatility_squeeze=row["volatility_squeeze"],
-                trend_zone_strength=row["trend_zone_strength"],
-                range_compression_ratio=row["range_compression_ratio"],
-                volume_spike_ratio=row["volume_spike_ratio"],
-                body_to_range_ratio=row["body_to_range_ratio"],
-                distance_from_ema_5=row["distance_from_ema_5"],
-                gap_pct=row["gap_pct"],
-                return_3d=row["return_3d"],
-                atr_5=row["atr_5"],
-                hl_range=row["hl_range"],
-                fo_eligible=row["fo_eligible"],
-                rsi_14=row["rsi_14"],
-                close_ema50_gap_pct=row["close_ema50_gap_pct"],
-                open_gap_pct=row["open_gap_pct"],
-                macd_histogram=row["macd_histogram"],
-                atr_14_normalized=row["atr_14_normalized"],
-                percent_move=row["percent_move"]
-            )
-            for _, row in features_df.iterrows()
-        ]
-
-        # Bulk insert for better performance
-        session.bulk_save_objects(feature_objects)
+        symbols = {s.trading_symbol: s for s in session.query(Symbol).filter(Symbol.active == True).all()}
+        states = {r.trading_symbol: r for r in session.query(IndicatorState).all() if r.trading_symbol in symbols}
+        latest_features = dict(session.query(FeatureData.trading_symbol, func.max(FeatureData.date)).group_by(FeatureData.trading_symbol).all())
+
+        # A state is usable only if it is current and sits exactly at the latest stored feature row
+        fresh, stale = {}, []
+        for symbol in symbols:
+            record = states.get(symbol)
+            state = deserialize_state(record.state) if record and record.state_version == STATE_VERSION else None
+            if is_state_ready(state) and latest_features.get(symbol) == record.last_date:
+                fresh[symbol] = state
+            else:
+                stale.append(symbol)
+
+        # One query for every bar newer than its symbol's state
+        new_bars = session.execute(text("""
+            SELECT e.trading_symbol, e.exchange, e.date, e.open, e.high, e.low, e.close, e.volume
+            FROM eod_data e
+            JOIN indicator_state s ON s.trading_symbol = e.trading_symbol AND s.exchange = e.exchange
+            WHERE e.date > s.last_date
+            ORDER BY e.trading_symbol, e.date
+        """)).fetchall()
+
+        feature_rows, advanced = [], set()
+        for bar in new_bars:
+            bar = bar._asdict()
+            symbol = bar["trading_symbol"]
+            if symbol not in fresh:
+                continue
+            fresh[symbol], features = advance_state(fresh[symbol], bar, symbols[symbol].fo_eligible)
+            feature_rows.append(features)
+            advanced.add(symbol)
+
+        counts = write_features(session, pd.DataFrame(feature_rows)) if feature_rows else {"inserted": 0, "updated": 0}
+        for symbol in advanced:
+            save_indicator_state(session, symbol, fresh[symbol], existing=states[symbol])
         session.commit()
-        return f"[OK] {symbol} - inserted {len(feature_objects)} features"
+
+        log(f"[INFO] Incremental update advanced {len(advanced)} symbols, inserted {counts['inserted']} / updated {counts['updated']} features; {len(stale)} symbols need a rebuild")
+        return counts["inserted"], stale
 
     except Exception as e:
         session.rollback()
-        return f"[FAIL] {symbol} - {str(e)}"
+        log(f"[ERROR] Incremental feature update failed: {str(e)}")
+        return 0, None
     finally:
         session.close()
 
-def create_features(max_workers: int = 6):
-    """Create features for all active symbols with improved concurrency and error handling."""
+def process_feature_chunk(session, eod_df: pd.DataFrame, chunk: pd.DataFrame, rebuild_states: bool = False) -> dict:
+    """Compute features for one planned chunk of symbols and write the rows that are missing."""
+    if eod_df.empty:
+        return {"inserted": 0, "updated": 0}
+
+    symbol_df = chunk[["trading_symbol", "fo_eligible"]]
+    if rebuild_states:
+        features_df, states = build_states(eod_df, symbol_df)
+    else:
+        features_df, states = calculate_features(eod_df, symbol_df), {}
+
+    # Keep only dates after each symbol's latest stored feature row
+    last_dates = pd.to_datetime(features_df["trading_symbol"].map(chunk.set_index("trading_symbol")["last_feature_date"]))
+    features_df = features_df[last_dates.isna().to_numpy() | (pd.to_datetime(features_df["date"]) > last_dates).to_numpy()]
+
+    counts = write_features(session, features_df)
+
+    if states:
+        existing = {r.trading_symbol: r for r in session.query(IndicatorState).filter(IndicatorState.trading_symbol.in_(list(states))).all()}
+        for symbol, state in states.items():
+            save_indicator_state(session, symbol, state, existing=existing.get(symbol))
+
+    session.commit()
+    return counts
+
+def create_features(chunk_rows: int = DEFAULT_CHUNK_ROWS, incremental: bool = True):
+    """Create features for all active symbols from a set-based plan.
+
+    In incremental mode, symbols with a current indicator state advance by their new bars
+    in O(1) work each; symbols whose state is missing or stale are rebuilt from full history.
+    Everything else is planned with one grouped query and streamed in symbol-ordered chunks.
+    """
     # Ensure tables exist
     Base.metadata.create_all(bind=engine)
     
@@ -149,43 +122,51 @@ def create_features(max_workers: int = 6):
     start_time = datetime.now()
     
     try:
-        # Get all active symbols
-        symbols = session.query(Symbol.trading_symbol).filter(Symbol.active == True).all()
-        if not symbols:
+        stale = None
+        if incremental:
+            _, stale = update_features_incremental()
+        rebuild_states = stale is not None
+
+        plan = plan_feature_jobs(session, lookback=DEFAULT_LOOKBACK_ROWS, full_history=set(stale) if rebuild_states else None)
+        if plan.empty:
             log("[ERROR] No active symbols found.")
             return
 
-        symbol_list = [s.trading_symbol for s in symbols]
-        total_symbols = len(symbol_list)
-        
-        log(f"[INFO] Starting parallel feature generation for {total_symbols} symbols...")
+        if rebuild_states:
+            # Stale states are rebuilt even when no feature rows are missing
+            plan = plan[plan["trading_symbol"].isin(stale) & (plan["eod_rows"] > 0)]
+        else:
+            plan = plan[plan["pending_rows"] > 0]
 
-        # Process symbols in parallel with optimized thread pool
-        successful, failed = 0, 0
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(process_symbol, sym): sym for sym in symbol_list}
+        total_symbols = len(plan)
+        if not total_symbols:
+            log("[SUCCESS] All features already present.")
+            return
+        
+        log(f"[INFO] Starting feature generation for {total_symbols} symbols ({int(plan['rows_to_load'].sum())} EOD rows)...")
+
+        done, inserted, updated, failed = 0, 0, 0, 0
+        for eod_df, chunk in stream_feature_inputs(session, plan, chunk_rows=chunk_rows):
+            try:
+                counts = process_feature_chunk(session, eod_df, chunk, rebuild_states=rebuild_states)
+                inserted += counts["inserted"]
+                updated += counts["updated"]
+            except Exception as e:
+                session.rollback()
+                failed += len(chunk)
+                log(f"[FAIL] Chunk {chunk['trading_symbol'].iloc[0]}..{chunk['trading_symbol'].iloc[-1]} - {str(e)}")
+            done += len(chunk)
             
-            for i, future in enumerate(as_completed(futures)):
-                symbol = futures[future]
-                result = future.result()
-                log(result)
-                
-                if result.startswith("[OK]"):
-                    successful += 1
-                elif result.startswith("[FAIL]"):
-                    failed += 1
-                
-                # Progress update
-                if (i + 1) % 10 == 0 or (i + 1) == total_symbols:
-                    elapsed = (datetime.now() - start_time).total_seconds()
-                    remain = (elapsed / (i + 1)) * (total_symbols - i - 1)
-                    log(f"[PROGRESS] {i+1}/{total_symbols} symbols, "
-                        f"Success: {successful}, Failed: {failed}, "
-                        f"Elapsed: {elapsed:.1f}s, Remaining: {remain:.1f}s")
+            # Progress update
+            elapsed = (datetime.now() - start_time).total_seconds()
+            remain = (elapsed / done) * (total_symbols - done)
+            log(f"[PROGRESS] {done}/{total_symbols} symbols, "
+                f"Inserted: {inserted}, Updated: {updated}, Failed: {failed}, "
+                f"Elapsed: {elapsed:.1f}s, Remaining: {remain:.1f}s")
 
         duration = (datetime.now() - start_time).total_seconds()
         log(f"[SUCCESS] Feature generation completed in {duration:.1f} seconds. "
-            f"Successful: {successful}/{total_symbols}")
+            f"Successful: {total_symbols - failed}/{total_symbols}")
 
     except Exception as e:
         log(f"[ERROR] Failed during create_features: {str(e)}")
@@ -193,4 +174,4 @@ def create_features(max_workers: int = 6):
         session.close()
 
 if __name__ == "__main__":
-    create_features()
\ No newline at end of file
+    create_features()
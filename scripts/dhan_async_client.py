@@ -0,0 +1,169 @@
+# scripts/dhan_async_client.py
+
+import time
+import random
+import asyncio
+import aiohttp
+from datetime import datetime
+from scripts.constants import (DHAN_CHARTS_HISTORICAL_URL, HEADERS, DATA_API_MAX_PER_SECOND,
+                               ASYNC_MAX_IN_FLIGHT, ASYNC_REQUEST_TIMEOUT, MAX_RETRIES,
+                               RETRY_BACKOFF_FACTOR, RETRY_INITIAL_WAIT)
+
+def log(msg): print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+
+class CircuitOpenError(Exception):
+    """The circuit breaker blocked a request when its send slot came up."""
+
+class TokenBucket:
+    """Asyncio token bucket: `rate` tokens per second with bursts up to `capacity`.
+
+    `pause(seconds)` holds back every waiter, so one 429 slows the whole client down
+    instead of only the request that hit it.
+    """
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        # Tokens start accruing again only when the pause ends, so traffic resumes at `rate`
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.updated = self.paused_until
+
+class DhanAsyncClient:
+    """Keep-alive aiohttp client for the historical charts API.
+
+    Requests run concurrently up to `max_in_flight`, are paced by a token bucket at the
+    documented per-second limit (or at the rate an AdaptiveRateController has learned), and
+    share the caller's CircuitBreaker. Retry handling
+    matches `fetch_eod_from_dhan`: 429 and connection errors count as failures and back off,
+    403/400 stop immediately, timeouts and other HTTP errors retry with backoff.
+    """
+    def __init__(self, circuit_breaker, rate_controller=None, rate: float = DATA_API_MAX_PER_SECOND, max_in_flight: int = ASYNC_MAX_IN_FLIGHT, timeout: float = ASYNC_REQUEST_TIMEOUT):
+        self.circuit_breaker = circuit_breaker
+        self.rate_controller = rate_controller
+        self.bucket = TokenBucket(rate_controller.rate if rate_controller else rate)
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.session = None
+        self.in_flight = None
+        self.requests = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def _post(self, payload: dict) -> dict:
+        if self.rate_controller:
+            # Follow the controller's additive increases / multiplicative cuts
+            self.bucket.rate = self.bucket.capacity = self.rate_controller.rate
+        await self.bucket.acquire()
+        async with self.in_flight:
+            # Checked at send time (every attempt), not when the caller queued up
+            if not self.circuit_breaker.allow_request():
+                raise CircuitOpenError()
+            self.requests += 1
+            request_start = time.monotonic()
+            async with self.session.post(DHAN_CHARTS_HISTORICAL_URL, json=payload) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            if self.rate_controller:
+                self.rate_controller.record_success(time.monotonic() - request_start)
+            return data
+
+    async def fetch_historical(self, symbol: str, security_id: str, instrument_type: str, exchange_segment: str, from_date: str, to_date: str, raise_circuit_open: bool = False) -> dict:
+        """Async counterpart of `fetch_eod_from_dhan`; returns the JSON response or None.
+
+        The circuit breaker is consulted each time a request gets its send slot. A blocked
+        request returns None, or raises CircuitOpenError with `raise_circuit_open` so callers
+        can tell a skipped request from a failed one.
+        """
+        payload = {
+            "securityId": str(security_id),
+            "exchangeSegment": exchange_segment,
+            "instrument": instrument_type,
+            "expiryCode": 0,
+            "oi": False,
+            "fromDate": from_date,
+            "toDate": to_date
+        }
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                return await self._post(payload)
+
+            except CircuitOpenError:
+                if raise_circuit_open:
+                    raise
+                log(f"[CIRCUIT] Skipping {symbol} - circuit breaker active")
+                break
+
+            except aiohttp.ClientResponseError as e:
+                status = e.status
+
+                if status == 429:  # Rate limit
+                    self.circuit_breaker.record_failure()
+                    wait = RETRY_INITIAL_WAIT * (RETRY_BACKOFF_FACTOR ** attempt) + random.uniform(0.1, 0.5)
+                    log(f"[RETRY] {symbol} hit 429 rate limit. Waiting {wait:.1f}s... (Attempt {attempt+1}/{MAX_RETRIES})")
+                    self.bucket.pause(wait)
+                    if self.rate_controller:
+                        self.rate_controller.record_throttle()
+                elif status == 403:  # Auth error
+                    log(f"[AUTH ERROR] {symbol} hit 403. Check credentials.")
+                    break
+                elif status == 400:  # Bad request
+                    log(f"[BAD REQUEST] {symbol} hit 400. Likely invalid securityId/segment.")
+                    break
+                else:
+                    log(f"[HTTP ERROR] {symbol}: {status} - {str(e)}")
+                    if attempt < MAX_RETRIES - 1:
+                        await asyncio.sleep(RETRY_INITIAL_WAIT * (RETRY_BACKOFF_FACTOR ** attempt))
+                    else:
+                        break
+
+            except aiohttp.ClientConnectionError as e:
+                self.circuit_breaker.record_failure()
+                log(f"[CONNECTION ERROR] {symbol}: {str(e)}")
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(RETRY_INITIAL_WAIT * (RETRY_BACKOFF_FACTOR ** attempt) * 2)  # Longer wait for connection issues
+                else:
+                    break
+
+            except asyncio.TimeoutError as e:
+                log(f"[TIMEOUT] {symbol}: {str(e)}")
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(RETRY_INITIAL_WAIT * (RETRY_BACKOFF_FACTOR ** attempt))
+                else:
+                    break
+
+            except Exception as e:
+                log(f"[ERROR] Fetch failed for {symbol}: {str(e)}")
+                break
+
+        return None
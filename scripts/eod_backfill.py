@@ -0,0 +1,197 @@
+# scripts/eod_backfill.py
+
+import asyncio
+import pandas as pd
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from db.database import SessionLocal, engine
+from db.bulk_writer import bulk_upsert
+from db.models.symbol import Symbol
+from db.models.eod_data import EODData
+from db.models.ingestion_journal import IngestionJournal
+from scripts.constants import BACKFILL_CHUNK_DAYS, BACKFILL_MAX_ATTEMPTS
+
+def log(msg): print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+
+# Ranges still to fetch, with what the API call needs from the symbol master
+PENDING_RANGES_QUERY = text("""
+    SELECT j.id, j.trading_symbol, j.exchange, j.from_date, j.to_date, j.attempts,
+           s.security_id, s.instrument_type, s.segment, s.fo_eligible
+    FROM ingestion_journal j
+    JOIN symbols s ON s.trading_symbol = j.trading_symbol AND s.exchange = j.exchange AND s.active = TRUE
+    WHERE j.status IN ('pending', 'failed') AND j.attempts < :max_attempts
+    ORDER BY j.from_date, j.trading_symbol
+""")
+
+MARK_RUNNING_QUERY = text("""
+    UPDATE ingestion_journal SET status = 'running', attempts = attempts + 1, updated_at = now() WHERE id = :id
+""")
+
+# A range the circuit breaker stopped before it was sent goes back to pending with its attempt refunded
+REQUEUE_QUERY = text("""
+    UPDATE ingestion_journal SET status = 'pending', attempts = attempts - 1, updated_at = now() WHERE id = :id
+""")
+
+MARK_FINISHED_QUERY = text("""
+    UPDATE ingestion_journal SET status = :status, rows_written = :rows, last_error = :error, updated_at = now() WHERE id = :id
+""")
+
+def split_range(start, end, chunk_days: int) -> List[tuple]:
+    """Consecutive (from, to) date pairs of at most `chunk_days` covering start..end."""
+    ranges = []
+    while start <= end:
+        stop = min(start + timedelta(days=chunk_days - 1), end)
+        ranges.append((start, stop))
+        start = stop + timedelta(days=1)
+    return ranges
+
+def plan_backfill(session: Session, from_date, to_date, chunk_days: int = BACKFILL_CHUNK_DAYS) -> int:
+    """Journal the ranges each active symbol still needs between from_date and to_date.
+
+    A symbol's ranges start after both its last stored EOD date and the last range already
+    journaled for it, so re-planning never duplicates work. Returns ranges added.
+    """
+    symbols = session.query(Symbol.trading_symbol, Symbol.exchange).filter(Symbol.active == True).all()
+    last_stored = {(s, e): d for s, e, d in session.query(EODData.trading_symbol, EODData.exchange, func.max(EODData.date)).group_by(EODData.trading_symbol, EODData.exchange)}
+    last_planned = {(s, e): d for s, e, d in session.query(IngestionJournal.trading_symbol, IngestionJournal.exchange, func.max(IngestionJournal.to_date)).group_by(IngestionJournal.trading_symbol, IngestionJournal.exchange)}
+
+    rows = []
+    for symbol, exchange in symbols:
+        start = from_date
+        for covered in (last_stored.get((symbol, exchange)), last_planned.get((symbol, exchange))):
+            if covered is not None and covered >= start:
+                start = covered + timedelta(days=1)
+        rows.extend({"trading_symbol": symbol, "exchange": exchange, "from_date": a, "to_date": b, "status": "pending", "attempts": 0} for a, b in split_range(start, to_date, chunk_days))
+
+    if not rows:
+        return 0
+    counts = bulk_upsert(session, IngestionJournal, pd.DataFrame(rows), conflict_columns=["trading_symbol", "exchange", "from_date", "to_date"], update_columns=[])
+    return counts["inserted"]
+
+def _execute(query, params: Dict):
+    session = SessionLocal()
+    try:
+        session.execute(query, params)
+        session.commit()
+    finally:
+        session.close()
+
+def store_range(entry: Dict, data: Optional[dict]) -> str:
+    """Write one fetched range and mark its journal entry done in the same transaction."""
+    from scripts.fetch_eod_data import parse_eod_candles
+
+    label = f"{entry['trading_symbol']} {entry['from_date']}..{entry['to_date']}"
+    if data is None:
+        _execute(MARK_FINISHED_QUERY, {"id": entry["id"], "status": "failed", "rows": None, "error": "fetch failed"})
+        return f"[FAIL] {label} - fetch failed (attempt {entry['attempts'] + 1})"
+
+    session = SessionLocal()
+    try:
+        # An empty response is a finished range (holidays, listing after the range)
+        batch, _ = parse_eod_candles(entry, data, entry["from_date"] - timedelta(days=1))
+        rows = len(batch["date"])
+        counts = bulk_upsert(session, EODData, batch, conflict_columns=["trading_symbol", "exchange", "date"]) if rows else {"inserted": 0, "updated": 0}
+        session.execute(MARK_FINISHED_QUERY, {"id": entry["id"], "status": "done", "rows": rows, "error": None})
+        session.commit()
+        return f"[OK] {label} - inserted {counts['inserted']}, updated {counts['updated']}"
+    except Exception as e:
+        session.rollback()
+        _execute(MARK_FINISHED_QUERY, {"id": entry["id"], "status": "failed", "rows": None, "error": str(e)[:500]})
+        return f"[ERROR] {label}: {str(e)}"
+    finally:
+        session.close()
+
+async def run_ranges(entries: List[Dict], max_workers: int) -> Dict[str, int]:
+    """Fetch journaled ranges concurrently through the paced async client."""
+    from scripts.dhan_async_client import DhanAsyncClient, CircuitOpenError
+    from scripts.fetch_eod_data import circuit_breaker, rate_controller
+
+    loop = asyncio.get_running_loop()
+    counts = {"done": 0, "failed": 0, "skipped": 0}
+    start_time = datetime.now()
+    with ThreadPoolExecutor(max_workers=max_workers) as db_pool:
+        async with DhanAsyncClient(circuit_breaker, rate_controller) as client:
+            # Ranges consult the breaker only when their turn to send comes
+            slots = asyncio.Semaphore(client.max_in_flight)
+
+            async def fetch_one(entry):
+                label = f"{entry['trading_symbol']} {entry['from_date']}..{entry['to_date']}"
+                try:
+                    async with slots:
+                        # Circuit-skipped ranges stay pending and keep their attempt
+                        if not circuit_breaker.allow_request():
+                            return f"[SKIP] {label} - circuit breaker active, left pending"
+                        await loop.run_in_executor(db_pool, _execute, MARK_RUNNING_QUERY, {"id": entry["id"]})
+                        try:
+                            data = await client.fetch_historical(
+                                symbol=entry["trading_symbol"],
+                                security_id=entry["security_id"],
+                                instrument_type=entry["instrument_type"],
+                                exchange_segment=entry["segment"],
+                                from_date=entry["from_date"].strftime("%Y-%m-%d"),
+                                to_date=entry["to_date"].strftime("%Y-%m-%d"),
+                                raise_circuit_open=True
+                            )
+                        except CircuitOpenError:
+                            await loop.run_in_executor(db_pool, _execute, REQUEUE_QUERY, {"id": entry["id"]})
+                            return f"[SKIP] {label} - circuit breaker active, left pending"
+                    return await loop.run_in_executor(db_pool, store_range, entry, data)
+                except Exception as e:
+                    return f"[ERROR] {label}: {str(e)}"
+
+            for i, task in enumerate(asyncio.as_completed([fetch_one(e) for e in entries])):
+                result = await task
+                log(result)
+                counts["done" if result.startswith("[OK]") else "skipped" if result.startswith("[SKIP]") else "failed"] += 1
+
+                if (i + 1) % 50 == 0 or (i + 1) == len(entries):
+                    elapsed = (datetime.now() - start_time).total_seconds() / 60
+                    remain = elapsed / (i + 1) * (len(entries) - i - 1)
+                    log(f"[PROGRESS] {i+1}/{len(entries)} ranges, Done: {counts['done']}, Failed: {counts['failed']}, Skipped: {counts['skipped']}, Elapsed: {elapsed:.1f}m, Remaining: {remain:.1f}m")
+    return counts
+
+def backfill_eod_data(from_date=None, to_date=None, max_workers: int = 5, chunk_days: int = BACKFILL_CHUNK_DAYS) -> Dict[str, int]:
+    """Journaled, resumable backfill.
+
+    Plans missing symbol ranges when a date span is given, then fetches every pending range
+    (including ranges left running by a crashed run and failed ranges under
+    BACKFILL_MAX_ATTEMPTS). Progress lives in `ingestion_journal`, so a restart continues
+    exactly where the previous run stopped. Assumes one backfill process at a time.
+    """
+    from scripts.fetch_eod_data import rate_controller
+
+    IngestionJournal.__table__.create(bind=engine, checkfirst=True)
+    session = SessionLocal()
+    start_time = datetime.now()
+    counts = {"planned": 0, "done": 0, "failed": 0, "skipped": 0}
+
+    try:
+        # Ranges a crashed run left running start over
+        session.execute(text("UPDATE ingestion_journal SET status = 'pending' WHERE status = 'running'"))
+        if from_date is not None and to_date is not None:
+            counts["planned"] = plan_backfill(session, from_date, to_date, chunk_days)
+        session.commit()
+
+        entries = [dict(row._mapping) for row in session.execute(PENDING_RANGES_QUERY, {"max_attempts": BACKFILL_MAX_ATTEMPTS})]
+        if not entries:
+            log("[INFO] Backfill journal has no pending ranges.")
+            return counts
+
+        log(f"[INFO] Backfilling {len(entries)} journaled ranges ({counts['planned']} newly planned) for {len({e['trading_symbol'] for e in entries})} symbols")
+        counts.update(asyncio.run(run_ranges(entries, max_workers)))
+
+        exhausted = session.query(func.count(IngestionJournal.id)).filter(IngestionJournal.status == "failed", IngestionJournal.attempts >= BACKFILL_MAX_ATTEMPTS).scalar()
+        duration = (datetime.now() - start_time).total_seconds() / 60
+        log(f"✅ Backfill finished in {duration:.1f} minutes. Done: {counts['done']}, Failed: {counts['failed']}, Left pending: {counts['skipped']}, Exhausted retries: {exhausted}")
+        return counts
+
+    except Exception as e:
+        session.rollback()
+        log(f"[ERROR] Backfill failed: {str(e)}")
+        return counts
+    finally:
+        session.close()
+        rate_controller.save()
@@ -2,8 +2,10 @@
 
 import time
 import random
+import asyncio
 import threading
 import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -14,16 +16,17 @@ from db.models.symbol import Symbol
 from db.models.eod_data import EODData
 from db.base_class import Base
 from scripts.constants import (DHAN_CHARTS_HISTORICAL_URL, INDIA_TZ, HEADERS, 
-                             SAFE_SLEEP_BETWEEN_REQUESTS, MAX_RETRIES, RETRY_BACKOFF_FACTOR, 
-                             RETRY_INITIAL_WAIT)
+                             MAX_RETRIES, RETRY_BACKOFF_FACTOR, RETRY_INITIAL_WAIT, ASYNC_FETCH_ENABLED)
+from scripts.rate_controller import get_rate_controller
 from db.database import DATABASE_URL
+from db.bulk_writer import bulk_upsert
 
 # Create database engine
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Rate limiting lock
-rate_limit_lock = threading.Semaphore(1)  # Only 1 API request at a time
+# Adaptive pacing shared by every thread / task hitting the historical API
+rate_controller = get_rate_controller("historical")
 
 def log(msg): print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
 
@@ -79,12 +82,12 @@ def fetch_eod_from_dhan(symbol: str, security_id: str, instrument_type: str, exc
     for attempt in range(MAX_RETRIES):
         try:
             # Apply rate limiting
-            with rate_limit_lock:
-                response = requests.post(DHAN_CHARTS_HISTORICAL_URL, headers=HEADERS, json=payload, timeout=30)
-                # Add jitter to sleep time to prevent synchronized retries
-                time.sleep(SAFE_SLEEP_BETWEEN_REQUESTS + random.uniform(0.1, 0.5))
+            rate_controller.wait()
+            request_start = time.time()
+            response = requests.post(DHAN_CHARTS_HISTORICAL_URL, headers=HEADERS, json=payload, timeout=30)
                 
             response.raise_for_status()
+            rate_controller.record_success(time.time() - request_start)
             return response.json()
 
         except requests.exceptions.HTTPError as e:
@@ -94,6 +97,7 @@ def fetch_eod_from_dhan(symbol: str, security_id: str, instrument_type: str, exc
                 circuit_breaker.record_failure()
                 wait = RETRY_INITIAL_WAIT * (RETRY_BACKOFF_FACTOR ** attempt) + random.uniform(0.1, 0.5)
                 log(f"[RETRY] {symbol} hit 429 rate limit. Waiting {wait:.1f}s... (Attempt {attempt+1}/{MAX_RETRIES})")
+                rate_controller.record_throttle(wait)
                 time.sleep(wait)
             elif status == 403:  # Auth error
                 log(f"[AUTH ERROR] {symbol} hit 403. Check credentials.")
@@ -132,137 +136,177 @@ def fetch_eod_from_dhan(symbol: str, security_id: str, instrument_type: str, exc
 
     return None
 
-def create_eod_objects(symbol_dict, data, after_date: datetime.date):
-    """Create EOD objects from API response with data validation."""
+EOD_PRICE_FIELDS = ["open", "high", "low", "close", "volume"]
+IST_OFFSET_SECONDS = int(INDIA_TZ.utcoffset(None).total_seconds())
+
+def _as_float_array(values) -> np.ndarray:
+    """float64 array of an API column; non-numeric entries become NaN."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+
+def parse_eod_candles(symbol_dict, data, after_date: datetime.date):
+    """Columnar EOD batch for the bulk writer from a historical API response.
+
+    Timestamps are converted to IST trading dates in one operation, then candles on or before
+    `after_date`, repeated dates (first one wins) and candles failing the OHLC sanity checks
+    are masked out in bulk. Returns (batch, skipped) where batch maps EODData columns to
+    numpy arrays and skipped counts rows dropped as "old", "dupe" and "invalid".
+    """
+    skipped = {"old": 0, "dupe": 0, "invalid": 0}
+    empty = {"date": np.array([], dtype="datetime64[D]")}
     if not data or "timestamp" not in data:
-        return [], 0, 0
+        return empty, skipped
+
+    columns = [data.get("timestamp", [])] + [data.get(field, []) for field in EOD_PRICE_FIELDS]
+    if len({len(col) for col in columns}) != 1:
+        log(f"[WARNING] Data length mismatch for {symbol_dict['trading_symbol']}")
+        return empty, skipped
+
+    ts, open_arr, high_arr, low_arr, close_arr, volume_arr = (_as_float_array(col) for col in columns)
+    keep = np.isfinite(ts)
+    skipped["invalid"] += int((~keep).sum())
+
+    # Epoch seconds -> IST calendar day
+    days = np.zeros(len(ts), dtype=np.int64)
+    days[keep] = np.floor_divide(ts[keep].astype(np.int64) + IST_OFFSET_SECONDS, 86400)
+    dates = days.astype("datetime64[D]")
+
+    old = keep & (dates <= np.datetime64(after_date, "D"))
+    skipped["old"] = int(old.sum())
+    keep &= ~old
+
+    # Keep the first candle of each date
+    candidates = np.flatnonzero(keep)
+    _, first = np.unique(dates[candidates], return_index=True)
+    keep[candidates] = False
+    keep[candidates[first]] = True
+    skipped["dupe"] = len(candidates) - len(first)
+
+    with np.errstate(invalid="ignore"):
+        valid = ((open_arr > 0) & (high_arr > 0) & (low_arr > 0) & (close_arr > 0) & np.isfinite(volume_arr) &
+                 (high_arr >= low_arr) & (high_arr >= open_arr) & (high_arr >= close_arr) &
+                 (low_arr <= open_arr) & (low_arr <= close_arr))
+    invalid = keep & ~valid
+    if invalid.any():
+        bad_dates = dates[invalid]
+        log(f"[WARNING] Invalid price data for {symbol_dict['trading_symbol']} on {int(invalid.sum())} days ({bad_dates.min()}..{bad_dates.max()})")
+        skipped["invalid"] += int(invalid.sum())
+    keep &= valid
+
+    n = int(keep.sum())
+    batch = {
+        "trading_symbol": np.full(n, symbol_dict["trading_symbol"], dtype=object),
+        "exchange": np.full(n, symbol_dict["exchange"], dtype=object),
+        "date": dates[keep],
+        "open": open_arr[keep],
+        "high": high_arr[keep],
+        "low": low_arr[keep],
+        "close": close_arr[keep],
+        "volume": np.round(volume_arr[keep]).astype(np.int64),
+        "fo_eligible": np.full(n, bool(symbol_dict["fo_eligible"])),
+    }
+    return batch, skipped
+
+def resolve_fetch_window(symbol_dict, from_date, last_date_lookup):
+    """Fetch start date for a symbol and the last date already stored (last EOD date + 1 day if available)."""
+    after_date = last_date_lookup.get(symbol_dict["trading_symbol"])
+    if after_date:
+        return (after_date + timedelta(days=1)).strftime("%Y-%m-%d"), after_date
+    return from_date, datetime.strptime(from_date, "%Y-%m-%d").date() - timedelta(days=1)
+
+def store_eod_response(symbol_dict, data, after_date, start_time: float) -> str:
+    """Parse an API response and bulk upsert its candles; returns a status line."""
+    symbol = symbol_dict["trading_symbol"]
+    if data is None:
+        return f"[FAIL] {symbol} - fetch failed"
         
-    seen_dates = set()
-    candles = []
-    skipped_old = 0
-    skipped_dupe = 0
+    if "timestamp" not in data or not data["timestamp"]:
+        return f"[SKIP] {symbol} - no candle data"
 
+    session = SessionLocal()
     try:
-        ts_list = data.get("timestamp", [])
-        open_list = data.get("open", [])
-        high_list = data.get("high", [])
-        low_list = data.get("low", [])
-        close_list = data.get("close", [])
-        volume_list = data.get("volume", [])
+        # Process data
+        batch, skipped = parse_eod_candles(symbol_dict, data, after_date)
         
-        # Validate lengths match
-        if not (len(ts_list) == len(open_list) == len(high_list) == 
-                len(low_list) == len(close_list) == len(volume_list)):
-            log(f"[WARNING] Data length mismatch for {symbol_dict['trading_symbol']}")
-            return [], 0, 0
-            
-        for i, ts in enumerate(ts_list):
-            # Convert timestamp to date
-            dt = datetime.fromtimestamp(ts, tz=INDIA_TZ).date()
-            
-            # Skip old data
-            if dt <= after_date:
-                skipped_old += 1
-                continue
-                
-            # Skip duplicates
-            if dt in seen_dates:
-                skipped_dupe += 1
-                continue
+        if not len(batch["date"]):
+            return f"[SKIP] {symbol} - all old ({skipped['old']}), dupes ({skipped['dupe']}) or invalid ({skipped['invalid']})"
 
-            seen_dates.add(dt)
-            
-            # Data validation
-            try:
-                open_val = float(open_list[i])
-                high_val = float(high_list[i])
-                low_val = float(low_list[i])
-                close_val = float(close_list[i])
-                volume_val = int(volume_list[i])
-                
-                # Skip invalid data
-                if (open_val <= 0 or high_val <= 0 or low_val <= 0 or close_val <= 0 or
-                    high_val < low_val or high_val < open_val or high_val < close_val or
-                    low_val > open_val or low_val > close_val):
-                    log(f"[WARNING] Invalid price data for {symbol_dict['trading_symbol']} on {dt}")
-                    continue
-                    
-                # Create EOD object
-                candles.append(EODData(
-                    trading_symbol=symbol_dict["trading_symbol"],
-                    exchange=symbol_dict["exchange"],
-                    date=dt,
-                    open=open_val,
-                    high=high_val,
-                    low=low_val,
-                    close=close_val,
-                    volume=volume_val,
-                    fo_eligible=symbol_dict["fo_eligible"]
-                ))
-            except (ValueError, TypeError) as e:
-                log(f"[WARNING] Invalid data format for {symbol_dict['trading_symbol']} on {dt}: {e}")
-                
-    except Exception as e:
-        log(f"[WARNING] Failed parsing {symbol_dict['trading_symbol']}: {str(e)}")
+        # Bulk upsert via COPY + merge
+        counts = bulk_upsert(session, EODData, batch, conflict_columns=["trading_symbol", "exchange", "date"])
+        session.commit()
         
-    return candles, skipped_old, skipped_dupe
+        elapsed = time.time() - start_time
+        return f"[OK] {symbol} - inserted {counts['inserted']}, updated {counts['updated']} in {elapsed:.2f}s, skipped: {skipped['old']} old, {skipped['dupe']} dupes, {skipped['invalid']} invalid"
+
+    except SQLAlchemyError as e:
+        session.rollback()
+        return f"[DB ERROR] {symbol}: {str(e)}"
+    except Exception as e:
+        session.rollback()
+        return f"[ERROR] {symbol} failed: {str(e)}"
+    finally:
+        session.close()
 
 def fetch_and_insert_one_symbol(symbol_dict, from_date, to_date, last_date_lookup):
     """Fetch and insert EOD data for one symbol with optimized database operations."""
-    session = SessionLocal()
     start_time = time.time()
     
     try:
-        symbol = symbol_dict["trading_symbol"]
-        # Determine start date - use last EOD date + 1 day if available
-        after_date = last_date_lookup.get(symbol)
-        
-        if after_date:
-            fetch_from_date = (after_date + timedelta(days=1)).strftime("%Y-%m-%d")
-        else:
-            fetch_from_date = from_date
-            after_date = datetime.strptime(from_date, "%Y-%m-%d").date() - timedelta(days=1)
+        fetch_from_date, after_date = resolve_fetch_window(symbol_dict, from_date, last_date_lookup)
 
         # Fetch data
         data = fetch_eod_from_dhan(
-            symbol=symbol,
+            symbol=symbol_dict["trading_symbol"],
             security_id=symbol_dict["security_id"],
             instrument_type=symbol_dict["instrument_type"],
             exchange_segment=symbol_dict["segment"],
             from_date=fetch_from_date,
             to_date=to_date
         )
+        return store_eod_response(symbol_dict, data, after_date, start_time)
 
-        if data is None:
-            return f"[FAIL] {symbol} - fetch failed"
-            
-        if "timestamp" not in data or not data["timestamp"]:
-            return f"[SKIP] {symbol} - no candle data"
+    except Exception as e:
+        return f"[ERROR] {symbol_dict['trading_symbol']} failed: {str(e)}"
 
-        # Process data
-        candles, skip_old, skip_dup = create_eod_objects(symbol_dict, data, after_date)
-        
-        if not candles:
-            return f"[SKIP] {symbol} - all old ({skip_old}) or dupes ({skip_dup})"
+async def fetch_all_symbols_async(symbol_dicts, from_date, to_date, last_date_lookup, on_result, max_workers: int = 5):
+    """Fetch every symbol concurrently through the token-bucket client; DB writes run on a thread pool.
 
-        # Bulk insert
-        session.bulk_save_objects(candles)
-        session.commit()
-        
-        elapsed = time.time() - start_time
-        return f"[OK] {symbol} - inserted {len(candles)} in {elapsed:.2f}s, skipped: {skip_old} old, {skip_dup} dupes"
+    `on_result(symbol, result)` is called as each symbol finishes.
+    """
+    from scripts.dhan_async_client import DhanAsyncClient
 
-    except SQLAlchemyError as e:
-        session.rollback()
-        return f"[DB ERROR] {symbol_dict['trading_symbol']}: {str(e)}"
-    except Exception as e:
-        session.rollback()
-        return f"[ERROR] {symbol_dict['trading_symbol']} failed: {str(e)}"
-    finally:
-        session.close()
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max_workers) as db_pool:
+        async with DhanAsyncClient(circuit_breaker, rate_controller) as client:
+            async def fetch_one(symbol_dict):
+                start_time = time.time()
+                try:
+                    fetch_from_date, after_date = resolve_fetch_window(symbol_dict, from_date, last_date_lookup)
+                    data = await client.fetch_historical(
+                        symbol=symbol_dict["trading_symbol"],
+                        security_id=symbol_dict["security_id"],
+                        instrument_type=symbol_dict["instrument_type"],
+                        exchange_segment=symbol_dict["segment"],
+                        from_date=fetch_from_date,
+                        to_date=to_date
+                    )
+                    result = await loop.run_in_executor(db_pool, store_eod_response, symbol_dict, data, after_date, start_time)
+                except Exception as e:
+                    result = f"[ERROR] {symbol_dict['trading_symbol']} failed: {str(e)}"
+                return symbol_dict["trading_symbol"], result
 
-def fetch_eod_data(from_date: str, to_date: str, max_workers: int = 5):
-    """Fetch EOD data for all active symbols with improved concurrency and monitoring."""
+            for task in asyncio.as_completed([fetch_one(s) for s in symbol_dicts]):
+                on_result(*(await task))
+            log(f"[INFO] Async client sent {client.requests} requests")
+
+def fetch_eod_data(from_date: str, to_date: str, max_workers: int = 5, use_async: bool = ASYNC_FETCH_ENABLED):
+    """Fetch EOD data for all active symbols with improved concurrency and monitoring.
+
+    With `use_async` requests go through the asyncio client, paced by a token bucket at the
+    API's documented rate; otherwise a thread pool shares the global rate limit lock.
+    """
     # Ensure tables exist
     Base.metadata.create_all(bind=engine)
     
@@ -291,29 +335,37 @@ def fetch_eod_data(from_date: str, to_date: str, max_workers: int = 5):
         
         last_date_lookup = {symbol: date for symbol, date in last_dates}
         
-        log(f"[INFO] EOD fetch from {from_date} to {to_date} for {len(symbol_dicts)} symbols with {max_workers} threads.")
+        mode = "async client" if use_async else f"{max_workers} threads"
+        log(f"[INFO] EOD fetch from {from_date} to {to_date} for {len(symbol_dicts)} symbols with {mode}.")
 
-        # Process symbols in parallel
-        completed, failed = 0, 0
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(fetch_and_insert_one_symbol, sym_dict, from_date, to_date, last_date_lookup): sym_dict["trading_symbol"] for sym_dict in symbol_dicts}
+        completed, failed, done = 0, 0, 0
+
+        def on_result(symbol, result):
+            nonlocal completed, failed, done
+            done += 1
+            log(result)
             
-            for i, future in enumerate(as_completed(futures)):
-                symbol = futures[future]
-                result = future.result()
-                log(result)
-                
-                if result.startswith("[OK]"):
-                    completed += 1
-                elif result.startswith("[FAIL]") or result.startswith("[ERROR]") or result.startswith("[DB ERROR]"):
-                    failed += 1
+            if result.startswith("[OK]"):
+                completed += 1
+            elif result.startswith("[FAIL]") or result.startswith("[ERROR]") or result.startswith("[DB ERROR]"):
+                failed += 1
+            
+            # Progress update
+            if done % 10 == 0 or done == len(symbol_dicts):
+                elapsed = (datetime.now() - start_time).total_seconds() / 60
+                remain = elapsed / done * (len(symbol_dicts) - done)
+                log(f"[PROGRESS] {done}/{len(symbol_dicts)}, Success: {completed}, "
+                    f"Failed: {failed}, Elapsed: {elapsed:.1f}m, Remaining: {remain:.1f}m")
+
+        if use_async:
+            asyncio.run(fetch_all_symbols_async(symbol_dicts, from_date, to_date, last_date_lookup, on_result, max_workers))
+        else:
+            # Process symbols in parallel
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(fetch_and_insert_one_symbol, sym_dict, from_date, to_date, last_date_lookup): sym_dict["trading_symbol"] for sym_dict in symbol_dicts}
                 
-                # Progress update
-                if (i + 1) % 10 == 0 or (i + 1) == len(symbol_dicts):
-                    elapsed = (datetime.now() - start_time).total_seconds() / 60
-                    remain = elapsed / (i + 1) * (len(symbol_dicts) - i - 1)
-                    log(f"[PROGRESS] {i+1}/{len(symbol_dicts)}, Success: {completed}, "
-                        f"Failed: {failed}, Elapsed: {elapsed:.1f}m, Remaining: {remain:.1f}m")
+                for future in as_completed(futures):
+                    on_result(futures[future], future.result())
 
         duration = (datetime.now() - start_time).total_seconds() / 60
         log(f"✅ EOD data fetch completed in {duration:.1f} minutes. Success: {completed}/{len(symbol_dicts)}")
@@ -323,6 +375,7 @@ def fetch_eod_data(from_date: str, to_date: str, max_workers: int = 5):
         log(f"[ERROR] fetch_eod_data failed: {str(e)}")
     finally:
         session.close()
+        rate_controller.save()
 
 if __name__ == "__main__":
     from scripts.constants import FROM_DATE, TO_DATE
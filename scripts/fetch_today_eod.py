@@ -2,9 +2,9 @@
 
 import time
 import random
-import threading
 import requests
 from datetime import datetime
+from typing import Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
@@ -12,10 +12,12 @@ from db.database import SessionLocal, engine
 from db.models.symbol import Symbol
 from db.models.eod_data import EODData
 from db.base_class import Base
-from scripts.constants import DHAN_TODAY_EOD_URL, HEADERS, INDIA_TZ, SAFE_SLEEP_BETWEEN_REQUESTS, MAX_RETRIES
+from db.bulk_writer import bulk_upsert
+from scripts.constants import DHAN_TODAY_EOD_URL, HEADERS, INDIA_TZ, MAX_RETRIES
+from scripts.rate_controller import get_rate_controller
 
-# Rate limiting lock
-rate_limit_lock = threading.Semaphore(1)
+# Adaptive pacing for the market quote API
+rate_controller = get_rate_controller("quote")
 
 
 def log(msg):
@@ -45,6 +47,34 @@ def retry_with_backoff(func, max_retries=MAX_RETRIES):
     return wrapper
 
 
+def quotes_to_columns(data: dict, id_to_symbol: dict, today_date: datetime.date) -> Tuple[dict, int]:
+    """Column arrays for the bulk writer from a quote response, and the number of quotes skipped for missing OHLC or bad values."""
+    columns = {k: [] for k in ["trading_symbol", "exchange", "date", "open", "high", "low", "close", "volume", "fo_eligible"]}
+    skipped = 0
+
+    for sec_id_str, quote in data.items():
+        try:
+            sym = id_to_symbol.get(int(sec_id_str))
+            ohlc = quote.get("ohlc", {})
+            if not sym or not all(k in ohlc for k in ["open", "high", "low", "close"]):
+                skipped += 1
+                continue
+            row = (float(ohlc["open"]), float(ohlc["high"]), float(ohlc["low"]), float(ohlc["close"]), int(quote.get("volume", 0)))
+        except (ValueError, TypeError, AttributeError) as e:
+            log(f"[DATA ERROR] ID {sec_id_str}: {str(e)}")
+            skipped += 1
+            continue
+
+        columns["trading_symbol"].append(sym.trading_symbol)
+        columns["exchange"].append(sym.exchange)
+        columns["date"].append(today_date)
+        for key, value in zip(["open", "high", "low", "close", "volume"], row):
+            columns[key].append(value)
+        columns["fo_eligible"].append(bool(sym.fo_eligible))
+
+    return columns, skipped
+
+
 @retry_with_backoff
 def fetch_batch(segment: str, chunk: list[int], batch_idx: int, total_batches: int, today_date: datetime.date, id_to_symbol: dict) -> str:
     """Fetch and process a batch of symbols."""
@@ -56,12 +86,15 @@ def fetch_batch(segment: str, chunk: list[int], batch_idx: int, total_batches: i
         payload = {segment: chunk}
 
         # Make API request with rate limiting
-        with rate_limit_lock:
-            response = requests.post(DHAN_TODAY_EOD_URL, headers=HEADERS, json=payload, timeout=30)
-            time.sleep(SAFE_SLEEP_BETWEEN_REQUESTS + random.uniform(0.1, 0.5))
+        rate_controller.wait()
+        request_start = time.time()
+        response = requests.post(DHAN_TODAY_EOD_URL, headers=HEADERS, json=payload, timeout=30)
 
         # Validate response
+        if response.status_code == 429:
+            rate_controller.record_throttle()
         response.raise_for_status()
+        rate_controller.record_success(time.time() - request_start)
         result = response.json()
 
         # Check for API error responses
@@ -75,66 +108,22 @@ def fetch_batch(segment: str, chunk: list[int], batch_idx: int, total_batches: i
         if not data:
             return f"[EMPTY] {segment} batch {batch_idx}/{total_batches} - No data returned"
 
-        # Process quotes data
-        processed = 0
-        success_count = 0
+        # Convert quotes to column arrays in one pass
+        batch, skipped = quotes_to_columns(data, id_to_symbol, today_date)
+        if not batch["trading_symbol"]:
+            return f"[EMPTY] {segment} batch {batch_idx}/{total_batches} - No usable quotes ({skipped} skipped)"
 
-        for sec_id_str, quote in data.items():
-            try:
-                sid = int(sec_id_str)
-                sym = id_to_symbol.get(sid)
-                if not sym:
-                    continue
-
-                processed += 1
-                ohlc = quote.get("ohlc", {})
-
-                if not all(k in ohlc for k in ["open", "high", "low", "close"]):
-                    continue
-
-                # Try to find existing record
-                existing = session.query(EODData).filter(EODData.trading_symbol == sym.trading_symbol, EODData.date == today_date).first()
-
-                if existing:
-                    # Update existing record
-                    existing.open = float(ohlc.get("open", 0))
-                    existing.high = float(ohlc.get("high", 0))
-                    existing.low = float(ohlc.get("low", 0))
-                    existing.close = float(ohlc.get("close", 0))
-                    existing.volume = int(quote.get("volume", 0))
-                    existing.fo_eligible = sym.fo_eligible
-                    existing.exchange = sym.exchange  # Ensure exchange is updated too
-                else:
-                    # Create new record
-                    new_record = EODData(trading_symbol=sym.trading_symbol, exchange=sym.exchange, date=today_date, open=float(ohlc.get("open", 0)), high=float(ohlc.get("high", 0)), low=float(ohlc.get("low", 0)), close=float(ohlc.get("close", 0)), volume=int(quote.get("volume", 0)), fo_eligible=sym.fo_eligible)
-                    session.add(new_record)
-
-                # Commit every 100 records to avoid large transactions
-                if processed % 100 == 0:
-                    try:
-                        session.commit()
-                    except SQLAlchemyError as e:
-                        session.rollback()
-                        log(f"[BATCH COMMIT ERROR] {segment} batch {batch_idx}, at record {processed}: {str(e)}")
-
-                success_count += 1
-
-            except (ValueError, TypeError, KeyError) as e:
-                log(f"[DATA ERROR] {segment} batch {batch_idx}, ID {sec_id_str}: {str(e)}")
-            except SQLAlchemyError as e:
-                log(f"[DB ERROR] Processing {sym.trading_symbol if 'sym' in locals() else sec_id_str}: {str(e)}")
-                # Continue processing other records
-
-        # Final commit for remaining records
+        # One COPY + INSERT ... ON CONFLICT merge for the whole batch
         try:
+            counts = bulk_upsert(session, EODData, batch, conflict_columns=["trading_symbol", "exchange", "date"])
             session.commit()
         except SQLAlchemyError as e:
             session.rollback()
-            log(f"[FINAL COMMIT ERROR] {segment} batch {batch_idx}: {str(e)}")
+            log(f"[DB ERROR] {segment} batch {batch_idx}: {str(e)}")
             return f"[DB ERROR] {segment} batch {batch_idx}: {str(e)}"
 
         elapsed = time.time() - start_time
-        return f"[OK] {segment} batch {batch_idx}/{total_batches} - Processed {processed}, inserted/updated {success_count} in {elapsed:.2f}s"
+        return f"[OK] {segment} batch {batch_idx}/{total_batches} - Inserted {counts['inserted']}, updated {counts['updated']}, skipped {skipped} in {elapsed:.2f}s"
 
     except requests.exceptions.HTTPError as e:
         session.rollback()
@@ -198,7 +187,7 @@ def fetch_today_eod_data(today_date: datetime.date, max_workers: int = 5):
 
                 if result.startswith("[OK]"):
                     successful += 1
-                elif result.startswith("[FAIL]") or result.startswith("[ERROR]") or result.startswith("[HTTP ERROR]"):
+                elif result.startswith(("[FAIL]", "[ERROR]", "[HTTP ERROR]", "[DB ERROR]")):
                     failed += 1
 
                 # Progress update
@@ -215,6 +204,7 @@ def fetch_today_eod_data(today_date: datetime.date, max_workers: int = 5):
         log(f"[ERROR] Failed to fetch today's data: {str(e)}")
     finally:
         session.close()
+        rate_controller.save()
 
 
 if __name__ == "__main__":
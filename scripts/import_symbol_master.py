@@ -13,6 +13,7 @@ from db.database import SessionLocal, engine
 from db.models.symbol import Symbol
 from db.base_class import Base
 from scripts.constants import CACHE_DIR
+from scripts.rate_controller import get_rate_controller
 
 # Constants
 DHAN_SCRIP_MASTER_URL = "https://images.dhan.co/api-data/api-scrip-master.csv"
@@ -29,7 +30,15 @@ def download_and_parse_csv() -> pd.DataFrame:
     """Download and parse CSV with caching and validation."""
     try:
         # Download CSV
+        rate_controller = get_rate_controller("scrip_master")
+        rate_controller.wait()
+        request_start = datetime.now()
         response = requests.get(DHAN_SCRIP_MASTER_URL, timeout=60)
+        if response.status_code == 429:
+            rate_controller.record_throttle()
+        elif response.status_code == 200:
+            rate_controller.record_success((datetime.now() - request_start).total_seconds())
+        rate_controller.save()
         if response.status_code != 200:
             raise Exception(f"Failed to download scrip master file. Status code: {response.status_code}")
         
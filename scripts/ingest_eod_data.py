@@ -2,6 +2,7 @@
 
 from scripts.fetch_eod_data import fetch_eod_data
 from scripts.fetch_today_eod import fetch_today_eod_data
+from scripts.eod_backfill import backfill_eod_data
 from db.models.eod_data import EODData
 from db.models.symbol import Symbol
 from sqlalchemy.orm import Session
@@ -9,7 +10,6 @@ from sqlalchemy import func
 from db.database import SessionLocal
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-import time
 
 
 def log(msg):
@@ -109,14 +109,17 @@ def ingest_eod_data():
         today = datetime.now().date()
         log(f"[INFO] Starting EOD data ingestion on {today}...")
 
+        # Finish ranges an interrupted backfill left in the journal before looking for gaps
+        backfill_eod_data()
+
         # Get last date in database
         last_date = get_last_eod_date(session)
 
         if last_date is None:
-            log("[INFO] No historical EOD data found. Fetching all...")
+            log("[INFO] No historical EOD data found. Backfilling all...")
             from scripts.constants import FROM_DATE, TO_DATE
 
-            fetch_eod_data(from_date=FROM_DATE, to_date=TO_DATE)
+            backfill_eod_data(from_date=datetime.strptime(FROM_DATE, "%Y-%m-%d").date(), to_date=datetime.strptime(TO_DATE, "%Y-%m-%d").date())
         else:
             # Find the next trading day after the last recorded date
             next_date = get_next_trading_day(last_date)
@@ -139,28 +142,9 @@ def ingest_eod_data():
                     log("[INFO] No trading days in the gap, nothing to fetch.")
                 else:
                     if (today - next_date).days > 30:
-                        # For large gaps, fetch in chunks to avoid timeouts
-                        log(f"[INFO] Large gap detected. Fetching in chunks...")
-                        chunk_size = 30  # days
-                        current_from = next_date
-
-                        while current_from < today:
-                            # Find the end date for this chunk
-                            current_to = current_from
-                            days_in_chunk = 0
-                            while days_in_chunk < chunk_size and current_to < today - timedelta(days=1):
-                                next_to = current_to + timedelta(days=1)
-                                if is_trading_day(next_to):
-                                    days_in_chunk += 1
-                                current_to = next_to
-
-                            log(f"[INFO] Fetching chunk from {current_from} to {current_to}")
-
-                            fetch_eod_data(from_date=current_from.strftime("%Y-%m-%d"), to_date=current_to.strftime("%Y-%m-%d"))
-
-                            # Small pause between chunks
-                            time.sleep(5)
-                            current_from = get_next_trading_day(current_to)
+                        # Large gaps go through the journal: concurrent, paced and resumable after a crash
+                        log(f"[INFO] Large gap detected. Backfilling through the ingestion journal...")
+                        backfill_eod_data(from_date=next_date, to_date=today - timedelta(days=1))
                     else:
                         # For smaller gaps, fetch in one go
                         yesterday = today - timedelta(days=1)
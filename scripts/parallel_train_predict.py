@@ -8,7 +8,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from db.database import SessionLocal
 from db.models.symbol import Symbol
-from core.train.daily_trainer import train_models_for_one_symbol
+from core.train.daily_trainer import train_models_for_one_symbol, init_training_worker
+from core.train.training_data import load_shared_training_dataset
 from core.predict.daily_predictor import predict_for_one_symbol
 from core.config import LIGHTGBM, DEFAULT_DAILY_STRONG_MOVE_THRESHOLD
 
@@ -25,9 +26,10 @@ def train_and_predict(symbol: str) -> str:
         
         # Use LIGHTGBM instead of RANDOM_FOREST for much faster training
         # Reduce max_days from 10 to 5 for faster processing
-        train_models_for_one_symbol(symbol=symbol, move_classifiers=[LIGHTGBM], direction_classifiers=[LIGHTGBM], threshold_percent=DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, min_days=1, max_days=5)
+        train_result = train_models_for_one_symbol(symbol=symbol, move_classifiers=[LIGHTGBM], direction_classifiers=[LIGHTGBM], threshold_percent=DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, min_days=1, max_days=5)
         
         train_duration = time.time() - train_start
+        train_label = "Training skipped (unchanged inputs)" if train_result["status"] == "skipped" else f"Trained in {train_duration:.1f}s"
         
         # Run prediction
         log(f"[PREDICT] Starting for {symbol}...")
@@ -38,7 +40,7 @@ def train_and_predict(symbol: str) -> str:
         total_duration = time.time() - start_time
         
         result_status = "✅" if predict_success else "⚠️"
-        return f"[{result_status}] {symbol}: Trained in {train_duration:.1f}s + Predicted in {predict_duration:.1f}s = {total_duration:.1f}s total"
+        return f"[{result_status}] {symbol}: {train_label} + Predicted in {predict_duration:.1f}s = {total_duration:.1f}s total"
 
     except Exception as e:
         duration = time.time() - start_time
@@ -48,6 +50,7 @@ def run_parallel_train_predict(max_workers: int = 8):
     """Run parallel training and prediction with improved monitoring and error handling."""
     session: Session = SessionLocal()
     start_time = datetime.now()
+    dataset = None
     
     try:
         # Get symbols
@@ -68,9 +71,16 @@ def run_parallel_train_predict(max_workers: int = 8):
             log(f"[INFO] Adjusted worker count to {adjusted_workers} based on available resources")
             max_workers = adjusted_workers
         
+        # Load training data once; workers attach to the shared buffers
+        try:
+            dataset = load_shared_training_dataset()
+        except Exception as e:
+            log(f"[WARNING] Shared training dataset unavailable, falling back to per-symbol queries: {e}")
+        dataset_handle = dataset.handle() if dataset is not None else None
+        
         # Process in parallel
         successful, failed = 0, 0
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_training_worker, initargs=(dataset_handle, [LIGHTGBM])) as executor:
             futures = {executor.submit(train_and_predict, symbol): symbol for symbol in symbol_list}
             
             for i, future in enumerate(as_completed(futures)):
@@ -107,4 +117,8 @@ def run_parallel_train_predict(max_workers: int = 8):
             f"Avg time per symbol: {avg_time_per_symbol:.1f}s")
 
     except SQLAlchemyError as e:
-        log(f"[ERROR] Database error: {str(e)}")
\ No newline at end of file
+        log(f"[ERROR] Database error: {str(e)}")
+    finally:
+        if dataset is not None:
+            dataset.close()
+        session.close()
\ No newline at end of file
@@ -0,0 +1,121 @@
+# scripts/rate_controller.py
+
+import os
+import json
+import time
+import random
+import threading
+from datetime import datetime
+from scripts.constants import (CACHE_DIR, SAFE_REQUESTS_PER_SECOND, DATA_API_MAX_PER_SECOND, RATE_MIN_PER_SECOND,
+                               RATE_ADDITIVE_STEP, RATE_DECREASE_FACTOR, RATE_LATENCY_SPIKE_FACTOR)
+
+RATE_STATE_FILE = os.path.join(CACHE_DIR, "rate_controller.json")
+
+def log(msg): print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+
+class AdaptiveRateController:
+    """AIMD pacing for one broker endpoint, shared by every thread or task calling it.
+
+    Each success raises the rate by `step` requests/second up to `max_rate`; a 429 or a
+    latency spike (latency above `spike_factor` x the moving average) multiplies it by
+    `decrease`, at most once per cooldown so a burst of in-flight failures counts once.
+    The learned rate is persisted in RATE_STATE_FILE and reused as the next run's start.
+    """
+    def __init__(self, name: str, initial_rate: float = SAFE_REQUESTS_PER_SECOND, min_rate: float = RATE_MIN_PER_SECOND, max_rate: float = DATA_API_MAX_PER_SECOND,
+                 step: float = RATE_ADDITIVE_STEP, decrease: float = RATE_DECREASE_FACTOR, spike_factor: float = RATE_LATENCY_SPIKE_FACTOR, state_file: str = RATE_STATE_FILE):
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.state_file = state_file
+        self.lock = threading.Lock()
+
+        saved = self._load_state().get(name, {})
+        self.rate = min(max(float(saved.get("rate", initial_rate)), min_rate), max_rate)
+        self.start_rate = self.rate
+        self.avg_latency = saved.get("avg_latency")
+        self.samples = 0
+        self.next_slot = 0.0
+        self.last_decrease = 0.0
+        self.successes = 0
+        self.throttles = 0
+        self.spikes = 0
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def reserve(self) -> float:
+        """Claim the next request slot; returns seconds to wait before sending."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            # Small jitter keeps concurrent callers from firing in lockstep
+            self.next_slot = slot + 1.0 / self.rate + random.uniform(0, 0.1 / self.rate)
+            return slot - now
+
+    def wait(self):
+        """Block until the next slot (threaded callers)."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record_success(self, latency: float):
+        with self.lock:
+            self.successes += 1
+            spike = self.samples >= 5 and self.avg_latency and latency > self.spike_factor * self.avg_latency
+            self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+            self.samples += 1
+            if spike:
+                self.spikes += 1
+                self._decrease(f"latency spike {latency:.2f}s (avg {self.avg_latency:.2f}s)")
+            else:
+                self.rate = min(self.max_rate, self.rate + self.step)
+
+    def record_throttle(self, pause: float = 0.0):
+        """Register a 429; optionally hold every caller back for `pause` seconds."""
+        with self.lock:
+            self.throttles += 1
+            self._decrease("429 rate limit")
+            if pause > 0:
+                self.next_slot = max(self.next_slot, time.monotonic() + pause)
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self.last_decrease < max(1.0, 1.0 / self.rate):
+            return
+        self.last_decrease = now
+        old = self.rate
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        log(f"[RATE] {self.name}: {reason} - {old:.2f} → {self.rate:.2f} req/s")
+
+    def summary(self) -> str:
+        return (f"{self.name}: {self.start_rate:.2f} → {self.rate:.2f} req/s, {self.successes} ok, "
+                f"{self.throttles} throttled, {self.spikes} latency spikes")
+
+    def save(self):
+        """Persist the learned rate for the next run and log it."""
+        with self.lock:
+            state = self._load_state()
+            state[self.name] = {"rate": round(self.rate, 3), "avg_latency": self.avg_latency, "updated_at": datetime.now().isoformat(timespec="seconds")}
+            try:
+                with open(self.state_file, "w") as f:
+                    json.dump(state, f, indent=2)
+            except OSError as e:
+                log(f"[WARNING] Could not save rate state: {e}")
+        log(f"[RATE] {self.summary()}")
+
+# One controller per endpoint, shared across the scripts of a process
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+def get_rate_controller(name: str, **kwargs) -> AdaptiveRateController:
+    with _controllers_lock:
+        if name not in _controllers:
+            _controllers[name] = AdaptiveRateController(name, **kwargs)
+        return _controllers[name]
@@ -0,0 +1,47 @@
+# scripts/run_backtest.py
+
+import os
+import argparse
+import pandas as pd
+from datetime import datetime, timedelta
+from core.backtest.engine import run_backtest, BACKTEST_HORIZON_BARS
+from core.config import BACKTEST_RESULTS_DIR, DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, STRONG_MOVE_CONFIDENCE_THRESHOLD
+
+def log(msg): print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+
+def save_tables(tables, output_dir: str, tag: str):
+    """Write every table to `{output_dir}/{tag}_{name}.csv`."""
+    os.makedirs(output_dir, exist_ok=True)
+    for name, df in tables.items():
+        path = os.path.join(output_dir, f"{tag}_{name}.csv")
+        df.to_csv(path, index=name != "predictions")
+        log(f"Saved {name} ({len(df)} rows) to {path}")
+
+if __name__ == "__main__":
+    today = datetime.now().date()
+    parser = argparse.ArgumentParser(description='Replay historical features through stored or walk-forward retrained models')
+    parser.add_argument('--start', default=str(today - timedelta(days=365)), help='First prediction date (YYYY-MM-DD)')
+    parser.add_argument('--end', default=str(today - timedelta(days=1)), help='Last prediction date (YYYY-MM-DD)')
+    parser.add_argument('--mode', choices=['walk_forward', 'stored'], default='walk_forward',
+                        help='walk_forward (refit panel models every fold) or stored (saved models, in-sample)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_DAILY_STRONG_MOVE_THRESHOLD, help='Strong move threshold in percent')
+    parser.add_argument('--confidence', type=float, default=STRONG_MOVE_CONFIDENCE_THRESHOLD, help='Move confidence needed for a signal')
+    parser.add_argument('--horizon', type=int, default=BACKTEST_HORIZON_BARS, help='Bars checked after each prediction')
+    parser.add_argument('--retrain-months', type=int, default=6, help='Walk-forward fold length in months')
+    parser.add_argument('--train-years', type=int, default=None, help='Rolling training window in years (default: expanding)')
+    parser.add_argument('--output-dir', default=BACKTEST_RESULTS_DIR, help='Directory for summary CSVs')
+
+    args = parser.parse_args()
+
+    tables = run_backtest(args.start, args.end, mode=args.mode, threshold=args.threshold, confidence_threshold=args.confidence, horizon=args.horizon, retrain_months=args.retrain_months, train_years=args.train_years)
+    if not tables:
+        log("No backtest results")
+        exit(1)
+
+    with pd.option_context("display.width", 200, "display.max_columns", 20, "display.float_format", "{:.3f}".format):
+        log("\nOverall:\n" + tables["overall"].to_string())
+        log("\nBy year:\n" + tables["by_year"].to_string())
+        log("\nBy confidence:\n" + tables["by_confidence"].to_string())
+        log("\nTop symbols by hit rate:\n" + tables["by_symbol"].head(10).to_string())
+
+    save_tables(tables, args.output_dir, f"{args.mode}_{args.start}_{args.end}")
@@ -7,6 +7,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from scripts.ingest_eod_data import ingest_eod_data
 from scripts.create_features import create_features
 from scripts.parallel_train_predict import run_parallel_train_predict
+from core.config import DAILY_MODEL_MODE
 from db.database import check_db_connection
 from core.validate.prediction_tracker import update_prediction_results
 from core.validate.feedback_optimizer import batch_optimize_models
@@ -48,6 +49,16 @@ def retrain_poor_performers():
     
     return result["status"] != "error"
 
+def train_and_predict_panel(max_workers: int = 6):
+    """Fit the cross-sectional panel models once, then score every symbol with them."""
+    from core.train.panel_trainer import train_panel_model
+    from core.predict.daily_predictor import predict_all_symbols
+    
+    result = train_panel_model()
+    if result["status"] == "failed":
+        raise RuntimeError(f"Panel training failed: {result['error']}")
+    predict_all_symbols(max_workers=max_workers)
+
 def run_daily_pipeline():
     """Run the complete daily pipeline with improved error handling and performance monitoring."""
     pipeline_start = datetime.now()
@@ -74,7 +85,11 @@ def run_daily_pipeline():
     
     # Step 4: Train and predict
     max_workers = 6  # Can be adjusted based on system resources
-    if not run_step_with_recovery(lambda: run_parallel_train_predict(max_workers=max_workers), "Model Training & Prediction"):
+    if DAILY_MODEL_MODE == "panel":
+        step = lambda: train_and_predict_panel(max_workers=max_workers)
+    else:
+        step = lambda: run_parallel_train_predict(max_workers=max_workers)
+    if not run_step_with_recovery(step, "Model Training & Prediction"):
         log("[WARNING] Model training and prediction had issues")
         # Continue anyway as this is not the last step
     